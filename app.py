@@ -1,13 +1,11 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from PIL import Image
+import io
 import os
 import logging
-import time
-from datetime import datetime
+
+# pandas, matplotlib and PIL are imported through perf.timed_import by the
+# sections that need them, so a cold start only pays for what is shown
+from cannes_calculator import calculation, charts, distribution, figures, history, launch, logs, metrics, perf, portfolio, scoring, whatif
 
 # Initialize session state for about section visibility
 if 'show_about' not in st.session_state:
@@ -17,19 +15,39 @@ if 'show_about' not in st.session_state:
 def toggle_about():
     st.session_state.show_about = not st.session_state.show_about
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+# Logo decoded and resized to its sidebar width once per process
+LOGO_WIDTH = 200
+
+@st.cache_resource
+def load_logo():
+    try:
+        logo_path = os.path.join(os.path.dirname(__file__), "images", "cannes_lions_logo.png")
+        if not os.path.exists(logo_path):
+            logger.warning(f"Logo file not found at {logo_path}")
+            return None
+        Image = perf.timed_import("PIL.Image")
+        with Image.open(logo_path) as logo:
+            if logo.width > LOGO_WIDTH:
+                logo = logo.resize((LOGO_WIDTH, int(1.0 * logo.height * LOGO_WIDTH / logo.width)), resample=Image.BILINEAR)
+            image = io.BytesIO()
+            logo.save(image, format="PNG")
+        return image.getvalue()
+    except Exception as e:
+        logger.error(f"Error loading logo: {e}")
+        return None
+
+# Probability distributions for percentile ranks: every input combination
+# (built and saved on first use) and, when built, historical entries
+@st.cache_resource(max_entries=2)
+def load_distributions(model_fingerprint):
+    return distribution.load_or_build(), distribution.load(distribution.ENTRIES_PATH)
+
+# Set up logging (once per process; CANNES_LOG_MODE=async moves file I/O off the request thread)
+logs.configure()
 logger = logging.getLogger("cannes_calculator")
 
 # Performance tracking
-start_time = time.time()
+perf.start_run()
 
 # App configuration
 st.set_page_config(
@@ -39,17 +57,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Path to images
-try:
-    logo_path = os.path.join(os.path.dirname(__file__), "images", "cannes_lions_logo.png")
-    if os.path.exists(logo_path):
-        logo = Image.open(logo_path)
-    else:
-        logo = None
-        logger.warning(f"Logo file not found at {logo_path}")
-except Exception as e:
-    logo = None
-    logger.error(f"Error loading logo: {e}")
+# Logging, the model watcher, metrics and the warm-up, once per process.
+# Already running when the app was started with cannes_calculator.launch
+launch.start_process()
+
+# Pick up a newly imported year of history without a restart
+if history.refresh():
+    logger.info("History store changed, redrawing the sidebar charts and results")
+    charts.clear_sidebar_charts()
+    calculation.result_cache.clear()
+
+# Hidden admin page with the metrics, at ?admin=<CANNES_ADMIN_TOKEN>
+admin_token = os.environ.get("CANNES_ADMIN_TOKEN")
+if admin_token and st.query_params.get("admin") == admin_token:
+    st.header("Metrics")
+    st.code(metrics.render(), language="text")
+    st.stop()
+
+# Logo (preloaded once per process)
+logo = load_logo()
 
 # Custom CSS
 st.markdown("""
@@ -66,66 +92,21 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .sidebar-content {
-        padding: 1rem;
-    }
-    .sidebar-footer {
-        position: fixed;
-        bottom: 0;
-        padding: 1rem;
-        width: 100%;
-        text-align: center;
-        background-color: #f0f0f0;
-    }
-    .about-link {
-        color: #B8860B;
-        text-decoration: none;
-        font-weight: bold;
-    }
-    .about-link:hover {
-        text-decoration: underline;
-    }
     .info-box {
         background-color: #f8f9fa;
         border-radius: 5px;
         padding: 1rem;
         margin-bottom: 1rem;
     }
-    .highlight {
-        color: #B8860B;
-        font-weight: bold;
-    }
     .contact-form {
         background-color: #f8f9fa;
         padding: 20px;
         border-radius: 10px;
         margin-top: 20px;
     }
-    .stat-container {
-        display: flex;
-        justify-content: space-between;
-        flex-wrap: wrap;
-    }
-    .stat-box {
-        background-color: #f8f9fa;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 0.5rem;
-        text-align: center;
-        flex: 1;
-        min-width: 200px;
-    }
-    .stat-number {
-        font-size: 2rem;
-        font-weight: bold;
-        color: #B8860B;
-    }
-    .stat-label {
-        font-size: 1rem;
-        color: #666;
-    }
 </style>
 """, unsafe_allow_html=True)
+perf.mark("setup")
 
 # Sidebar with logo
 with st.sidebar:
@@ -147,6 +128,7 @@ with st.sidebar:
     
   # Simple About button
 st.sidebar.button("About", on_click=toggle_about, key="about_button", help="Learn more about this project", type="primary", use_container_width=True)
+perf.mark("sidebar")
 
 
 # Main content
@@ -210,6 +192,8 @@ if st.session_state.show_about:
     
     st.markdown("---")
 
+perf.mark("about")
+
 # Historical Context section
 if historical_context:
     st.header("Historical Context (1954-Present)")
@@ -243,45 +227,33 @@ if historical_context:
     
     st.markdown("---")
 
+perf.mark("historical_context")
+
 # Top Winning Countries section
 if top_countries:
     st.header("Top Winning Countries (2015-2024)")
     
-    # Data for top countries
-    years = [2024, 2023, 2022, 2021, 2019, 2018, 2017, 2016, 2015]
-    
-    country_data = {
-        "United States": [234, 218, 202, 187, 156, 147, 121, 143, 128],
-        "United Kingdom": [82, 77, 71, 68, 89, 84, 76, 70, 67],
-        "Brazil": [78, 69, 67, 58, 52, 49, 41, 90, 107],
-        "France": [45, 41, 39, 35, 40, 38, 33, 43, 34],
-        "Germany": [48, 43, 38, 32, 35, 31, 27, 33, 29]
-    }
-    
-    # Create DataFrame
-    df_countries = pd.DataFrame(country_data, index=years)
-    
-    # Plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    df_countries.plot(kind='bar', ax=ax)
-    plt.title('Lions Won by Top Countries (2015-2024)')
-    plt.xlabel('Year')
-    plt.ylabel('Number of Lions')
-    plt.legend(title='Country')
-    plt.tight_layout()
-    st.pyplot(fig)
+    st.image(charts.countries_chart_png(), use_column_width=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-        ### 2024 Top Winners
-        1. **United States**: 234 Lions
-        2. **United Kingdom**: 82 Lions
-        3. **Brazil**: 78 Lions
-        4. **Germany**: 48 Lions
-        5. **France**: 45 Lions
-        """)
+        store = history.default()
+        if store is not None:
+            winners = store.counts("country", store.latest_year, wins_only=True)
+            ranking = sorted(winners.items(), key=lambda item: -item[1])[:5]
+            st.markdown(f"### {store.latest_year} Top Winners\n" + "\n".join(
+                f"{rank}. **{country}**: {wins} Lions" for rank, (country, wins) in enumerate(ranking, start=1)
+            ))
+        else:
+            st.markdown("""
+            ### 2024 Top Winners
+            1. **United States**: 234 Lions
+            2. **United Kingdom**: 82 Lions
+            3. **Brazil**: 78 Lions
+            4. **Germany**: 48 Lions
+            5. **France**: 45 Lions
+            """)
     
     with col2:
         st.markdown("""
@@ -295,6 +267,8 @@ if top_countries:
     
     st.markdown("---")
 
+perf.mark("top_countries")
+
 # Top Agencies section
 if top_agencies:
     st.header("Top Agencies & Networks (2015-2024)")
@@ -329,59 +303,17 @@ if top_agencies:
         - **2015**: R/GA (New York), Leo Burnett (Toronto), Ogilvy (Brazil)
         """)
     
-    # Network performance data
-    networks = ['WPP', 'Omnicom', 'Publicis', 'IPG', 'Dentsu']
-    network_data = {
-        2024: [156, 143, 138, 92, 67],
-        2022: [145, 132, 121, 87, 62],
-        2020: [0, 0, 0, 0, 0],  # No festival in 2020
-        2018: [128, 152, 115, 76, 58],
-        2016: [163, 152, 131, 91, 57],
-    }
-    
-    # Create DataFrame
-    df_networks = pd.DataFrame(network_data, index=networks)
-    
-    # Plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    df_networks.plot(kind='bar', ax=ax)
-    plt.title('Lions Won by Top Networks (Selected Years)')
-    plt.xlabel('Network')
-    plt.ylabel('Number of Lions')
-    plt.legend(title='Year')
-    plt.tight_layout()
-    st.pyplot(fig)
+    st.image(charts.networks_chart_png(), use_column_width=True)
     
     st.markdown("---")
 
+perf.mark("top_agencies")
+
 # Submission Trends section
 if submission_trends:
     st.header("Submission Trends (2015-2024)")
     
-    # Submission data
-    years = [2016, 2017, 2018, 2019, 2021, 2022, 2023, 2024]
-    submissions = [43101, 41170, 32372, 30953, 29074, 25464, 26992, 26753]
-    
-    # Create DataFrame
-    df_submissions = pd.DataFrame({'Year': years, 'Submissions': submissions})
-    
-    # Plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    plt.plot(df_submissions['Year'], df_submissions['Submissions'], marker='o', linestyle='-', linewidth=2)
-    plt.title('Cannes Lions Submissions (2016-2024)')
-    plt.xlabel('Year')
-    plt.ylabel('Number of Submissions')
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # Annotate key points
-    plt.annotate('All-time high: 43,101', xy=(2016, 43101), xytext=(2016-0.5, 43101+1500),
-                arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8))
-    
-    plt.annotate('COVID impact', xy=(2021, 29074), xytext=(2021-1, 29074-3000),
-                arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8))
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+    st.image(charts.submissions_chart_png(), use_column_width=True)
     
     col1, col2 = st.columns(2)
     
@@ -407,436 +339,247 @@ if submission_trends:
     
     st.markdown("---")
 
-# Award Calculator Form
+perf.mark("submission_trends")
+
+# Award Calculator Form. Its inputs only reach the script when the form is
+# submitted, so editing them reruns nothing, and the submitted profile is
+# kept in the session so the result stays up while other sections rerun
 st.header("Calculate Your Win Probability")
 
-col1, col2 = st.columns(2)
-
-with col1:
-    category = st.selectbox(
-        "Category",
-        [
-            "Film", "Digital", "Print & Publishing", "Outdoor", 
-            "Design", "Radio & Audio", "Mobile", "Social & Influencer", 
-            "PR", "Direct", "Media", "Creative Data", "Creative Strategy",
-            "Creative Commerce", "Health & Wellness", "Innovation"
-        ]
-    )
-    
-    country = st.selectbox(
-        "Country of Submission",
-        [
-            "United States", "United Kingdom", "France", "Brazil", "Germany", 
-            "Japan", "Australia", "Canada", "Spain", "Italy", "Sweden", 
-            "Netherlands", "China", "South Korea", "Argentina", "India", 
-            "Turkey", "South Africa", "Mexico", "Thailand", 
-            "United Arab Emirates", "Other"
-        ]
-    )
-    
-    agency_size = st.selectbox(
-        "Agency Size",
-        ["Large Network Agency", "Mid-Size Independent", "Small Boutique", "In-house Team"]
-    )
+with st.form("calculator"):
+    col1, col2 = st.columns(2)
     
-    previous_wins = st.number_input("Previous Wins (Last 3 Years)", min_value=0, max_value=50, value=0)
-
-with col2:
-    years_experience = st.slider("Years Submitting to Cannes Lions", 0, 30, 1)
+    with col1:
+        category = st.selectbox(
+            "Category",
+            scoring.options("category")
+        )
+        
+        country = st.selectbox(
+            "Country of Submission",
+            scoring.options("country")
+        )
+        
+        agency_size = st.selectbox(
+            "Agency Size",
+            scoring.options("agency_size")
+        )
+        
+        previous_wins = st.number_input(
+            "Previous Wins (Last 3 Years)",
+            min_value=scoring.PREVIOUS_WINS_RANGE[0],
+            max_value=scoring.PREVIOUS_WINS_RANGE[1],
+            value=0
+        )
     
-    budget_level = st.selectbox(
-        "Production Budget Level",
-        ["High (Top 10%)", "Above Average", "Average", "Below Average", "Low (Bottom 10%)"]
+    with col2:
+        years_experience = st.slider("Years Submitting to Cannes Lions", *scoring.YEARS_EXPERIENCE_RANGE, 1)
+        
+        budget_level = st.selectbox(
+            "Production Budget Level",
+            scoring.options("budget_level")
+        )
+        
+        brand_prominence = st.selectbox(
+            "Client Brand Prominence",
+            scoring.options("brand_prominence")
+        )
+        
+        campaign_results = st.selectbox(
+            "Campaign Results",
+            scoring.options("campaign_results")
+        )
+        
+        creative_approach = st.selectbox(
+            "Creative Approach",
+            scoring.options("creative_approach")
+        )
+    
+    show_uncertainty = st.checkbox(
+        "Show uncertainty range",
+        help="Simulate the result with every factor treated as an estimate rather than an exact value."
     )
     
-    brand_prominence = st.selectbox(
-        "Client Brand Prominence",
-        ["Global Leader", "Regional Leader", "National Player", "Local Business", "Startup/Unknown"]
-    )
+    controllable_labels = {scoring.BREAKDOWN_LABELS[field]: field for field in whatif.CONTROLLABLE}
+    keep_fixed = [controllable_labels[label] for label in st.multiselect(
+        "Factors you can't change",
+        list(controllable_labels),
+        help="The best achievable changes below will leave these as they are."
+    )]
     
-    campaign_results = st.selectbox(
-        "Campaign Results",
-        ["Exceptional (Measurable Impact)", "Strong", "Good", "Average", "Below Average"]
+    submitted = st.form_submit_button("Calculate Win Probability")
+
+if submitted:
+    st.session_state.calculation = dict(
+        profile=dict(
+            category=category, country=country, agency_size=agency_size,
+            previous_wins=previous_wins, years_experience=years_experience,
+            budget_level=budget_level, brand_prominence=brand_prominence,
+            campaign_results=campaign_results, creative_approach=creative_approach
+        ),
+        show_uncertainty=show_uncertainty,
+        keep_fixed=keep_fixed,
     )
-    
-    creative_approach = st.selectbox(
-        "Creative Approach",
-        ["Groundbreaking Innovation", "Fresh Perspective", "Solid Execution", "Standard Approach"]
+
+perf.mark("form")
+
+def calculate(profile, show_uncertainty, keep_fixed):
+    """The result for one submitted profile, from the cache shared by every session.
+    
+    Also remembered in the session under its inputs, so reruns that don't
+    change them (the portfolio planner, a chart) redraw it without another lookup.
+    """
+    # One model snapshot for the key and the result, even if a reload lands meanwhile
+    model = scoring.current()
+    key = calculation.cache_key(profile, show_uncertainty, keep_fixed, model)
+    remembered = st.session_state.get("calculation_result")
+    if remembered is not None and remembered[0] == key:
+        return remembered[1]
+    result = calculation.calculate(
+        profile, show_uncertainty, keep_fixed,
+        distributions=load_distributions(model.fingerprint),
+        model=model,
     )
+    st.session_state.calculation_result = (key, result)
+    return result
 
-# Calculate button
-if st.button("Calculate Win Probability"):
-    # Log calculation request
-    logger.info(f"Calculating win probability for {category} category from {country}")
-    
-    # Base probability factors
-    category_factors = {
-        "Film": 0.85,
-        "Digital": 1.2,
-        "Print & Publishing": 0.7,
-        "Outdoor": 0.9,
-        "Design": 1.0,
-        "Radio & Audio": 0.65,
-        "Mobile": 1.1,
-        "Social & Influencer": 1.3,
-        "PR": 0.95,
-        "Direct": 0.8,
-        "Media": 0.9,
-        "Creative Data": 1.15,
-        "Creative Strategy": 1.05,
-        "Creative Commerce": 1.1,
-        "Health & Wellness": 0.85,
-        "Innovation": 1.25
-    }
-    
-    country_factors = {
-        "United States": 1.3,
-        "United Kingdom": 1.3,
-        "France": 1.3,
-        "Brazil": 1.3,
-        "Germany": 1.3,
-        "Japan": 1.3,
-        "Australia": 1.3,
-        "Canada": 1.0,
-        "Spain": 1.0,
-        "Italy": 1.0,
-        "Sweden": 1.0,
-        "Netherlands": 1.0,
-        "China": 1.0,
-        "South Korea": 1.0,
-        "Argentina": 1.0,
-        "India": 0.8,
-        "Turkey": 0.8,
-        "South Africa": 0.8,
-        "Mexico": 0.8,
-        "Thailand": 0.8,
-        "United Arab Emirates": 0.8,
-        "Other": 0.7
-    }
-    
-    agency_size_factors = {
-        "Large Network Agency": 1.2,
-        "Mid-Size Independent": 1.0,
-        "Small Boutique": 0.85,
-        "In-house Team": 0.7
-    }
-    
-    budget_level_factors = {
-        "High (Top 10%)": 1.3,
-        "Above Average": 1.15,
-        "Average": 1.0,
-        "Below Average": 0.85,
-        "Low (Bottom 10%)": 0.7
-    }
-    
-    brand_prominence_factors = {
-        "Global Leader": 1.25,
-        "Regional Leader": 1.1,
-        "National Player": 1.0,
-        "Local Business": 0.85,
-        "Startup/Unknown": 0.7
-    }
-    
-    campaign_results_factors = {
-        "Exceptional (Measurable Impact)": 1.4,
-        "Strong": 1.2,
-        "Good": 1.0,
-        "Average": 0.8,
-        "Below Average": 0.6
-    }
-    
-    creative_approach_factors = {
-        "Groundbreaking Innovation": 1.5,
-        "Fresh Perspective": 1.2,
-        "Solid Execution": 0.9,
-        "Standard Approach": 0.6
-    }
-    
-    # Calculate base probability
-    base_probability = 0.03  # 3% base chance
-    
-    # Apply factors
-    probability = base_probability
-    probability *= category_factors[category]
-    probability *= country_factors[country]
-    probability *= agency_size_factors[agency_size]
-    probability *= budget_level_factors[budget_level]
-    probability *= brand_prominence_factors[brand_prominence]
-    probability *= campaign_results_factors[campaign_results]
-    probability *= creative_approach_factors[creative_approach]
-    
-    # Adjust for previous wins
-    if previous_wins > 0:
-        probability *= (1 + (previous_wins * 0.05))
-    
-    # Adjust for experience
-    if years_experience > 1:
-        probability *= (1 + (min(years_experience, 10) * 0.02))
-    
-    # Cap probability
-    probability = min(probability, 0.75)  # Maximum 75% chance
+submission = st.session_state.get("calculation")
+if submission:
+    profile = submission["profile"]
+    result = calculate(profile, submission["show_uncertainty"], submission["keep_fixed"])
+    probability = result["probability"]
     
     # Display results
     st.success(f"Your estimated probability of winning: {probability:.1%}")
     
+    # Where the profile ranks
+    if result["ranking"]:
+        st.caption(result["ranking"])
+    
+    # Uncertainty band from Monte Carlo simulation of the factors
+    band = result["band"]
+    if band is not None:
+        st.info(
+            f"{band['mass']:.0%} credible interval: {band['low']:.1%} to {band['high']:.1%} "
+            f"(median {band['median']:.1%} over {band['samples']:,} simulations)"
+        )
+        pd = perf.timed_import("pandas")
+        edges = band["edges"]
+        histogram = pd.DataFrame(
+            {"Simulations": band["counts"]},
+            index=pd.Index([50 * (low + high) for low, high in zip(edges, edges[1:])], name="Win probability (%)")
+        )
+        st.bar_chart(histogram)
+    
     # Create columns for detailed breakdown
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Category Competitiveness")
         
-        # Category data
-        category_entries = {
-            "Film": 2100,
-            "Digital": 2850,
-            "Print & Publishing": 1450,
-            "Outdoor": 2300,
-            "Design": 2050,
-            "Radio & Audio": 850,
-            "Mobile": 1750,
-            "Social & Influencer": 3100,
-            "PR": 1900,
-            "Direct": 1650,
-            "Media": 1850,
-            "Creative Data": 1200,
-            "Creative Strategy": 1100,
-            "Creative Commerce": 1400,
-            "Health & Wellness": 1300,
-            "Innovation": 950
-        }
-        
-        st.info(f"The {category} category received approximately {category_entries[category]} entries in 2024.")
+        category_entries, entries_year = result["category_entries"]
+        st.info(f"The {profile['category']} category received approximately {category_entries} entries in {entries_year}.")
         
         # Average win rate
-        avg_win_rate = 0.03 * category_factors[category]
-        st.info(f"Average win rate in this category: {avg_win_rate:.1%}")
+        st.info(f"Average win rate in this category: {result['avg_win_rate']:.1%}")
         
         # Your comparison
-        if probability > avg_win_rate:
-            st.success(f"Your entry is {probability/avg_win_rate:.1f}x more likely to win than average.")
-        else:
-            st.warning(f"Your entry is {avg_win_rate/probability:.1f}x less likely to win than average.")
+        kind, comparison = result["comparison"]
+        (st.success if kind == "success" else st.warning)(comparison)
         
         # Country-specific insights
         st.subheader("Country-Specific Insights")
-        
-        country_insights = {
-            "United States": "US entries dominate with the highest number of wins. Strong in Film, Digital, and Social categories.",
-            "United Kingdom": "UK agencies excel in Creative Strategy and PR categories with innovative campaigns.",
-            "France": "French entries are known for strong Design and Film craft with artistic sensibilities.",
-            "Brazil": "Brazilian agencies are celebrated for bold, provocative creative approaches.",
-            "Germany": "German entries stand out for technical excellence and precision in execution.",
-            "Japan": "Japanese work is recognized for unique aesthetic and innovative technology integration.",
-            "Australia": "Australian agencies excel in Outdoor and PR categories with bold approaches.",
-            "Canada": "Canadian entries perform well in Purpose-driven campaigns and Social Good.",
-            "Spain": "Spanish work stands out in Film Craft and Design with strong cultural elements.",
-            "Italy": "Italian entries excel in Design and Craft categories with strong aesthetic sensibility.",
-            "Sweden": "Swedish agencies are known for minimalist design and digital innovation.",
-            "Netherlands": "Dutch entries perform well in Design and Creative Strategy categories.",
-            "China": "Chinese work is gaining recognition for digital innovation and scale.",
-            "South Korea": "Korean entries stand out for technology integration and digital craft.",
-            "Argentina": "Argentinian agencies excel in Film and Print with emotional storytelling.",
-            "India": "Indian entries are recognized for purpose-driven campaigns with cultural relevance.",
-            "Turkey": "Turkish work stands out when it leverages unique cultural perspectives.",
-            "South Africa": "South African entries excel in purpose-driven campaigns addressing social issues.",
-            "Mexico": "Mexican agencies perform well in Film and Design with strong cultural elements.",
-            "Thailand": "Thai work is recognized for craft excellence and emotional storytelling.",
-            "United Arab Emirates": "UAE entries stand out in Outdoor and Experiential categories.",
-            "Other": "Entries from emerging markets can stand out with unique cultural perspectives."
-        }
-        
-        st.info(country_insights[country])
+        st.info(result["country_insight"])
     
     with col2:
         st.subheader("Your Strength Factors")
-        
-        # Prepare data for radar chart
-        categories = ['Category', 'Country', 'Agency Size', 'Previous Wins', 
-                     'Experience', 'Budget', 'Brand', 'Results', 'Creativity']
-        
-        # Calculate normalized values (0-1 scale)
-        previous_wins_factor = min(1.0, (1 + (previous_wins * 0.05)) / 1.5)
-        experience_factor = min(1.0, (1 + (min(years_experience, 10) * 0.02)) / 1.2)
-        
-        values = [
-            category_factors[category] / 1.5,
-            country_factors[country] / 1.5,
-            agency_size_factors[agency_size] / 1.5,
-            previous_wins_factor,
-            experience_factor,
-            budget_level_factors[budget_level] / 1.5,
-            brand_prominence_factors[brand_prominence] / 1.5,
-            campaign_results_factors[campaign_results] / 1.5,
-            creative_approach_factors[creative_approach] / 1.5
-        ]
-        
-        # Create radar chart
-        fig = plt.figure(figsize=(8, 8))
-        ax = fig.add_subplot(111, polar=True)
-        
-        # Plot data
-        angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-        values += values[:1]  # Close the loop
-        angles += angles[:1]  # Close the loop
-        
-        ax.plot(angles, values, linewidth=2, linestyle='solid')
-        ax.fill(angles, values, alpha=0.25)
-        
-        # Set category labels
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(categories)
-        
-        # Remove radial labels and set limits
-        ax.set_yticklabels([])
-        ax.set_ylim(0, 1)
-        
-        # Add title
-        plt.title('Your Strength Profile', size=15, y=1.1)
-        
-        st.pyplot(fig)
+        st.image(result["radar_svg"], use_column_width=True)
         
         # Detailed factor breakdown
         st.subheader("Factor Breakdown")
         
-        factors_df = pd.DataFrame({
-            'Factor': ['Category Type', 'Country', 'Agency Size', 'Previous Wins', 
-                      'Years Experience', 'Production Budget', 'Brand Prominence', 
-                      'Campaign Results', 'Creative Approach'],
-            'Impact': [
-                f"{category}: {category_factors[category]:.2f}x",
-                f"{country}: {country_factors[country]:.2f}x",
-                f"{agency_size}: {agency_size_factors[agency_size]:.2f}x",
-                f"{previous_wins} wins: {(1 + (previous_wins * 0.05)):.2f}x",
-                f"{years_experience} years: {(1 + (min(years_experience, 10) * 0.02)):.2f}x",
-                f"{budget_level}: {budget_level_factors[budget_level]:.2f}x",
-                f"{brand_prominence}: {brand_prominence_factors[brand_prominence]:.2f}x",
-                f"{campaign_results}: {campaign_results_factors[campaign_results]:.2f}x",
-                f"{creative_approach}: {creative_approach_factors[creative_approach]:.2f}x"
-            ]
-        })
-        
-        st.table(factors_df)
+        pd = perf.timed_import("pandas")
+        st.table(pd.DataFrame(result["breakdown"], columns=["Factor", "Impact"]))
     
     # Tips to improve chances
     st.subheader("Tips to Improve Your Chances")
-    
-    tips = []
-    
-    if category_factors[category] < 1.0:
-        tips.append(f"Consider entering more competitive categories like Digital (1.2x) or Social & Influencer (1.3x) instead of {category} ({category_factors[category]:.2f}x).")
-    
-    if country_factors[country] < 1.0:
-        tips.append(f"Entries from {country} have historically performed below average. Consider collaborating with agencies from top-performing countries.")
-    
-    if agency_size_factors[agency_size] < 1.0:
-        tips.append(f"As a {agency_size}, consider partnering with larger agencies to increase visibility and resources.")
-    
-    if previous_wins == 0:
-        tips.append("Build credibility by winning at regional awards before attempting Cannes Lions.")
-    
-    if years_experience < 3:
-        tips.append("Study past winners in your category to understand what the judges look for.")
-    
-    if budget_level_factors[budget_level] < 1.0:
-        tips.append("Focus on innovative ideas that don't require large budgets, particularly in Design or PR categories.")
-    
-    if brand_prominence_factors[brand_prominence] < 1.0:
-        tips.append(f"For {brand_prominence} brands, focus on breakthrough creative that generates earned media attention.")
-    
-    if campaign_results_factors[campaign_results] < 1.2:
-        tips.append("Strengthen your entry with clear, measurable results and business impact.")
-    
-    if creative_approach_factors[creative_approach] < 1.2:
-        tips.append("Cannes rewards innovation and fresh thinking. Push creative boundaries further.")
-    
-    for tip in tips:
+    for tip in result["tips"]:
         st.info(tip)
     
-    # Log completion
-    logger.info(f"Calculation completed: {probability:.1%} probability for {category} from {country}")
-
-# About section (hidden by default, shown when link is clicked)
-st.markdown("""
-<div id="about-section" style="display:none;">
-    <h2>About This Project</h2>
-    
-    <div class="info-box">
-        <h3>Data & Methodology</h3>
-        <p>This calculator analyzes <span class="highlight">71 years</span> of Cannes Lions Festival history, processing data from <span class="highlight">over 250,000 submissions</span> across <span class="highlight">30 award categories</span> and <span class="highlight">more than 100 countries</span>. The algorithm considers historical win rates, category competitiveness, country performance, agency track records, and other key factors to estimate your probability of winning.</p>
-        
-        <div class="stat-container">
-            <div class="stat-box">
-                <div class="stat-number">71</div>
-                <div class="stat-label">Years of Festival Data</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">250,000+</div>
-                <div class="stat-label">Submissions Analyzed</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">30</div>
-                <div class="stat-label">Award Categories</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">100+</div>
-                <div class="stat-label">Countries</div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="info-box">
-        <h3>Created with Manus</h3>
-        <p>This project was created using Manus, an advanced AI agent with capabilities in complex data analysis, web development, and creative problem-solving. Manus analyzed historical Cannes Lions data, identified patterns in winning submissions, and developed both the prediction algorithm and interactive web interface.</p>
-    </div>
+    # Best combinations of the factors the team can still change
+    st.subheader("Best Achievable Changes")
     
-    <div class="info-box">
-        <h3>Limitations</h3>
-        <p>This calculator provides estimates based on historical data and should be used as a guide only. Actual results may vary as judging criteria evolve and industry trends change. The creative quality of your specific entry remains the most important factor and cannot be fully quantified.</p>
-    </div>
+    suggestions = result["suggestions"]
+    for suggestion in suggestions:
+        changes = ", ".join(f"{scoring.BREAKDOWN_LABELS[field]}: {option}" for field, option in suggestion["changes"].items())
+        st.info(f"{changes} → {suggestion['probability']:.1%} (+{suggestion['gain']:.1%})")
+    if not suggestions:
+        st.info("No change to the factors you control would raise your chances further.")
+
+perf.mark("calculation")
+
+# Entry portfolio planner (only built when switched on)
+if st.checkbox("Plan an entry portfolio"):
+    st.header("Entry Portfolio Planner")
+    st.write(
+        "List the pieces of work you could enter. Each one shares the agency details above. "
+        "The planner picks the entries and categories with the most expected Lions within your entry-fee budget."
+    )
+    pd = perf.timed_import("pandas")
+    
+    work_fields = ["budget_level", "brand_prominence", "campaign_results", "creative_approach"]
+    works_df = st.data_editor(
+        pd.DataFrame([{"name": "Work 1", "budget_level": budget_level, "brand_prominence": brand_prominence,
+                       "campaign_results": campaign_results, "creative_approach": creative_approach}]),
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "name": st.column_config.TextColumn("Work", required=True),
+            **{field: st.column_config.SelectboxColumn(scoring.BREAKDOWN_LABELS[field], options=scoring.options(field), required=True)
+               for field in work_fields}
+        },
+        key="portfolio_works"
+    )
     
-    <div class="contact-form">
-        <h3>Contact Us</h3>
-        <form>
-            <div style="margin-bottom: 15px;">
-                <label>Name</label>
-                <input type="text" style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid #ddd;">
-            </div>
-            <div style="margin-bottom: 15px;">
-                <label>Email</label>
-                <input type="email" style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid #ddd;">
-            </div>
-            <div style="margin-bottom: 15px;">
-                <label>Subject</label>
-                <input type="text" style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid #ddd;">
-            </div>
-            <div style="margin-bottom: 15px;">
-                <label>Message</label>
-                <textarea style="width: 100%; padding: 8px; border-radius: 4px; border: 1px solid #ddd; height: 100px;"></textarea>
-            </div>
-            <button type="submit" style="background-color: #B8860B; color: white; padding: 10px 15px; border: none; border-radius: 4px; cursor: pointer;">Send Message</button>
-        </form>
-    </div>
-</div>
-
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    const aboutLink = document.getElementById('about-link');
-    const aboutSection = document.getElementById('about-section');
-    
-    if (aboutLink && aboutSection) {
-        aboutLink.addEventListener('click', function(e) {
-            e.preventDefault();
-            if (aboutSection.style.display === 'none') {
-                aboutSection.style.display = 'block';
-            } else {
-                aboutSection.style.display = 'none';
-            }
-        });
-    }
-});
-</script>
-""", unsafe_allow_html=True)
+    fees_df = st.data_editor(
+        pd.DataFrame({"Category": scoring.options("category"), "Fee": portfolio.DEFAULT_FEE}),
+        disabled=["Category"],
+        hide_index=True,
+        key="portfolio_fees"
+    )
+    entry_budget = st.number_input("Entry-fee budget", min_value=0, value=10 * portfolio.DEFAULT_FEE, step=500)
+    
+    if st.button("Plan Portfolio"):
+        agency = dict(country=country, agency_size=agency_size, previous_wins=previous_wins, years_experience=years_experience)
+        works = [{**agency, **row} for row in works_df.dropna(subset=work_fields).to_dict("records")]
+        fees = dict(zip(fees_df["Category"], fees_df["Fee"].fillna(portfolio.DEFAULT_FEE)))
+        try:
+            result = portfolio.plan(works, fees, entry_budget)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.success(
+                f"{len(result['entries'])} entries for {result['total_fee']:,.0f} of {entry_budget:,}: "
+                f"{result['expected_lions']:.2f} expected Lions"
+            )
+            if result["entries"]:
+                st.table(pd.DataFrame({
+                    "Work": [entry["name"] for entry in result["entries"]],
+                    "Category": [entry["category"] for entry in result["entries"]],
+                    "Fee": [f"{entry['fee']:,.0f}" for entry in result["entries"]],
+                    "Win Probability": [f"{entry['probability']:.1%}" for entry in result["entries"]],
+                }))
+
+perf.mark("portfolio")
 
 # Performance logging
-end_time = time.time()
-logger.info(f"App loaded in {end_time - start_time:.2f} seconds")
+total_time, phase_times = perf.finish_run()
+gauges = figures.gauges()
+logger.info(
+    f"App loaded in {total_time:.2f} seconds ({perf.format_timings(phase_times)}); "
+    f"live figures: {gauges['live_figures']}, RSS: {gauges['rss_mb']} MB",
+    extra={"event": "page_rendered", "total_seconds": total_time, "phases": phase_times, **gauges}
+)
+startup = perf.startup_report()
+if startup:
+    logger.info(startup)
@@ -0,0 +1,5 @@
+"""Headless building blocks for the Cannes Lions award calculator.
+
+Submodules are imported on demand so that command-line tools and services can
+use the probability model without pulling in Streamlit or matplotlib.
+"""
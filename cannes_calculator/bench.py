@@ -0,0 +1,252 @@
+"""Reproducible benchmarks for the scoring engine, the radar chart and page reruns.
+
+Three groups, each selectable with ``--only``:
+
+``scoring``
+    Profiles scored per second through ``scoring.score`` one at a time, and
+    through the vectorized batch path (with and without encoding), plus cube
+    lookups when the probability cube has been built.
+``radar``
+    Time to draw the radar chart SVG, and its size.
+``reruns``
+    Wall-clock time of a full ``app.py`` rerun under Streamlit's headless
+    AppTest harness: all sidebar sections off, each section switched on, a
+    rerun that submits a new profile with Calculate, and a rerun that keeps
+    the submitted result on the page.
+
+Results are written as JSON (``{"meta": ..., "results": {name: {value, unit,
+higher_is_better}}}``). Pass a previous results file with ``--baseline`` to
+print the change of every benchmark and exit with status 1 if any got worse
+by more than ``--tolerance``.
+
+Usage:
+    python -m cannes_calculator.bench -o bench.json
+    python -m cannes_calculator.bench --baseline bench.json --only scoring,radar
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from cannes_calculator import cube, scoring
+
+GROUPS = ("scoring", "radar", "reruns")
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+SIDEBAR_SECTIONS = {
+    "historical_context": "Historical Context (1954-Present)",
+    "top_countries": "Top Winning Countries (2015-2024)",
+    "top_agencies": "Top Agencies & Networks (2015-2024)",
+    "submission_trends": "Submission Trends (2015-2024)",
+}
+
+CALCULATE_LABEL = "Calculate Win Probability"
+
+
+def random_profiles(count, seed=0):
+    """``count`` random valid profiles as a column mapping (field -> numpy array)."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        field: rng.choice(np.array(scoring.options(field), dtype=object), count)
+        for field in scoring.CATEGORICAL_FACTORS
+    }
+    columns["previous_wins"] = rng.integers(scoring.PREVIOUS_WINS_RANGE[0], scoring.PREVIOUS_WINS_RANGE[1] + 1, count)
+    columns["years_experience"] = rng.integers(
+        scoring.YEARS_EXPERIENCE_RANGE[0], scoring.YEARS_EXPERIENCE_RANGE[1] + 1, count
+    )
+    return columns
+
+
+def _records(columns):
+    count = len(columns["category"])
+    return [
+        {field: (int(columns[field][i]) if field in scoring.NUMERIC_FIELDS else columns[field][i])
+         for field in scoring.FIELDS}
+        for i in range(count)
+    ]
+
+
+def _best_time(func, repeat):
+    """Fastest of ``repeat`` timed calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def _result(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def bench_scoring(single_count=20_000, batch_count=200_000, repeat=5):
+    results = {}
+    records = _records(random_profiles(single_count, seed=1))
+
+    def score_each():
+        for record in records:
+            scoring.score(**record)
+
+    seconds = _best_time(score_each, repeat)
+    results["scoring.single"] = _result(single_count / seconds, "profiles/s", True)
+
+    columns = random_profiles(batch_count, seed=2)
+    seconds = _best_time(lambda: scoring.score_batch(columns), repeat)
+    results["scoring.batch"] = _result(batch_count / seconds, "profiles/s", True)
+
+    encoded = scoring.encode_profiles(columns)
+    seconds = _best_time(lambda: scoring.score_codes(encoded), repeat)
+    results["scoring.batch_encoded"] = _result(batch_count / seconds, "profiles/s", True)
+
+    probability_cube = cube.load()
+    if probability_cube is not None:
+        seconds = _best_time(lambda: probability_cube.lookup_codes(encoded), repeat)
+        results["scoring.cube_lookup"] = _result(batch_count / seconds, "profiles/s", True)
+    return results
+
+
+def bench_radar(samples=1000):
+    from cannes_calculator import charts
+
+    rng = np.random.default_rng(3)
+    render_times = []
+    for _ in range(samples):
+        values = rng.random(len(charts.RADAR_LABELS))
+        start_time = time.perf_counter()
+        charts.render_radar_svg(values)
+        render_times.append(time.perf_counter() - start_time)
+    return {
+        "radar.render": _result(statistics.median(render_times), "s", False),
+        "radar.bytes": _result(len(charts.render_radar_svg(rng.random(len(charts.RADAR_LABELS)))), "bytes", False),
+    }
+
+
+def _timed_run(app_test):
+    start_time = time.perf_counter()
+    app_test.run()
+    elapsed = time.perf_counter() - start_time
+    if app_test.exception:
+        raise RuntimeError(f"app.py raised during the benchmark: {app_test.exception[0].message}")
+    return elapsed
+
+
+def _checkbox(app_test, label):
+    return next(checkbox for checkbox in app_test.checkbox if checkbox.label == label)
+
+
+def bench_reruns(repeat=5, timeout=60):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    app_test = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    results["reruns.first"] = _result(_timed_run(app_test), "s", False)
+    results["reruns.all_off"] = _result(
+        statistics.median(_timed_run(app_test) for _ in range(repeat)), "s", False
+    )
+
+    for name, label in SIDEBAR_SECTIONS.items():
+        _checkbox(app_test, label).check()
+        _timed_run(app_test)  # first render of the section is a one-off per process
+        results[f"reruns.{name}_on"] = _result(
+            statistics.median(_timed_run(app_test) for _ in range(repeat)), "s", False
+        )
+        _checkbox(app_test, label).uncheck()
+        _timed_run(app_test)
+
+    categories = scoring.options("category")
+
+    def calculate(index):
+        # A new profile each time, since an unchanged one reuses the session's result
+        next(selectbox for selectbox in app_test.selectbox if selectbox.label == "Category").set_value(
+            categories[index % len(categories)]
+        )
+        next(button for button in app_test.button if button.label == CALCULATE_LABEL).click()
+        return _timed_run(app_test)
+
+    results["reruns.calculate"] = _result(statistics.median(calculate(index) for index in range(repeat)), "s", False)
+    # Reruns that keep the submitted result on the page without recomputing it
+    results["reruns.with_result"] = _result(
+        statistics.median(_timed_run(app_test) for _ in range(repeat)), "s", False
+    )
+    return results
+
+
+def run(groups=GROUPS, repeat=5):
+    results = {}
+    if "scoring" in groups:
+        results.update(bench_scoring(repeat=repeat))
+    if "radar" in groups:
+        results.update(bench_radar())
+    if "reruns" in groups:
+        results.update(bench_reruns(repeat=repeat))
+    meta = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": scoring.fingerprint(),
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current, baseline, tolerance):
+    """Rows of (name, baseline value, current value, relative change, regressed)."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = result["value"] / base["value"] - 1
+        worse = -change if result["higher_is_better"] else change
+        rows.append((name, base["value"], result["value"], change, worse > tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.bench",
+        description="Benchmark scoring throughput, radar rendering and page reruns.",
+    )
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="relative slowdown allowed before a benchmark counts as a regression")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated subset of {', '.join(GROUPS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    unknown = sorted(set(groups) - set(GROUPS))
+    if unknown:
+        parser.error(f"unknown benchmark group: {', '.join(unknown)}")
+
+    current = run(groups, repeat=args.repeat)
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for name, base, value, change, regressed in compare(current, baseline, args.tolerance):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:32} {base:>14.6g} -> {value:>14.6g}  {change:+7.1%}{flag}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
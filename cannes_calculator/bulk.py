@@ -0,0 +1,204 @@
+"""Headless bulk scoring of entry profiles.
+
+Reads a CSV or Parquet file with the calculator form fields and streams it
+through the probability model in fixed-size chunks, so memory stays flat no
+matter how large the file is. Only NumPy (and pyarrow for Parquet) is loaded;
+Streamlit and the plotting stack are never imported.
+
+Usage:
+    python -m cannes_calculator.bulk entries.csv -o scored.csv
+    python -m cannes_calculator.bulk entries.parquet -o scored.parquet --chunk-size 100000
+"""
+import argparse
+import csv
+import itertools
+import sys
+import time
+
+from cannes_calculator import models, scoring
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+OUTPUT_FIELDS = (
+    list(scoring.FIELDS)
+    + ["probability"]
+    + [f"{field}_factor" for field in scoring.FIELDS]
+)
+
+
+def _format(path, explicit):
+    if explicit:
+        return explicit
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def read_csv_chunks(stream, chunk_size):
+    """Yield column mappings of at most ``chunk_size`` rows from a CSV stream."""
+    reader = csv.DictReader(stream)
+    missing = [field for field in scoring.FIELDS if field not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    while True:
+        rows = list(itertools.islice(reader, chunk_size))
+        if not rows:
+            return
+        columns = {field: [row[field] for row in rows] for field in scoring.FIELDS}
+        for field in scoring.NUMERIC_FIELDS:
+            try:
+                columns[field] = [int(value) for value in columns[field]]
+            except ValueError:
+                raise ValueError(f"{field} must be whole numbers") from None
+        yield columns
+
+
+def read_parquet_chunks(path, chunk_size):
+    """Yield column mappings of at most ``chunk_size`` rows from a Parquet file."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    missing = [field for field in scoring.FIELDS if field not in parquet_file.schema_arrow.names]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(scoring.FIELDS)):
+        yield {
+            field: batch.column(i).to_numpy(zero_copy_only=False)
+            for i, field in enumerate(batch.schema.names)
+        }
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield column mappings from a CSV or Parquet file, by extension."""
+    if _format(path, None) == "parquet":
+        yield from read_parquet_chunks(path, chunk_size)
+        return
+    with open(path, newline="", encoding="utf-8") as stream:
+        yield from read_csv_chunks(stream, chunk_size)
+
+
+def score_chunk(columns):
+    """Score one chunk and return the output columns in ``OUTPUT_FIELDS`` order."""
+    encoded = scoring.encode_profiles(columns)
+    probability = scoring.score_codes(encoded)
+    breakdown = scoring.breakdown_codes(encoded)
+    output = {field: columns[field] for field in scoring.FIELDS}
+    output["probability"] = probability
+    for field in scoring.FIELDS:
+        output[f"{field}_factor"] = breakdown[field]
+    return output
+
+
+class CsvSink:
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(OUTPUT_FIELDS)
+
+    def write(self, output):
+        columns = [
+            column.tolist() if hasattr(column, "tolist") else column
+            for column in (output[field] for field in OUTPUT_FIELDS)
+        ]
+        self.writer.writerows(zip(*columns))
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [(field, pa.string()) for field in scoring.CATEGORICAL_FACTORS]
+            + [(field, pa.int64()) for field in scoring.NUMERIC_FIELDS]
+            + [("probability", pa.float64())]
+            + [(f"{field}_factor", pa.float64()) for field in scoring.FIELDS]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, output):
+        table = self.pa.table(
+            {name: output[name] for name in self.schema.names}, schema=self.schema
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+def run(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, input_format=None, output_format=None):
+    """Score ``input_path`` into ``output_path`` chunk by chunk; returns the row count."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    input_format = _format(input_path, input_format)
+    output_format = _format(output_path, output_format)
+    if output_format == "parquet" and output_path == "-":
+        raise ValueError("Parquet output needs a file path")
+
+    input_stream = None
+    output_stream = None
+    sink = None
+    rows = 0
+    try:
+        if input_format == "parquet":
+            chunks = read_parquet_chunks(input_path, chunk_size)
+        elif input_path == "-":
+            chunks = read_csv_chunks(sys.stdin, chunk_size)
+        else:
+            input_stream = open(input_path, newline="", encoding="utf-8")
+            chunks = read_csv_chunks(input_stream, chunk_size)
+
+        if output_format == "parquet":
+            sink = ParquetSink(output_path)
+        elif output_path == "-":
+            sink = CsvSink(sys.stdout)
+        else:
+            output_stream = open(output_path, "w", newline="", encoding="utf-8")
+            sink = CsvSink(output_stream)
+
+        for columns in chunks:
+            try:
+                sink.write(score_chunk(columns))
+            except ValueError as e:
+                raise ValueError(f"Rows {rows + 1}-{rows + len(columns['category'])}: {e}") from None
+            rows += len(columns["category"])
+    finally:
+        if sink is not None:
+            sink.close()
+        for stream in (input_stream, output_stream):
+            if stream is not None:
+                stream.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.bulk",
+        description="Score a file of entry profiles with the Cannes Lions win-probability model.",
+    )
+    parser.add_argument("input", help="CSV or Parquet file of profiles ('-' reads CSV from stdin)")
+    parser.add_argument("-o", "--output", default="-", help="CSV or Parquet destination (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows scored per chunk")
+    parser.add_argument("--input-format", choices=("csv", "parquet"), help="override detection by extension")
+    parser.add_argument("--output-format", choices=("csv", "parquet"), help="override detection by extension")
+    args = parser.parse_args(argv)
+    try:
+        # Score with the model the app is using
+        model = scoring.use(models.load_active())
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    start_time = time.perf_counter()
+    try:
+        rows = run(args.input, args.output, args.chunk_size, args.input_format, args.output_format)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    elapsed = time.perf_counter() - start_time
+    rate = rows / elapsed if elapsed else float("inf")
+    print(f"Scored {rows} profiles with model {model.label} in {elapsed:.2f}s ({rate:,.0f}/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""Caches shared by every Streamlit session, and by every worker process on a host.
+
+``LRUCache`` is an in-process cache. ``SharedCache`` keeps values as files
+under one directory (``CANNES_SHARED_CACHE_DIR``, best on tmpfs such as
+``/dev/shm``) that every worker process on the host reads, so a chart or a
+result is computed once per host. An ``LRUCache`` can sit in front of a
+namespace of the shared cache and fill its misses from there.
+
+Shared values are bytes (chart PNGs) or JSON-ready data (results); they are
+stored as such and never unpickled, and tuples come back as lists. Entries
+live in a ``cannes-<uid>`` subdirectory created with mode 0700; one owned by
+another user or open to others is refused and sharing is switched off.
+
+Each shared entry is written to a temporary file and renamed into place, so
+readers never see a partial value. A process about to compute a missing
+entry takes an exclusive ``flock`` on one of ``LOCK_STRIPES`` lock files
+first and checks again, so concurrent workers wait for one computation. The
+directory is kept under ``CANNES_SHARED_CACHE_MB`` by deleting the oldest
+entries.
+"""
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # no flock: workers may compute the same entry at once
+    fcntl = None
+
+SHARED_DIR = os.environ.get("CANNES_SHARED_CACHE_DIR") or None
+SHARED_MAX_BYTES = int(float(os.environ.get("CANNES_SHARED_CACHE_MB", "256")) * 2**20)
+
+# Lock files the entries are spread over
+LOCK_STRIPES = 64
+
+ENTRY_SUFFIX = ".entry"
+# First bytes of an entry file, naming how the rest is encoded
+_BYTES_MARK = b"B"
+_JSON_MARK = b"J"
+
+logger = logging.getLogger("cannes_calculator.cache")
+
+_MISSING = object()
+
+
+class _Flight:
+    """A value being computed by one thread that others can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with hit/miss/eviction counters.
+
+    With ``ttl`` (seconds), entries also expire that long after they were
+    stored. ``get_or_create`` coalesces concurrent misses for one key: the
+    first caller runs the factory and the others wait for its value. With
+    ``shared`` (a ``SharedCache.namespace``), misses are looked up there
+    before the factory runs.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, shared=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._data = OrderedDict()  # key -> (value, expiry time or None)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def _lookup(self, key):
+        """The live value for ``key`` or ``_MISSING``; the caller holds the lock."""
+        try:
+            value, expires = self._data[key]
+        except KeyError:
+            return _MISSING
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """Return the cached value for ``key``, calling ``factory()`` to fill a miss.
+
+        While one caller runs the factory, others asking for the same key
+        wait for its result, or its exception, instead of running it again.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result()
+        try:
+            flight.value = factory() if self.shared is None else self.shared.get_or_create(key, factory)
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            self.put(key, flight.value)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+class SharedNamespace:
+    """One namespace of a ``SharedCache``, with the interface ``LRUCache`` uses."""
+
+    def __init__(self, cache, name, ttl=None):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        return self.cache.get(self.name, key, default, self.ttl)
+
+    def put(self, key, value):
+        self.cache.put(self.name, key, value)
+
+    def get_or_create(self, key, factory):
+        return self.cache.get_or_create(self.name, key, factory, self.ttl)
+
+
+def _json_default(value):
+    # NumPy scalars and arrays that end up in results
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} can't be shared")
+
+
+def encode_entry(value):
+    """File contents for a shared value: bytes as they are, anything else as JSON."""
+    if isinstance(value, bytes):
+        return _BYTES_MARK + value
+    return _JSON_MARK + json.dumps(value, default=_json_default, allow_nan=False).encode("utf-8")
+
+
+def decode_entry(data):
+    mark, payload = data[:1], data[1:]
+    if mark == _BYTES_MARK:
+        return payload
+    if mark == _JSON_MARK:
+        return json.loads(payload)
+    raise ValueError("Not a shared cache entry")
+
+
+def private_directory(base):
+    """Create (or check) this user's 0700 subdirectory of ``base``; raises ``OSError`` if unsafe."""
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    directory = os.path.join(base, f"cannes-{uid}" if uid is not None else "cannes")
+    os.makedirs(base, exist_ok=True)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise OSError(f"{directory} is not a directory")
+    if uid is not None and (info.st_uid != uid or info.st_mode & 0o077):
+        raise OSError(f"{directory} must be owned by uid {uid} and closed to other users (mode 0700)")
+    os.makedirs(os.path.join(directory, "locks"), mode=0o700, exist_ok=True)
+    return directory
+
+
+class SharedCache:
+    """Bytes or JSON-ready values in files under ``directory``, shared by the processes that use it.
+
+    Without a directory every lookup misses and nothing is stored, so
+    callers need no separate code path when sharing is switched off.
+    Failing to read or write an entry is logged and treated as a miss.
+    """
+
+    def __init__(self, directory=SHARED_DIR, max_bytes=SHARED_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.pruned = 0
+        if directory is not None:
+            try:
+                self.directory = private_directory(directory)
+            except OSError as e:
+                logger.error(f"Not sharing caches between processes, can't use {directory}: {e}")
+                self.directory = None
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def namespace(self, name, ttl=None):
+        return SharedNamespace(self, name, ttl)
+
+    def _path(self, namespace, key):
+        digest = hashlib.sha256(repr((namespace, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{namespace}-{digest[:40]}{ENTRY_SUFFIX}"), int(digest[40:48], 16)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _read(self, path, ttl):
+        try:
+            with open(path, "rb") as f:
+                if ttl is not None and os.fstat(f.fileno()).st_mtime < time.time() - ttl:
+                    return _MISSING
+                return decode_entry(f.read())
+        except FileNotFoundError:
+            return _MISSING
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Dropping unreadable shared cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return _MISSING
+
+    def get(self, namespace, key, default=None, ttl=None):
+        if not self.enabled:
+            return default
+        value = self._read(self._path(namespace, key)[0], ttl)
+        self._count("misses" if value is _MISSING else "hits")
+        return default if value is _MISSING else value
+
+    def put(self, namespace, key, value):
+        if not self.enabled:
+            return
+        path = self._path(namespace, key)[0]
+        tmp_path = None
+        try:
+            data = encode_entry(value)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            size = len(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Couldn't write shared cache entry {path}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            self.writes += 1
+            self._written_since_prune += size
+            prune = self._written_since_prune > self.max_bytes // 8
+            if prune:
+                self._written_since_prune = 0
+        if prune:
+            self.prune()
+
+    def get_or_create(self, namespace, key, factory, ttl=None):
+        """The shared value for ``key``, computed by one process on a miss and stored for all."""
+        if not self.enabled:
+            return factory()
+        path, stripe = self._path(namespace, key)
+        value = self._read(path, ttl)
+        if value is not _MISSING:
+            self._count("hits")
+            return value
+        with self._stripe_lock(stripe):
+            # Another process may have stored it while this one waited
+            value = self._read(path, ttl)
+            if value is not _MISSING:
+                self._count("hits")
+                return value
+            self._count("misses")
+            value = factory()
+            self.put(namespace, key, value)
+        return value
+
+    def _stripe_lock(self, stripe):
+        return _FileLock(os.path.join(self.directory, "locks", str(stripe % LOCK_STRIPES)))
+
+    def prune(self):
+        """Delete the oldest entries until the directory is under ``max_bytes``."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as found:
+                for entry in found:
+                    if entry.name.endswith(ENTRY_SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logger.warning(f"Couldn't prune the shared cache: {e}")
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._count("pruned")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Delete every entry, for every process."""
+        if not self.enabled:
+            return
+        with os.scandir(self.directory) as found:
+            for entry in found:
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "errors": self.errors,
+                "pruned": self.pruned,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class _FileLock:
+    """Exclusive ``flock`` on a lock file, held for a ``with`` block."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+shared = SharedCache()
+
+
+def metric_gauges():
+    """Shared cache counters of this process for ``metrics.register_collector``."""
+    if not shared.enabled:
+        return {}
+    return {f"cannes_shared_cache_{name}": value for name, value in shared.stats().items()}
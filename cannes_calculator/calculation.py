@@ -0,0 +1,235 @@
+"""The calculator's full result for a submitted profile, shared by every session.
+
+Many visitors submit the same profile, the default form values above all.
+Everything the result section shows is computed once and kept in
+``result_cache``, a process-wide LRU cache with a time-to-live. That covers
+the probability and its percentile rank, the uncertainty band, the category
+comparison, the factor breakdown, the tips, the best changes and the radar
+image. The key is the normalized form input with the model fingerprint and
+the history store's signature, so a new model or import never serves old
+results. Identical submissions arriving while one is being computed wait for
+that computation instead of repeating it. With ``CANNES_SHARED_CACHE_DIR``
+set, results are also shared by the worker processes of the host (see
+``cache``).
+
+Results are shared between threads and must not be modified.
+"""
+import logging
+import os
+
+from cannes_calculator import cache, charts, history, metrics, perf, scoring, uncertainty, whatif
+
+RESULT_CACHE_SIZE = int(os.environ.get("CANNES_RESULT_CACHE_SIZE", "1024"))
+# Seconds a result is served before it is computed again
+RESULT_TTL = float(os.environ.get("CANNES_RESULT_TTL", "3600"))
+
+# Best achievable changes shown per result
+SUGGESTIONS = 3
+
+# Entries per category in 2024, used without a history store
+CATEGORY_ENTRIES = {
+    "Film": 2100,
+    "Digital": 2850,
+    "Print & Publishing": 1450,
+    "Outdoor": 2300,
+    "Design": 2050,
+    "Radio & Audio": 850,
+    "Mobile": 1750,
+    "Social & Influencer": 3100,
+    "PR": 1900,
+    "Direct": 1650,
+    "Media": 1850,
+    "Creative Data": 1200,
+    "Creative Strategy": 1100,
+    "Creative Commerce": 1400,
+    "Health & Wellness": 1300,
+    "Innovation": 950
+}
+CATEGORY_ENTRIES_YEAR = 2024
+
+COUNTRY_INSIGHTS = {
+    "United States": "US entries dominate with the highest number of wins. Strong in Film, Digital, and Social categories.",
+    "United Kingdom": "UK agencies excel in Creative Strategy and PR categories with innovative campaigns.",
+    "France": "French entries are known for strong Design and Film craft with artistic sensibilities.",
+    "Brazil": "Brazilian agencies are celebrated for bold, provocative creative approaches.",
+    "Germany": "German entries stand out for technical excellence and precision in execution.",
+    "Japan": "Japanese work is recognized for unique aesthetic and innovative technology integration.",
+    "Australia": "Australian agencies excel in Outdoor and PR categories with bold approaches.",
+    "Canada": "Canadian entries perform well in Purpose-driven campaigns and Social Good.",
+    "Spain": "Spanish work stands out in Film Craft and Design with strong cultural elements.",
+    "Italy": "Italian entries excel in Design and Craft categories with strong aesthetic sensibility.",
+    "Sweden": "Swedish agencies are known for minimalist design and digital innovation.",
+    "Netherlands": "Dutch entries perform well in Design and Creative Strategy categories.",
+    "China": "Chinese work is gaining recognition for digital innovation and scale.",
+    "South Korea": "Korean entries stand out for technology integration and digital craft.",
+    "Argentina": "Argentinian agencies excel in Film and Print with emotional storytelling.",
+    "India": "Indian entries are recognized for purpose-driven campaigns with cultural relevance.",
+    "Turkey": "Turkish work stands out when it leverages unique cultural perspectives.",
+    "South Africa": "South African entries excel in purpose-driven campaigns addressing social issues.",
+    "Mexico": "Mexican agencies perform well in Film and Design with strong cultural elements.",
+    "Thailand": "Thai work is recognized for craft excellence and emotional storytelling.",
+    "United Arab Emirates": "UAE entries stand out in Outdoor and Experiential categories.",
+    "Other": "Entries from emerging markets can stand out with unique cultural perspectives."
+}
+
+logger = logging.getLogger("cannes_calculator.calculation")
+
+result_cache = cache.LRUCache(
+    RESULT_CACHE_SIZE, ttl=RESULT_TTL, shared=cache.shared.namespace("result", ttl=RESULT_TTL)
+)
+
+
+def cache_key(profile, show_uncertainty=False, keep_fixed=(), model=None):
+    """Normalized form input: field values in form order, the options, the model and the history store."""
+    model = model or scoring.current()
+    values = tuple(int(profile[field]) if field in scoring.NUMERIC_FIELDS else str(profile[field])
+                   for field in scoring.FIELDS)
+    return values + (bool(show_uncertainty), tuple(sorted(keep_fixed)), model.fingerprint, history.signature())
+
+
+def tips(profile, model=None):
+    """Advice for the factors of ``profile`` that hold it back."""
+    factors = (model or scoring.current()).factors
+    category, country = profile["category"], profile["country"]
+    tips = []
+
+    if factors["category"][category] < 1.0:
+        tips.append(f"Consider entering more competitive categories like Digital (1.2x) or Social & Influencer (1.3x) instead of {category} ({factors['category'][category]:.2f}x).")
+
+    if factors["country"][country] < 1.0:
+        tips.append(f"Entries from {country} have historically performed below average. Consider collaborating with agencies from top-performing countries.")
+
+    if factors["agency_size"][profile["agency_size"]] < 1.0:
+        tips.append(f"As a {profile['agency_size']}, consider partnering with larger agencies to increase visibility and resources.")
+
+    if profile["previous_wins"] == 0:
+        tips.append("Build credibility by winning at regional awards before attempting Cannes Lions.")
+
+    if profile["years_experience"] < 3:
+        tips.append("Study past winners in your category to understand what the judges look for.")
+
+    if factors["budget_level"][profile["budget_level"]] < 1.0:
+        tips.append("Focus on innovative ideas that don't require large budgets, particularly in Design or PR categories.")
+
+    if factors["brand_prominence"][profile["brand_prominence"]] < 1.0:
+        tips.append(f"For {profile['brand_prominence']} brands, focus on breakthrough creative that generates earned media attention.")
+
+    if factors["campaign_results"][profile["campaign_results"]] < 1.2:
+        tips.append("Strengthen your entry with clear, measurable results and business impact.")
+
+    if factors["creative_approach"][profile["creative_approach"]] < 1.2:
+        tips.append("Cannes rewards innovation and fresh thinking. Push creative boundaries further.")
+
+    return tuple(tips)
+
+
+def breakdown_rows(profile, model=None):
+    """(factor, impact) rows of the factor breakdown table."""
+    factors = (model or scoring.current()).factors
+    return (
+        ("Category Type", f"{profile['category']}: {factors['category'][profile['category']]:.2f}x"),
+        ("Country", f"{profile['country']}: {factors['country'][profile['country']]:.2f}x"),
+        ("Agency Size", f"{profile['agency_size']}: {factors['agency_size'][profile['agency_size']]:.2f}x"),
+        ("Previous Wins", f"{profile['previous_wins']} wins: {scoring.previous_wins_multiplier(profile['previous_wins'], model):.2f}x"),
+        ("Years Experience", f"{profile['years_experience']} years: {scoring.experience_multiplier(profile['years_experience'], model):.2f}x"),
+        ("Production Budget", f"{profile['budget_level']}: {factors['budget_level'][profile['budget_level']]:.2f}x"),
+        ("Brand Prominence", f"{profile['brand_prominence']}: {factors['brand_prominence'][profile['brand_prominence']]:.2f}x"),
+        ("Campaign Results", f"{profile['campaign_results']}: {factors['campaign_results'][profile['campaign_results']]:.2f}x"),
+        ("Creative Approach", f"{profile['creative_approach']}: {factors['creative_approach'][profile['creative_approach']]:.2f}x"),
+    )
+
+
+def compute(profile, show_uncertainty=False, keep_fixed=(), distributions=(None, None), model=None):
+    """Everything the result section shows for ``profile``, without the cache.
+
+    Every part is computed with ``model`` (default: the one in use, read
+    once), so a reload during the computation can't mix two versions.
+    ``distributions`` (all inputs, historical entries) are used when they
+    were built for that model.
+    """
+    model = model or scoring.current()
+    category, country = profile["category"], profile["country"]
+    logger.info(
+        f"Calculating win probability for {category} category from {country}",
+        extra={"event": "calculation_started", "category": category, "country": country}
+    )
+
+    # Probability; one profile is scored exactly by the formula, not the cube
+    probability = scoring.score(**profile, model=model)
+    perf.mark("probability")
+
+    # Where the profile ranks
+    all_inputs, entries = (
+        built if built is not None and built.meta["fingerprint"] == model.fingerprint else None
+        for built in distributions
+    )
+    ranking = None
+    if all_inputs is not None:
+        ranking = f"This ranks above {all_inputs.percentile(probability):.1f}% of all {all_inputs.total:,} possible input combinations"
+        if entries is not None:
+            ranking += f" and {entries.percentile(probability):.1f}% of {entries.total:,} historical entries"
+        ranking += "."
+    perf.mark("percentile")
+
+    # Uncertainty band from Monte Carlo simulation of the factors
+    band = None
+    if show_uncertainty:
+        band = uncertainty.bands(profile, model=model)
+        perf.mark("uncertainty")
+
+    # Category data: the latest year in the history store, or the 2024 figures
+    store = history.default()
+    entries_year = store.latest_year if store is not None else CATEGORY_ENTRIES_YEAR
+    category_entries = store.counts("category", entries_year) if store is not None else CATEGORY_ENTRIES
+    avg_win_rate = model.base_probability * model.factors["category"][category]
+    if probability > avg_win_rate:
+        comparison = ("success", f"Your entry is {probability/avg_win_rate:.1f}x more likely to win than average.")
+    else:
+        comparison = ("warning", f"Your entry is {avg_win_rate/probability:.1f}x less likely to win than average.")
+    perf.mark("insights")
+
+    # Radar chart of normalized factor values
+    radar_svg = charts.render_radar_svg(charts.radar_values(**profile, model=model))
+    perf.mark("radar_chart")
+
+    result = dict(
+        probability=probability,
+        ranking=ranking,
+        band=band,
+        category_entries=(category_entries.get(category, 0), entries_year),
+        avg_win_rate=avg_win_rate,
+        comparison=comparison,
+        country_insight=COUNTRY_INSIGHTS[country],
+        radar_svg=radar_svg,
+        breakdown=breakdown_rows(profile, model),
+        tips=tips(profile, model),
+    )
+    perf.mark("tips")
+
+    # Best combinations of the factors the team can still change
+    result["suggestions"] = tuple(whatif.best_changes(profile, k=SUGGESTIONS, fixed=keep_fixed, model=model))
+    perf.mark("what_if")
+
+    logger.info(
+        f"Calculation completed: {probability:.1%} probability for {category} from {country}",
+        extra={"event": "calculation_completed", "category": category, "country": country, "probability": probability}
+    )
+    return result
+
+
+def calculate(profile, show_uncertainty=False, keep_fixed=(), distributions=(None, None), model=None):
+    """The result for ``profile`` from ``result_cache``, computed once per normalized input.
+
+    The key and the result come from the same model snapshot.
+    """
+    model = model or scoring.current()
+    metrics.increment("cannes_calculations_total")
+    return result_cache.get_or_create(
+        cache_key(profile, show_uncertainty, keep_fixed, model),
+        lambda: compute(profile, show_uncertainty, keep_fixed, distributions, model),
+    )
+
+
+def cache_gauges():
+    """Result cache counters for ``metrics.register_collector``."""
+    return {f"cannes_result_cache_{name}": value for name, value in result_cache.stats().items()}
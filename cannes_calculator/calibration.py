@@ -0,0 +1,443 @@
+"""Fit the factor tables to historical entry results.
+
+The model is the calculator's own formula: an entry wins with probability
+``base * category * country * ... * wins_multiplier * experience_multiplier``.
+This is a log-linear Poisson model, and it is fitted by maximum likelihood.
+For win rates of a few percent, that is practically the logistic fit of the
+same main effects.
+
+Entries are first aggregated into cells of identical profiles with their
+entry and win counts. These cell counts are the sufficient statistics. Each
+categorical factor is fitted by iterative proportional fitting (IPF): a
+sweep scales every option's multiplier by its observed over expected wins.
+The expected wins per option are the product of a sparse one-hot matrix
+with the cell rates. Each column of that matrix has a single one at the
+cell's option code, so the product is ``np.bincount`` over the codes, and
+no dense dummy matrix is ever built. The per-win and per-year steps are
+fitted in the same sweeps by a one-dimensional solve of their score
+equation. ``PROBABILITY_CAP`` is left out of the fit, since almost no
+historical entry comes near it.
+
+Fitted tables are scaled so that each table's entry-weighted mean matches
+the current table's, and ``base_probability`` absorbs the difference.
+Predictions don't change under this rescaling, but tables can then be
+compared option by option. Options with fewer than ``MIN_LEVEL_ENTRIES``
+entries keep their current multiplier.
+
+Each fit is saved as the next model version in ``data/models`` (see
+``models``) with its data source and fit statistics, and running apps pick
+it up from there.
+
+The cell counts are kept in ``data/models/statistics``, with one file per
+year and one for the total. ``update`` imports a new year of records,
+computes that year's cells, and folds them into the total, replacing the
+year's earlier cells if it was imported before. It then refits from the
+total, starting at the active model. Earlier years are never read again.
+
+Usage:
+    python -m cannes_calculator.calibration [--store data/history] fit [--years 2015-2024] [--dry-run]
+    python -m cannes_calculator.calibration update entries-2025.csv
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from cannes_calculator import files, history, models, scoring
+
+MAX_SWEEPS = 200
+TOLERANCE = 1e-7
+MIN_LEVEL_ENTRIES = 50
+# Floor for options that never won, so no profile is scored as impossible
+MIN_FACTOR = 0.05
+# Published precision, in the register of the hand-typed tables
+FACTOR_DECIMALS = 3
+STEP_DECIMALS = 4
+BASE_DECIMALS = 5
+# Floor for the per-win and per-year steps, which models require to be
+# positive; data with no (or a negative) effect fits to this
+MIN_STEP = 10 ** -STEP_DECIMALS
+
+# Cell key order: the categorical fields, then the raw numeric inputs
+KEY_FIELDS = tuple(scoring.CATEGORICAL_FACTORS) + scoring.NUMERIC_FIELDS
+
+
+def _radixes():
+    radixes = [len(table) for table in scoring.CATEGORICAL_FACTORS.values()]
+    radixes.append(scoring.PREVIOUS_WINS_RANGE[1] + 1)
+    radixes.append(scoring.YEARS_EXPERIENCE_RANGE[1] + 1)
+    return radixes
+
+
+def cell_keys(encoded):
+    """One int64 key per profile, combining the codes of ``KEY_FIELDS``."""
+    keys = np.zeros(len(encoded[KEY_FIELDS[0]]), dtype=np.int64)
+    for field, radix in zip(KEY_FIELDS, _radixes()):
+        keys = keys * radix + np.asarray(encoded[field], dtype=np.int64)
+    return keys
+
+
+def decode_keys(keys):
+    """Inverse of ``cell_keys``: field -> code arrays."""
+    encoded = {}
+    for field, radix in zip(reversed(KEY_FIELDS), reversed(_radixes())):
+        keys, encoded[field] = np.divmod(keys, radix)
+    return {field: encoded[field].astype(np.intp) for field in KEY_FIELDS}
+
+
+def merge_statistics(*parts):
+    """Add up ``(keys, entries, wins)`` cell counts; returns them sorted by key."""
+    keys = np.concatenate([part[0] for part in parts])
+    entries = np.concatenate([part[1] for part in parts])
+    wins = np.concatenate([part[2] for part in parts])
+    order = np.argsort(keys, kind="stable")
+    keys, entries, wins = keys[order], entries[order], wins[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.intp)
+    return keys[starts], np.add.reduceat(entries, starts), np.add.reduceat(wins, starts)
+
+
+def year_statistics(store, year):
+    """Cell counts of one year of the store, and the number of rows that couldn't be used.
+
+    Rows are skipped when a profile field holds an option the form doesn't
+    offer or a number outside the form limits.
+    """
+    if any(name not in store.columns for name in history.PROFILE_COLUMNS):
+        raise ValueError("The history store has no profile columns to calibrate on")
+    rows = int(store.meta["years"][str(year)])
+    usable = np.ones(rows, dtype=bool)
+    encoded = {}
+    for field in scoring.CATEGORICAL_FACTORS:
+        # Store vocabulary code -> form option code, -1 for anything else
+        lookup = np.array(
+            [scoring.options(field).index(value) if value in scoring.CATEGORICAL_FACTORS[field] else -1
+             for value in store.vocab.get(field, [])],
+            dtype=np.intp,
+        )
+        codes = lookup[store.column(field, year)] if len(lookup) else np.full(rows, -1)
+        usable &= codes >= 0
+        encoded[field] = codes
+    for field, (low, high) in (
+        ("previous_wins", scoring.PREVIOUS_WINS_RANGE),
+        ("years_experience", scoring.YEARS_EXPERIENCE_RANGE),
+    ):
+        values = np.asarray(store.column(field, year), dtype=np.int64)
+        usable &= (values >= low) & (values <= high)
+        encoded[field] = values
+    keys = cell_keys({field: codes[usable] for field, codes in encoded.items()})
+    wins = store.win_mask(year)[usable].astype(np.int64)
+    statistics = merge_statistics((keys, np.ones(len(keys), dtype=np.int64), wins))
+    return statistics, rows - int(usable.sum())
+
+
+def collect(store, years=None):
+    """Cell counts over ``years`` (default: all) of the store, and the rows skipped."""
+    years = store.years if years is None else [year for year in years if year in store.years]
+    if not years:
+        raise ValueError("No matching years in the history store")
+    parts, skipped = [], 0
+    for year in years:
+        statistics, year_skipped = year_statistics(store, year)
+        parts.append(statistics)
+        skipped += year_skipped
+    return merge_statistics(*parts), years, skipped
+
+
+def _layout():
+    """Identifies the cell key layout; statistics saved under another one are rebuilt."""
+    return json.dumps([(field, scoring.options(field)) for field in scoring.CATEGORICAL_FACTORS] + _radixes()[-2:])
+
+
+def statistics_dir(directory=models.MODEL_DIR):
+    return os.path.join(directory, "statistics")
+
+
+def save_statistics(path, statistics, **meta):
+    """Write cell counts with ``meta`` (JSON-ready) to an ``.npz`` file."""
+    keys, entries, wins = statistics
+    meta = dict(meta, layout=_layout())
+    with files.atomic_path(path, suffix=".npz") as tmp_path:
+        np.savez(tmp_path, keys=keys, entries=entries, wins=wins, meta=np.array(json.dumps(meta)))
+
+
+def load_statistics(path):
+    """``(statistics, meta)`` from ``save_statistics``, or None if missing or for another layout."""
+    try:
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            if meta.get("layout") != _layout():
+                return None
+            return (saved["keys"], saved["entries"], saved["wins"]), meta
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def rebuild_statistics(store, directory=models.MODEL_DIR):
+    """Recompute and save the cell counts of every year in the store; returns the total."""
+    parts, skipped = [], 0
+    for year in store.years:
+        statistics, year_skipped = year_statistics(store, year)
+        save_statistics(os.path.join(statistics_dir(directory), f"{year}.npz"), statistics, skipped=year_skipped)
+        parts.append(statistics)
+        skipped += year_skipped
+    total = merge_statistics(*parts)
+    save_statistics(os.path.join(statistics_dir(directory), "total.npz"), total, years=store.years, skipped=skipped)
+    return total, list(store.years), skipped
+
+
+def fold_years(store, years, directory=models.MODEL_DIR):
+    """Fold ``years`` of the store into the saved total cell counts.
+
+    A year that is already part of the total has its previous cells taken
+    out first. Without a usable saved total, every year is recomputed.
+    Returns ``(total, years in the total, rows skipped)``.
+    """
+    saved = load_statistics(os.path.join(statistics_dir(directory), "total.npz"))
+    if saved is None:
+        return rebuild_statistics(store, directory)
+    total, meta = saved
+    included, skipped = list(meta["years"]), meta["skipped"]
+    parts = [total]
+    for year in years:
+        if year in included:
+            previous = load_statistics(os.path.join(statistics_dir(directory), f"{year}.npz"))
+            if previous is None:
+                return rebuild_statistics(store, directory)
+            (keys, entries, wins), previous_meta = previous
+            parts.append((keys, -entries, -wins))
+            skipped -= previous_meta["skipped"]
+        statistics, year_skipped = year_statistics(store, year)
+        save_statistics(os.path.join(statistics_dir(directory), f"{year}.npz"), statistics, skipped=year_skipped)
+        parts.append(statistics)
+        skipped += year_skipped
+        included = sorted(set(included) | {year})
+    keys, entries, wins = merge_statistics(*parts)
+    nonempty = entries > 0
+    total = keys[nonempty], entries[nonempty], wins[nonempty]
+    save_statistics(os.path.join(statistics_dir(directory), "total.npz"), total, years=included, skipped=skipped)
+    return total, included, skipped
+
+
+def _experience_levels(years_experience, cap):
+    return np.where(years_experience > 1, np.minimum(years_experience, cap), 0).astype(np.float64)
+
+
+def _solve_step(step, x, observed, expected):
+    """Step ``s`` maximizing the likelihood of the multiplier ``1 + s * x``.
+
+    ``observed`` and ``expected`` are wins and expected wins per distinct
+    ``x`` without this multiplier. The score equation
+    ``sum(observed * x / (1 + s * x)) = sum(expected * x)`` is decreasing
+    in ``s``, so Newton steps are safeguarded by bisection. The search is
+    bounded below by ``MIN_STEP``.
+    """
+    target = float(expected @ x)
+    step = max(step, MIN_STEP)
+    low, high = MIN_STEP, step + 1.0
+    while (observed * x / (1 + high * x)).sum() > target and high < 1e6:
+        high *= 2
+    for _ in range(100):
+        denominator = 1 + step * x
+        gradient = (observed * x / denominator).sum() - target
+        if gradient > 0:
+            low = step
+        else:
+            high = step
+        slope = -(observed * x * x / denominator ** 2).sum()
+        candidate = step - gradient / slope if slope < 0 else (low + high) / 2
+        if not low < candidate < high:
+            candidate = (low + high) / 2
+        if abs(candidate - step) < TOLERANCE * max(1.0, abs(step)):
+            return candidate
+        step = candidate
+    return step
+
+
+def fit(statistics, start=None):
+    """Fit a factor table to cell counts ``(keys, entries, wins)``.
+
+    ``start`` is the table to start from and to scale against (default: the
+    model in use). Returns ``(table, report)``.
+    """
+    start_time = time.perf_counter()
+    keys, entries, wins = statistics
+    if not entries.sum() or not wins.sum():
+        raise ValueError("Calibration needs entries with at least one win")
+    start = start or scoring.current().table()
+    cap = start["experience_cap"]
+    encoded = decode_keys(keys)
+    entries = entries.astype(np.float64)
+    wins = wins.astype(np.float64)
+
+    factors = {field: np.array(list(start["factors"][field].values())) for field in scoring.CATEGORICAL_FACTORS}
+    observed = {field: np.bincount(encoded[field], wins, len(factors[field])) for field in factors}
+    exposure = {field: np.bincount(encoded[field], entries, len(factors[field])) for field in factors}
+    numeric_x = {
+        "previous_wins": encoded["previous_wins"].astype(np.float64),
+        "years_experience": _experience_levels(encoded["years_experience"], cap),
+    }
+    # Distinct multiplier levels of each step, for the one-dimensional solves
+    numeric_levels = {}
+    for field, x in numeric_x.items():
+        levels, inverse = np.unique(x, return_inverse=True)
+        numeric_levels[field] = (levels, inverse, np.bincount(inverse, wins, len(levels)))
+    steps = {"previous_wins": start["previous_win_step"], "years_experience": start["experience_step"]}
+    base = start["base_probability"]
+
+    rate = np.full(len(keys), base)
+    for field, table in factors.items():
+        rate *= table[encoded[field]]
+    for field, x in numeric_x.items():
+        rate *= 1 + steps[field] * x
+    # The tables absorb every later change of scale, so the base is only set here
+    base *= wins.sum() / (entries @ rate)
+    rate *= wins.sum() / (entries @ rate)
+
+    sweeps = 0
+    for sweeps in range(1, MAX_SWEEPS + 1):
+        change = 0.0
+        for field, table in factors.items():
+            expected = np.bincount(encoded[field], entries * rate, len(table))
+            ratio = np.divide(observed[field], expected, out=np.ones_like(expected), where=expected > 0)
+            table *= ratio
+            rate *= ratio[encoded[field]]
+            change = max(change, float(np.abs(np.log(np.maximum(ratio[expected > 0], 1e-300))).max()))
+        for field, x in numeric_x.items():
+            levels, inverse, level_wins = numeric_levels[field]
+            without = rate / (1 + steps[field] * x)
+            expected = np.bincount(inverse, entries * without, len(levels))
+            step = _solve_step(steps[field], levels, level_wins, expected)
+            change = max(change, abs(step - steps[field]))
+            steps[field] = step
+            rate = without * (1 + step * x)
+        if change < TOLERANCE:
+            break
+
+    kept = {}
+    for field, table in factors.items():
+        current = np.array(list(start["factors"][field].values()))
+        sparse = exposure[field] < MIN_LEVEL_ENTRIES
+        weights = np.where(sparse | (table <= 0), 0.0, exposure[field])
+        if weights.sum():
+            scale = np.exp(weights @ (np.log(current) - np.log(np.where(weights > 0, table, 1.0))) / weights.sum())
+            table *= scale
+            base /= scale
+        table[:] = np.where(sparse, current, np.maximum(table, MIN_FACTOR))
+        kept[field] = [scoring.options(field)[code] for code in np.flatnonzero(sparse)]
+
+    table = {
+        "base_probability": round(float(base), BASE_DECIMALS),
+        "previous_win_step": max(round(float(steps["previous_wins"]), STEP_DECIMALS), MIN_STEP),
+        "experience_step": max(round(float(steps["years_experience"]), STEP_DECIMALS), MIN_STEP),
+        "experience_cap": cap,
+        "probability_cap": start["probability_cap"],
+        "factors": {
+            field: {option: round(float(value), FACTOR_DECIMALS) for option, value in zip(scoring.options(field), values)}
+            for field, values in factors.items()
+        },
+    }
+    report = {
+        "cells": len(keys),
+        "entries": int(entries.sum()),
+        "wins": int(wins.sum()),
+        "sweeps": sweeps,
+        "converged": change < TOLERANCE,
+        "deviance": deviance(statistics, table),
+        "start_deviance": deviance(statistics, start),
+        "kept_options": {field: options for field, options in kept.items() if options},
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+    return table, report
+
+
+def deviance(statistics, table):
+    """Poisson deviance of cell counts under ``table``; lower fits better."""
+    keys, entries, wins = statistics
+    model = models.Model(table, reference=models.BASELINE)
+    expected = entries * scoring.score_codes(decode_keys(keys), model)
+    wins = wins.astype(np.float64)
+    terms = np.where(wins > 0, wins * np.log(np.maximum(wins, 1) / np.maximum(expected, 1e-300)), 0.0)
+    return round(float(2 * (terms - (wins - expected)).sum()), 3)
+
+
+def _parse_years(text):
+    if not text:
+        return None
+    first, _, last = text.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+def _print_fit(table, report, skipped, elapsed):
+    current = scoring.current().table()
+    for field, factors in table["factors"].items():
+        for option, value in factors.items():
+            print(f"{field:18} {option:34} {current['factors'][field][option]:>6.3f} -> {value:>6.3f}")
+    for name in ("base_probability", "previous_win_step", "experience_step"):
+        print(f"{name:53} {current[name]:>6.4f} -> {table[name]:>6.4f}")
+    print(
+        f"Fitted {report['entries']:,} entries ({skipped:,} skipped) in {report['cells']:,} cells, "
+        f"{report['sweeps']} sweeps, deviance {report['start_deviance']:,.1f} -> {report['deviance']:,.1f}, "
+        f"{elapsed:.2f}s",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.calibration",
+        description="Fit the factor tables to historical entry results.",
+    )
+    parser.add_argument("--dir", default=models.MODEL_DIR, help="directory of versioned model files")
+    parser.add_argument("--store", default=history.DEFAULT_PATH, help="history store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit_parser = commands.add_parser("fit", help="fit the tables to the history store and save a new version")
+    fit_parser.add_argument("--years", help="year or range of years to fit on, e.g. 2015-2024")
+    fit_parser.add_argument("--dry-run", action="store_true", help="print the fit without saving it")
+    update_parser = commands.add_parser("update", help="fold new years into the statistics and refit")
+    update_parser.add_argument("records", nargs="?", help="CSV of entries to import first")
+    update_parser.add_argument("--years", help="years already in the store to fold in, e.g. 2025")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    try:
+        # Start from, and compare against, the model the app is using
+        scoring.use(models.load_active(args.dir))
+        if args.command == "update":
+            if not args.records and not args.years:
+                parser.exit(2, "error: update needs a CSV of records or --years\n")
+            years = _parse_years(args.years) or []
+            if args.records:
+                years += list(history.write_years(history.read_records(args.records), args.store))
+        store = history.load(args.store)
+        if store is None:
+            parser.exit(1, f"error: no history store at {args.store}\n")
+        if args.command == "update":
+            missing = [year for year in years if year not in store.years]
+            if missing:
+                raise ValueError(f"Not in the history store: {', '.join(map(str, missing))}")
+            statistics, years, skipped = fold_years(store, sorted(set(years)), args.dir)
+        elif args.years or args.dry_run:
+            statistics, years, skipped = collect(store, _parse_years(args.years))
+        else:
+            statistics, years, skipped = rebuild_statistics(store, args.dir)
+        table, report = fit(statistics)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    _print_fit(table, report, skipped, time.perf_counter() - start_time)
+    if args.command == "update" or not args.dry_run:
+        source = {
+            "store": os.path.abspath(args.store),
+            "years": f"{years[0]}-{years[-1]}",
+            "entries": report["entries"],
+            "skipped": skipped,
+            "mode": "incremental" if args.command == "update" else "full",
+        }
+        print(f"Saved {models.save(table, args.dir, source=source, fit=report)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""Chart rendering for the calculator page.
+
+The sidebar charts are returned as PNG bytes rendered the way ``st.pyplot``
+renders them (200 dpi, tight bounding box), so the page can show them with
+``st.image``. matplotlib, pandas and PIL are only imported when a chart is
+first drawn, and figures come from ``figures`` so none of them stays
+registered with pyplot. The radar chart of a result only draws nine spokes
+and a polygon, so it is written as SVG directly, without matplotlib; it takes
+a few microseconds and stays a few kilobytes.
+The sidebar charts read the ``history`` store when one has been imported and
+fall back to the published figures below otherwise.
+"""
+import functools
+import html
+import io
+import threading
+
+import numpy as np
+
+from cannes_calculator import cache, figures, history, metrics, perf, scoring
+
+# Spokes of the "Your Strength Profile" radar chart
+RADAR_LABELS = ['Category', 'Country', 'Agency Size', 'Previous Wins',
+                'Experience', 'Budget', 'Brand', 'Results', 'Creativity']
+
+# st.image downscales anything wider than this on every call, so cached
+# images are stored already downscaled
+MAX_IMAGE_WIDTH = 1460
+
+
+def _pandas():
+    return perf.timed_import("pandas")
+
+
+def figure_png(fig):
+    Image = perf.timed_import("PIL.Image")
+    image = io.BytesIO()
+    fig.savefig(image, format="png", dpi=200, bbox_inches="tight")
+    with Image.open(image) as pil_image:
+        width, height = pil_image.size
+        if width <= MAX_IMAGE_WIDTH:
+            return image.getvalue()
+        with pil_image.resize(
+            (MAX_IMAGE_WIDTH, int(1.0 * height * MAX_IMAGE_WIDTH / width)), resample=Image.BILINEAR
+        ) as resized_image:
+            resized = io.BytesIO()
+            resized_image.save(resized, format="PNG", optimize=True)
+    return resized.getvalue()
+
+
+def radar_values(category, country, agency_size, previous_wins, years_experience,
+                 budget_level, brand_prominence, campaign_results, creative_approach, model=None):
+    """Normalized (0-1 scale) strength of each factor, in ``RADAR_LABELS`` order."""
+    factors = (model or scoring.current()).factors
+    previous_wins_factor = min(1.0, scoring.previous_wins_multiplier(previous_wins, model) / 1.5)
+    experience_factor = min(1.0, scoring.experience_multiplier(years_experience, model) / 1.2)
+    return [
+        factors["category"][category] / 1.5,
+        factors["country"][country] / 1.5,
+        factors["agency_size"][agency_size] / 1.5,
+        previous_wins_factor,
+        experience_factor,
+        factors["budget_level"][budget_level] / 1.5,
+        factors["brand_prominence"][brand_prominence] / 1.5,
+        factors["campaign_results"][campaign_results] / 1.5,
+        factors["creative_approach"][creative_approach] / 1.5
+    ]
+
+
+# Radar chart geometry in points, the units of the 8-inch matplotlib polar
+# figure it replaces, with that figure's default colors and line widths
+RADAR_WIDTH = 440
+RADAR_HEIGHT = 450
+RADAR_CENTER = (220, 240)
+RADAR_RADIUS = 170
+RADAR_LABEL_OFFSET = 16
+RADAR_RINGS = (0.2, 0.4, 0.6, 0.8)
+RADAR_COLOR = "#1f77b4"
+RADAR_GRID_COLOR = "#b0b0b0"
+RADAR_FONT = "DejaVu Sans, Arial, sans-serif"
+
+_RADAR_ANGLES = np.linspace(0, 2*np.pi, len(RADAR_LABELS), endpoint=False)
+
+
+def _radar_xy(radii):
+    """Points at ``radii`` along the spokes, counterclockwise from the right as in a polar plot."""
+    return RADAR_CENTER[0] + radii * np.cos(_RADAR_ANGLES), RADAR_CENTER[1] - radii * np.sin(_RADAR_ANGLES)
+
+
+def _radar_template():
+    """The SVG without the values, with a ``{points}`` field for the polygon."""
+    cx, cy = RADAR_CENTER
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {RADAR_WIDTH} {RADAR_HEIGHT}" '
+        f'font-family="{RADAR_FONT}">',
+        f'<text x="{cx}" y="22" font-size="15" text-anchor="middle">Your Strength Profile</text>',
+    ]
+    xs, ys = _radar_xy(RADAR_RADIUS + RADAR_LABEL_OFFSET)
+    for label, x, y in zip(RADAR_LABELS, xs, ys):
+        parts.append(
+            f'<text x="{x:.1f}" y="{y:.1f}" font-size="10" text-anchor="middle" '
+            f'dominant-baseline="central">{html.escape(label)}</text>'
+        )
+    parts.append(f'<polygon points="{{points}}" fill="{RADAR_COLOR}" fill-opacity="0.25"/>')
+    parts.append(f'<g fill="none" stroke="{RADAR_GRID_COLOR}" stroke-width="0.8">')
+    for ring in RADAR_RINGS:
+        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{ring * RADAR_RADIUS:.1f}"/>')
+    for x, y in zip(*_radar_xy(RADAR_RADIUS)):
+        parts.append(f'<line x1="{cx}" y1="{cy}" x2="{x:.1f}" y2="{y:.1f}"/>')
+    parts.append('</g>')
+    parts.append(f'<circle cx="{cx}" cy="{cy}" r="{RADAR_RADIUS}" fill="none" stroke="black" stroke-width="0.8"/>')
+    parts.append(
+        f'<polygon points="{{points}}" fill="none" stroke="{RADAR_COLOR}" stroke-width="2" stroke-linejoin="round"/>'
+    )
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+_RADAR_TEMPLATE = _radar_template()
+
+
+def render_radar_svg(values):
+    """The strength profile radar chart for nine normalized values, as an SVG string."""
+    xs, ys = _radar_xy(RADAR_RADIUS * np.clip(np.asarray(values, dtype=np.float64), 0.0, 1.0))
+    points = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs.tolist(), ys.tolist()))
+    return _RADAR_TEMPLATE.format(points=points)
+
+
+# Published figures behind the sidebar sections, used without a history store
+COUNTRY_YEARS = [2024, 2023, 2022, 2021, 2019, 2018, 2017, 2016, 2015]
+COUNTRY_WINS = {
+    "United States": [234, 218, 202, 187, 156, 147, 121, 143, 128],
+    "United Kingdom": [82, 77, 71, 68, 89, 84, 76, 70, 67],
+    "Brazil": [78, 69, 67, 58, 52, 49, 41, 90, 107],
+    "France": [45, 41, 39, 35, 40, 38, 33, 43, 34],
+    "Germany": [48, 43, 38, 32, 35, 31, 27, 33, 29]
+}
+
+NETWORKS = ['WPP', 'Omnicom', 'Publicis', 'IPG', 'Dentsu']
+NETWORK_WINS = {
+    2024: [156, 143, 138, 92, 67],
+    2022: [145, 132, 121, 87, 62],
+    2020: [0, 0, 0, 0, 0],  # No festival in 2020
+    2018: [128, 152, 115, 76, 58],
+    2016: [163, 152, 131, 91, 57],
+}
+
+SUBMISSION_YEARS = [2016, 2017, 2018, 2019, 2021, 2022, 2023, 2024]
+SUBMISSIONS = [43101, 41170, 32372, 30953, 29074, 25464, 26992, 26753]
+
+
+def country_wins():
+    """(years newest first, {country: Lions per year}) for the top five countries."""
+    store = history.default()
+    if store is None:
+        return COUNTRY_YEARS, COUNTRY_WINS
+    years, wins = store.wins_by_year("country", top=5)
+    return years[::-1], {country: counts[::-1] for country, counts in wins.items()}
+
+
+def network_wins():
+    """(networks, {year: Lions per network}) for every other year, newest first."""
+    store = history.default()
+    if store is None:
+        return NETWORKS, NETWORK_WINS
+    selected = [year for year in store.years if (store.latest_year - year) % 2 == 0][::-1][:5]
+    years, wins = store.wins_by_year("network", top=5, years=selected)
+    networks = list(wins)
+    return networks, {year: [wins[network][i] for network in networks] for i, year in enumerate(years)}
+
+
+def submissions_per_year():
+    """(years, entries per year), oldest first."""
+    store = history.default()
+    if store is None:
+        return SUBMISSION_YEARS, SUBMISSIONS
+    entries = store.entries_per_year()
+    return list(entries), list(entries.values())
+
+
+def render_once(func):
+    """Cache a chart renderer's PNG for the life of the process.
+
+    The lock makes concurrent first calls from several sessions wait for a
+    single render instead of each drawing the figure. With a shared cache,
+    the PNG of the current history store is rendered once per host.
+    """
+    lock = threading.Lock()
+
+    def draw():
+        with metrics.timer("cannes_chart_render_seconds", chart=func.__name__.replace("_chart_png", "")):
+            return func()
+
+    def render():
+        return cache.shared.get_or_create("charts", (func.__name__, history.signature()), draw)
+
+    cached = functools.lru_cache(maxsize=None)(render)
+
+    @functools.wraps(func)
+    def wrapper():
+        with lock:
+            return cached()
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+# The sidebar charts only depend on the data above, so each is rendered at
+# most once per process and served as PNG bytes afterwards
+
+@render_once
+def countries_chart_png():
+    years, wins = country_wins()
+    df_countries = _pandas().DataFrame(wins, index=years)
+
+    with figures.temporary_figure((10, 6)) as fig:
+        ax = fig.subplots()
+        df_countries.plot(kind='bar', ax=ax)
+        ax.set_title(f'Lions Won by Top Countries ({min(years)}-{max(years)})')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Number of Lions')
+        ax.legend(title='Country')
+        fig.tight_layout()
+        return figure_png(fig)
+
+
+@render_once
+def networks_chart_png():
+    networks, wins = network_wins()
+    df_networks = _pandas().DataFrame(wins, index=networks)
+
+    with figures.temporary_figure((10, 6)) as fig:
+        ax = fig.subplots()
+        df_networks.plot(kind='bar', ax=ax)
+        ax.set_title('Lions Won by Top Networks (Selected Years)')
+        ax.set_xlabel('Network')
+        ax.set_ylabel('Number of Lions')
+        ax.legend(title='Year')
+        fig.tight_layout()
+        return figure_png(fig)
+
+
+@render_once
+def submissions_chart_png():
+    years, submissions = submissions_per_year()
+    df_submissions = _pandas().DataFrame({'Year': years, 'Submissions': submissions})
+
+    with figures.temporary_figure((10, 6)) as fig:
+        ax = fig.subplots()
+        ax.plot(df_submissions['Year'], df_submissions['Submissions'], marker='o', linestyle='-', linewidth=2)
+        ax.set_title(f'Cannes Lions Submissions ({min(years)}-{max(years)})')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Number of Submissions')
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        # Annotate key points
+        peak_year, peak = max(zip(years, submissions), key=lambda point: point[1])
+        ax.annotate(f'All-time high: {peak:,}', xy=(peak_year, peak), xytext=(peak_year-0.5, peak+1500),
+                    arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8))
+
+        if 2021 in years:
+            covid = submissions[years.index(2021)]
+            ax.annotate('COVID impact', xy=(2021, covid), xytext=(2021-1, covid-3000),
+                        arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8))
+
+        fig.tight_layout()
+        return figure_png(fig)
+
+
+def clear_sidebar_charts():
+    """Drop the rendered sidebar charts, e.g. after a new year was imported."""
+    for chart in (countries_chart_png, networks_chart_png, submissions_chart_png):
+        chart.cache_clear()
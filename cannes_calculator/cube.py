@@ -0,0 +1,211 @@
+"""Precomputed probability cube covering every calculator input combination.
+
+Options that share a factor value produce the same probability, so each axis
+stores one slot per distinct factor level instead of one per option, and the
+years-of-experience axis stores one slot per distinct multiplier (0-1 years
+and 10+ years collapse). That keeps the cube at 53M cells instead of 1.1B
+while every lookup stays a single flat index into a memory-mapped ``.npy``
+file, shared between worker processes through the OS page cache.
+
+The cube pays off for batches (``lookup_codes``). A single profile is
+scored faster, and exactly, by ``scoring.score``; the cube stores float32
+by default, so its values are rounded. Collapsing only works while tables
+share factor values: a calibrated model (see ``calibration``) usually has
+distinct values everywhere, which grows the baseline's 53M cells to
+several hundred million. ``build`` refuses cubes over ``MAX_CELLS``
+(``CANNES_CUBE_MAX_CELLS``); without a cube, batches go through
+``scoring.score_codes``.
+
+Usage:
+    python -m cannes_calculator.cube build [-o data/probability_cube.npy] [--dtype float16]
+    python -m cannes_calculator.cube info [path]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from cannes_calculator import files, models, scoring
+
+DEFAULT_PATH = os.environ.get(
+    "CANNES_PROBABILITY_CUBE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "probability_cube.npy"),
+)
+
+# Largest cube ``build`` writes; 150M float32 cells are 0.6 GB
+MAX_CELLS = int(os.environ.get("CANNES_CUBE_MAX_CELLS", "150000000"))
+
+# Axes in the order the model applies them
+AXES = tuple(scoring.CATEGORICAL_FACTORS) + scoring.NUMERIC_FIELDS
+
+
+def _categorical_levels(field):
+    """Map each option code to a slot in its axis; returns (codes -> slot, slot factors)."""
+    values = np.array(list(scoring.CATEGORICAL_FACTORS[field].values()))
+    levels, slots = np.unique(values, return_inverse=True)
+    return slots.astype(np.intp), levels
+
+
+def _experience_slots():
+    years = np.arange(scoring.YEARS_EXPERIENCE_RANGE[1] + 1)
+    # 0 and 1 years apply no multiplier; 2..10 are distinct; beyond 10 matches 10
+    return np.where(years > 1, np.minimum(years, scoring.EXPERIENCE_CAP) - 1, 0).astype(np.intp)
+
+
+def axis_slots():
+    """Per-axis arrays mapping an encoded input value to its slot in the cube."""
+    slots = {field: _categorical_levels(field)[0] for field in scoring.CATEGORICAL_FACTORS}
+    slots["previous_wins"] = np.arange(scoring.PREVIOUS_WINS_RANGE[1] + 1, dtype=np.intp)
+    slots["years_experience"] = _experience_slots()
+    return slots
+
+
+def _axis_multipliers():
+    """Multiplier applied by each slot of every axis, in cube axis order."""
+    multipliers = [_categorical_levels(field)[1] for field in scoring.CATEGORICAL_FACTORS]
+    previous_wins = np.arange(scoring.PREVIOUS_WINS_RANGE[1] + 1)
+    multipliers.append(np.where(previous_wins > 0, 1 + (previous_wins * scoring.PREVIOUS_WIN_STEP), 1.0))
+    experience = np.arange(1, scoring.EXPERIENCE_CAP + 1)
+    multipliers.append(np.where(experience > 1, 1 + (experience * scoring.EXPERIENCE_STEP), 1.0))
+    return multipliers
+
+
+def build(path=DEFAULT_PATH, dtype="float32", max_cells=MAX_CELLS):
+    """Materialize the capped probability of every cell into ``path``.
+
+    The ``.npy`` payload and its ``.json`` sidecar are written to temporary
+    files and moved into place, so readers never see a half-written cube.
+    Raises ``ValueError`` when the model needs more than ``max_cells`` cells.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float16, np.float32, np.float64):
+        raise ValueError("dtype must be float16, float32 or float64")
+    multipliers = _axis_multipliers()
+    shape = tuple(len(m) for m in multipliers)
+    cells = int(np.prod(shape))
+    if cells > max_cells:
+        raise ValueError(
+            f"This model needs {cells:,} cells ({cells * dtype.itemsize / 1e9:.2f} GB), more than "
+            f"the limit of {max_cells:,}; score with the factor tables instead"
+        )
+
+    with files.atomic_path(path) as tmp_path:
+        cube = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+        # One slab per category level keeps the float64 working set around 30 MB
+        for i, category in enumerate(multipliers[0]):
+            slab = np.full(shape[1:], scoring.BASE_PROBABILITY * category)
+            for axis, factors in enumerate(multipliers[1:]):
+                view = [1] * len(shape[1:])
+                view[axis] = len(factors)
+                slab *= factors.reshape(view)
+            cube[i] = np.minimum(slab, scoring.PROBABILITY_CAP)
+        cube.flush()
+        del cube
+
+    meta = {
+        "fingerprint": scoring.fingerprint(),
+        "dtype": dtype.name,
+        "shape": list(shape),
+        "axes": list(AXES),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with files.atomic_write(f"{path}.json") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class ProbabilityCube:
+    """Read-only, memory-mapped view of a built cube."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(f"{path}.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta["fingerprint"] != scoring.fingerprint():
+            raise ValueError(f"{path} was built for a different model; rebuild it")
+        self.path = path
+        self.values = np.load(path, mmap_mode="r")
+        if list(self.values.shape) != self.meta["shape"]:
+            raise ValueError(f"{path} does not match its metadata; rebuild it")
+        self.flat = self.values.reshape(-1)
+        self.slots = axis_slots()
+        self.strides = np.array(
+            [int(np.prod(self.values.shape[i + 1:])) for i in range(len(AXES))], dtype=np.intp
+        )
+        # Offset of each option (or numeric value) in the flat array, for ``lookup``
+        self.offsets = {
+            field: dict(zip(scoring.options(field), (self.slots[field] * stride).tolist()))
+            if field in scoring.CATEGORICAL_FACTORS else (self.slots[field] * stride).tolist()
+            for field, stride in zip(AXES, self.strides)
+        }
+
+    def index_codes(self, encoded):
+        """Flat cell indices for integer-encoded profiles (see ``scoring.encode_profiles``)."""
+        index = np.zeros(len(encoded["category"]), dtype=np.intp)
+        for field, stride in zip(AXES, self.strides):
+            index += self.slots[field][encoded[field]] * stride
+        return index
+
+    def lookup_codes(self, encoded):
+        """Vectorized probabilities for integer-encoded profiles."""
+        return self.flat[self.index_codes(encoded)].astype(np.float64)
+
+    def lookup(self, **profile):
+        """Probability for one profile given as keyword arguments, like ``scoring.score``.
+
+        The profile must pass ``scoring.check_profile``. The result is rounded
+        to the cube's dtype.
+        """
+        return float(self.flat[sum(self.offsets[field][profile[field]] for field in AXES)])
+
+
+def load(path=DEFAULT_PATH):
+    """Open the cube at ``path``, or return None if it is missing or stale."""
+    try:
+        return ProbabilityCube(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.cube",
+        description="Build or inspect the precomputed probability cube.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="materialize every input combination")
+    build_parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    build_parser.add_argument("--dtype", default="float32", choices=("float16", "float32", "float64"))
+    info_parser = commands.add_parser("info", help="show the metadata of a built cube")
+    info_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    try:
+        # Build for the model the app will use
+        scoring.use(models.load_active())
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    if args.command == "build":
+        start_time = time.perf_counter()
+        try:
+            meta = build(args.output, args.dtype)
+        except ValueError as e:
+            parser.exit(1, f"error: {e}\n")
+        size = os.path.getsize(args.output)
+        print(
+            f"Built {args.output}: {int(np.prod(meta['shape'])):,} cells, {size / 1e6:.0f} MB "
+            f"in {time.perf_counter() - start_time:.1f}s"
+        )
+    else:
+        try:
+            cube = ProbabilityCube(args.path)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        print(json.dumps(cube.meta, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
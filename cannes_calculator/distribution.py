@@ -0,0 +1,222 @@
+"""Sorted probability distributions for percentile ranks.
+
+The distribution over every calculator input combination (1.1 billion of
+them) is built without enumerating them. Each factor contributes its
+distinct multipliers with the number of options that share each one. These
+(value, count) lists are combined one factor at a time as outer products,
+and equal products are merged after every step, so the working set stays
+around a million distinct values. Fitted factor tables (see
+``calibration``) rarely repeat a multiplier. When a step would produce
+more than ``MAX_PRODUCTS`` values, the values are first merged on a
+logarithmic grid of relative width ``GRID``. That bounds the working set,
+and a rank is then approximate within that width. The cap is applied at the end, because later factors
+below 1.0 can pull a product back under it.
+
+A distribution is saved as sorted values with cumulative counts. Ranking a
+probability is then two binary searches. A second distribution can be built
+from a file of historical entry profiles (see ``bulk`` for the format).
+
+Usage:
+    python -m cannes_calculator.distribution build [--entries entries.csv]
+    python -m cannes_calculator.distribution rank 0.042
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+from cannes_calculator import bulk, files, models, scoring
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+DEFAULT_PATH = os.environ.get("CANNES_DISTRIBUTION", os.path.join(DATA_DIR, "probability_distribution.npz"))
+ENTRIES_PATH = os.environ.get("CANNES_ENTRY_DISTRIBUTION", os.path.join(DATA_DIR, "entry_distribution.npz"))
+
+# Products are merged after rounding to this many decimal places
+DECIMALS = 12
+
+# Values are snapped to a log grid of this relative width before a step
+# that would produce more than MAX_PRODUCTS of them
+MAX_PRODUCTS = 5_000_000
+GRID = 1e-4
+
+# Probabilities within this relative distance count as equal when ranking,
+# which also absorbs the rounding of a float32 probability cube
+RELATIVE_TOLERANCE = 1e-6
+
+_build_lock = threading.Lock()
+
+
+def _merge(values, counts):
+    """Sort ``values`` and add up the counts of equal ones."""
+    order = np.argsort(values, kind="stable")
+    values, counts = values[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return values[starts], np.add.reduceat(counts, starts)
+
+
+def factor_levels():
+    """(distinct multipliers, number of inputs giving each) for every factor of the formula."""
+    levels = []
+    for table in scoring.CATEGORICAL_FACTORS.values():
+        levels.append(np.unique(np.array(list(table.values())), return_counts=True))
+    previous_wins = np.arange(scoring.PREVIOUS_WINS_RANGE[0], scoring.PREVIOUS_WINS_RANGE[1] + 1)
+    levels.append(np.unique(
+        np.where(previous_wins > 0, 1 + previous_wins * scoring.PREVIOUS_WIN_STEP, 1.0), return_counts=True
+    ))
+    years = np.arange(scoring.YEARS_EXPERIENCE_RANGE[0], scoring.YEARS_EXPERIENCE_RANGE[1] + 1)
+    levels.append(np.unique(
+        np.where(years > 1, 1 + np.minimum(years, scoring.EXPERIENCE_CAP) * scoring.EXPERIENCE_STEP, 1.0),
+        return_counts=True,
+    ))
+    return levels
+
+
+class Distribution:
+    """Sorted distinct probabilities with cumulative counts."""
+
+    def __init__(self, values, cumulative, meta):
+        self.values = values
+        self.cumulative = cumulative
+        self.meta = meta
+
+    @classmethod
+    def from_counts(cls, values, counts, **meta):
+        values, counts = _merge(np.round(values, DECIMALS), np.asarray(counts, dtype=np.int64))
+        meta = dict(meta, fingerprint=scoring.fingerprint(), built_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        return cls(values, np.cumsum(counts), meta)
+
+    @property
+    def total(self):
+        return int(self.cumulative[-1]) if len(self.cumulative) else 0
+
+    def _count_below(self, probability):
+        index = np.searchsorted(self.values, probability, side="left")
+        return int(self.cumulative[index - 1]) if index else 0
+
+    def percentile(self, probability):
+        """Share of the distribution below ``probability``, counting ties as half (0-100)."""
+        if not self.total:
+            return None
+        tolerance = abs(probability) * RELATIVE_TOLERANCE
+        below = self._count_below(probability - tolerance)
+        not_above = self._count_below(np.nextafter(probability + tolerance, np.inf))
+        return 100.0 * (below + (not_above - below) / 2) / self.total
+
+    def save(self, path):
+        with files.atomic_path(path, suffix=".npz") as tmp_path:
+            np.savez(tmp_path, values=self.values, cumulative=self.cumulative, meta=np.array(json.dumps(self.meta)))
+
+
+def build_all():
+    """Distribution of the probability over every combination of calculator inputs."""
+    values = np.array([scoring.BASE_PROBABILITY])
+    counts = np.array([1], dtype=np.int64)
+    # Fewest levels first keeps the intermediate products small
+    for multipliers, level_counts in sorted(factor_levels(), key=lambda level: len(level[0])):
+        if len(values) * len(multipliers) > MAX_PRODUCTS:
+            values, counts = _merge(np.exp(np.round(np.log(values) / GRID) * GRID), counts)
+        values = np.round(np.multiply.outer(values, multipliers).ravel(), DECIMALS)
+        counts = np.multiply.outer(counts, level_counts).ravel()
+        values, counts = _merge(values, counts)
+    return Distribution.from_counts(np.minimum(values, scoring.PROBABILITY_CAP), counts, source="all_inputs")
+
+
+def build_from_entries(path, chunk_size=bulk.DEFAULT_CHUNK_SIZE):
+    """Distribution of the probabilities of historical entry profiles in a CSV or Parquet file."""
+    values = np.zeros(0)
+    counts = np.zeros(0, dtype=np.int64)
+    if bulk._format(path, None) == "parquet":
+        chunks = bulk.read_parquet_chunks(path, chunk_size)
+        stream = None
+    else:
+        stream = open(path, newline="", encoding="utf-8")
+        chunks = bulk.read_csv_chunks(stream, chunk_size)
+    try:
+        for columns in chunks:
+            chunk_values = np.round(scoring.score_batch(columns), DECIMALS)
+            values, counts = _merge(
+                np.concatenate([values, chunk_values]),
+                np.concatenate([counts, np.ones(len(chunk_values), dtype=np.int64)]),
+            )
+    finally:
+        if stream is not None:
+            stream.close()
+    return Distribution.from_counts(values, counts, source=os.path.basename(path))
+
+
+def load(path=DEFAULT_PATH):
+    """Open a saved distribution, or return None if it is missing or was built for another model."""
+    try:
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            if meta["fingerprint"] != scoring.fingerprint():
+                return None
+            return Distribution(saved["values"], saved["cumulative"], meta)
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+
+
+def load_or_build(path=DEFAULT_PATH):
+    """The all-inputs distribution, built and saved on first use.
+
+    Threads of one process (the warm-up and the first calculation) build it
+    once; the others wait and load the saved file.
+    """
+    with _build_lock:
+        distribution = load(path)
+        if distribution is None:
+            distribution = build_all()
+            try:
+                distribution.save(path)
+            except OSError:
+                pass
+    return distribution
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.distribution",
+        description="Build probability distributions and rank probabilities against them.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the all-inputs (or --entries) distribution")
+    build_parser.add_argument("--entries", help="CSV or Parquet file of historical entry profiles")
+    build_parser.add_argument("-o", "--output", help="destination (default depends on the distribution)")
+    rank_parser = commands.add_parser("rank", help="percentile of a probability")
+    rank_parser.add_argument("probability", type=float)
+    rank_parser.add_argument("--path", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    try:
+        # Build for the model the app will use
+        scoring.use(models.load_active())
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    if args.command == "build":
+        start_time = time.perf_counter()
+        try:
+            distribution = build_from_entries(args.entries) if args.entries else build_all()
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        path = args.output or (ENTRIES_PATH if args.entries else DEFAULT_PATH)
+        distribution.save(path)
+        print(
+            f"Built {path}: {distribution.total:,} profiles, {len(distribution.values):,} distinct "
+            f"probabilities in {time.perf_counter() - start_time:.1f}s"
+        )
+    else:
+        distribution = load(args.path)
+        if distribution is None:
+            parser.exit(1, f"error: no up-to-date distribution at {args.path}\n")
+        print(f"{distribution.percentile(args.probability):.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
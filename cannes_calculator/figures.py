@@ -0,0 +1,76 @@
+"""matplotlib figure lifecycle for long-running server processes.
+
+Figures created through ``pyplot`` are registered with its global figure
+manager and live until explicitly closed. Everything here uses the
+object-oriented ``Figure`` API with an Agg canvas instead, so a figure is
+freed as soon as the last reference to it goes away.
+"""
+import contextlib
+import os
+import sys
+import weakref
+
+from cannes_calculator import perf
+
+# Every figure created through new_figure(), for the live-figure gauge
+_tracked = weakref.WeakSet()
+
+
+def new_figure(figsize):
+    """Create a figure that is not registered with pyplot."""
+    Figure = perf.timed_import("matplotlib.figure").Figure
+    FigureCanvasAgg = perf.timed_import("matplotlib.backends.backend_agg").FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    _tracked.add(fig)
+    return fig
+
+
+@contextlib.contextmanager
+def temporary_figure(figsize):
+    """A one-off figure that is cleared and stops counting as live on exit.
+
+    Clearing breaks the figure's artist graph right away instead of waiting
+    for the cyclic garbage collector to find it.
+    """
+    fig = new_figure(figsize)
+    try:
+        yield fig
+    finally:
+        fig.clear()
+        _tracked.discard(fig)
+
+
+def live_figures():
+    """Figures still alive: ours plus any left open in pyplot's figure manager."""
+    count = len(_tracked)
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        count += len(pyplot.get_fignums())
+    return count
+
+
+def rss_bytes():
+    """Current resident set size of this process, or None if it can't be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS, in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def gauges():
+    rss = rss_bytes()
+    return {"live_figures": live_figures(), "rss_mb": round(rss / 2**20, 1) if rss is not None else None}
+
+
+def metric_gauges():
+    """Figure and memory gauges for ``metrics.register_collector``."""
+    return {"cannes_live_figures": live_figures(), "cannes_rss_bytes": rss_bytes()}
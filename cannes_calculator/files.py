@@ -0,0 +1,40 @@
+"""Atomic replacement of data files.
+
+Every file is written under a unique temporary name in its destination
+directory and renamed into place, so readers see either the old or the new
+file, and two threads or processes writing the same file never share a
+temporary file. The last rename wins.
+"""
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_path(path, suffix=".tmp"):
+    """Yield a fresh temporary path next to ``path``; it replaces ``path`` when the block succeeds.
+
+    ``suffix`` lets writers that choose the format from the extension (such
+    as ``np.savez``) keep it. The temporary file is removed on failure.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=suffix, dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """Open a temporary file for writing that replaces ``path`` when the block succeeds."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
@@ -0,0 +1,350 @@
+"""Columnar store of historical Cannes Lions entries, loaded by memory mapping.
+
+Layout of a store directory::
+
+    meta.json            years, row counts and the column list
+    vocab.json           string values of every text column, in code order
+    <year>/<column>.npy  one array per column and festival year
+
+Text columns (category, country, agency, network, award and the optional
+profile fields) are stored as int32 codes into ``vocab.json``. Vocabularies
+only ever grow, so existing codes stay valid when a year is added. Number
+columns are int16. Opening a store parses two small JSON files and maps the
+column files, so start-up cost does not depend on the number of rows.
+Queries are ``np.bincount`` over the codes of one year at a time.
+
+Usage:
+    python -m cannes_calculator.history import entries.csv [--store data/history]
+    python -m cannes_calculator.history info [--store data/history]
+    python -m cannes_calculator.history synthesize -o synthetic.csv
+"""
+import argparse
+import collections
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from cannes_calculator import files, scoring
+
+DEFAULT_PATH = os.environ.get(
+    "CANNES_HISTORY",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history"),
+)
+
+REQUIRED_COLUMNS = ("year", "category", "country", "agency", "network", "award")
+# Profile fields that make the entries usable for calibration; all or none
+PROFILE_COLUMNS = tuple(field for field in scoring.FIELDS if field not in REQUIRED_COLUMNS)
+NUMBER_COLUMNS = ("year",) + scoring.NUMERIC_FIELDS
+
+# Award levels that count as winning a Lion
+WINNING_AWARDS = ("Grand Prix", "Gold", "Silver", "Bronze")
+
+_default = None
+_default_mtime = None
+_default_lock = threading.Lock()
+
+
+class HistoryStore:
+    """Read-only view of a store directory."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.path = path
+        self.years = sorted(int(year) for year in self.meta["years"])
+        self.columns = self.meta["columns"]
+        self._codes = {name: {value: code for code, value in enumerate(values)} for name, values in self.vocab.items()}
+        self._arrays = {}
+
+    @property
+    def rows(self):
+        return sum(self.meta["years"].values())
+
+    @property
+    def latest_year(self):
+        return self.years[-1] if self.years else None
+
+    def column(self, name, year):
+        """Memory-mapped column of one year, or None if the store doesn't have it."""
+        if name not in self.columns:
+            return None
+        key = (name, year)
+        if key not in self._arrays:
+            column_path = os.path.join(self.path, str(year), f"{name}.npy")
+            self._arrays[key] = np.load(column_path, mmap_mode="r") if os.path.exists(column_path) else None
+        return self._arrays[key]
+
+    def code(self, name, value):
+        return self._codes[name].get(value)
+
+    def win_mask(self, year):
+        """Boolean mask of the entries of ``year`` that won a Lion."""
+        award = self.column("award", year)
+        codes = [self.code("award", level) for level in WINNING_AWARDS if self.code("award", level) is not None]
+        return np.isin(award, codes)
+
+    def counts(self, name, year, wins_only=False):
+        """``{value: rows}`` of a text column for one year, optionally counting only Lions won."""
+        codes = self.column(name, year)
+        if codes is None:
+            return {}
+        if wins_only:
+            codes = codes[self.win_mask(year)]
+        totals = np.bincount(codes, minlength=len(self.vocab[name]))
+        return {self.vocab[name][code]: int(totals[code]) for code in np.flatnonzero(totals)}
+
+    def entries_per_year(self):
+        return {year: int(self.meta["years"][str(year)]) for year in self.years}
+
+    def wins_by_year(self, name, top=5, years=None):
+        """Lions won per year by the ``top`` values of ``name`` over ``years``.
+
+        Returns ``(years, {value: [wins per year]})`` ordered by total wins.
+        """
+        years = self.years if years is None else [year for year in years if year in self.years]
+        per_year = [self.counts(name, year, wins_only=True) for year in years]
+        totals = collections.Counter()
+        for counts in per_year:
+            totals.update(counts)
+        leaders = [value for value, _ in totals.most_common(top)]
+        return years, {value: [counts.get(value, 0) for counts in per_year] for value in leaders}
+
+
+def load(path=DEFAULT_PATH):
+    """Open the store at ``path``, or return None when there isn't one."""
+    try:
+        return HistoryStore(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _meta_mtime(path):
+    try:
+        return os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    except OSError:
+        return None
+
+
+def default():
+    """The store at ``DEFAULT_PATH``, opened once per process (None without one)."""
+    global _default, _default_mtime
+    with _default_lock:
+        if _default is None:
+            _default_mtime = _meta_mtime(DEFAULT_PATH)
+            _default = load() or False
+        return _default or None
+
+
+def signature():
+    """Identifies the default store's contents across processes (None without a store)."""
+    return _meta_mtime(DEFAULT_PATH)
+
+
+def reset_default():
+    """Forget the opened default store so the next ``default()`` reopens it."""
+    global _default
+    with _default_lock:
+        _default = None
+
+
+def refresh():
+    """Reopen the default store on next use if it changed on disk; returns True if it did.
+
+    ``write_years`` replaces ``meta.json`` last, so a new modification time
+    means a complete import. Costs one stat.
+    """
+    global _default
+    mtime = _meta_mtime(DEFAULT_PATH)
+    with _default_lock:
+        if _default is None or mtime == _default_mtime:
+            return False
+        _default = None
+        return True
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+    except FileNotFoundError:
+        return {"years": {}, "columns": []}, {}
+    return meta, vocab
+
+
+def _write_json(path, data):
+    with files.atomic_write(path) as f:
+        json.dump(data, f, indent=1)
+
+
+def write_years(records_by_year, path=DEFAULT_PATH):
+    """Write (or replace) whole years of records; returns the rows written per year.
+
+    ``records_by_year`` maps year -> column mapping (name -> list of values).
+    Every year is validated and written to a temporary directory first, so
+    a bad year leaves the store untouched. Only then is the grown
+    vocabulary saved, each year swapped in, and the metadata updated last.
+    Vocabularies only grow, so readers see either the old or the new years.
+    """
+    meta, vocab = _read_meta(path)
+    columns = list(REQUIRED_COLUMNS)
+    first = next(iter(records_by_year.values()), {})
+    if all(name in first for name in PROFILE_COLUMNS):
+        columns += PROFILE_COLUMNS
+    if meta["columns"] and meta["columns"] != columns:
+        raise ValueError(f"Store has columns {meta['columns']}, the new records have {columns}")
+
+    os.makedirs(path, exist_ok=True)
+    staged = {}
+    try:
+        for year, records in sorted(records_by_year.items()):
+            missing = [name for name in columns if name not in records]
+            if missing:
+                raise ValueError(f"{year}: missing columns {', '.join(missing)}")
+            staged[year] = tempfile.mkdtemp(prefix=f".{year}.", suffix=".tmp", dir=path)
+            for name in columns:
+                values = records[name]
+                if name in NUMBER_COLUMNS:
+                    array = np.asarray(values, dtype=np.int64)
+                    if array.size and (array.min() < np.iinfo(np.int16).min or array.max() > np.iinfo(np.int16).max):
+                        raise ValueError(f"{year}: {name} out of range")
+                    array = array.astype(np.int16)
+                else:
+                    table = vocab.setdefault(name, [])
+                    codes = {value: code for code, value in enumerate(table)}
+                    for value in values:
+                        if value not in codes:
+                            codes[value] = len(table)
+                            table.append(value)
+                    array = np.fromiter((codes[value] for value in values), dtype=np.int32, count=len(values))
+                np.save(os.path.join(staged[year], f"{name}.npy"), array)
+
+        # Codes of the new years must resolve before any of them is visible
+        _write_json(os.path.join(path, "vocab.json"), vocab)
+        written = {}
+        for year, tmp_dir in staged.items():
+            year_dir = os.path.join(path, str(year))
+            if os.path.exists(year_dir):
+                shutil.rmtree(year_dir)
+            os.replace(tmp_dir, year_dir)
+            written[year] = len(records_by_year[year]["year"])
+            meta["years"][str(year)] = written[year]
+    finally:
+        for tmp_dir in staged.values():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    meta["columns"] = columns
+    meta["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    _write_json(os.path.join(path, "meta.json"), meta)
+    return written
+
+
+def read_records(path):
+    """Group a CSV of entry records by year into column mappings."""
+    by_year = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = [name for name in REQUIRED_COLUMNS if name not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        names = [name for name in REQUIRED_COLUMNS + PROFILE_COLUMNS if name in reader.fieldnames]
+        for line, row in enumerate(reader, start=2):
+            try:
+                year = int(row["year"])
+                values = {name: int(row[name]) if name in NUMBER_COLUMNS else row[name] for name in names}
+            except ValueError:
+                raise ValueError(f"Line {line}: year and numeric profile fields must be whole numbers") from None
+            columns = by_year.setdefault(year, {name: [] for name in names})
+            for name in names:
+                columns[name].append(values[name])
+    return by_year
+
+
+def synthesize(path, years, seed=0):
+    """Write a synthetic CSV of entry records for trying out the pipeline.
+
+    Entry counts per year follow ``years`` ({year: entries}); profiles are
+    random form options and awards are drawn from the current model, so a
+    calibration run on this file should recover the factor tables.
+    """
+    rng = np.random.default_rng(seed)
+    countries = scoring.options("country")
+    networks = ["WPP", "Omnicom", "Publicis", "IPG", "Dentsu", "Havas", "Independent"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(REQUIRED_COLUMNS + PROFILE_COLUMNS)
+        for year, entries in sorted(years.items()):
+            columns = {
+                field: rng.choice(np.array(scoring.options(field), dtype=object), entries)
+                for field in scoring.CATEGORICAL_FACTORS
+            }
+            columns["previous_wins"] = rng.poisson(2.0, entries).clip(*scoring.PREVIOUS_WINS_RANGE)
+            columns["years_experience"] = rng.integers(0, 16, entries)
+            probability = scoring.score_batch(columns)
+            won = rng.random(entries) < probability
+            level = rng.choice(np.array(WINNING_AWARDS[1:], dtype=object), entries, p=[0.2, 0.35, 0.45])
+            award = np.where(won, level, np.where(rng.random(entries) < 0.1, "Shortlist", ""))
+            network = rng.choice(np.array(networks, dtype=object), entries)
+            agency = [f"{network[i]} {countries.index(columns['country'][i]) + 1:02d}" for i in range(entries)]
+            for i in range(entries):
+                writer.writerow(
+                    [year, columns["category"][i], columns["country"][i], agency[i], network[i], award[i]]
+                    + [columns[field][i] for field in PROFILE_COLUMNS]
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.history",
+        description="Manage the columnar store of historical entries.",
+    )
+    parser.add_argument("--store", default=DEFAULT_PATH, help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="add or replace the years found in a CSV of entries")
+    import_parser.add_argument("records")
+    commands.add_parser("info", help="show the years and columns of the store")
+    synth_parser = commands.add_parser("synthesize", help="write a synthetic entries CSV for testing")
+    synth_parser.add_argument("-o", "--output", required=True)
+    synth_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        start_time = time.perf_counter()
+        try:
+            written = write_years(read_records(args.records), args.store)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        print(
+            f"Imported {sum(written.values()):,} entries for {', '.join(map(str, written))} "
+            f"into {args.store} in {time.perf_counter() - start_time:.1f}s"
+        )
+    elif args.command == "info":
+        store = load(args.store)
+        if store is None:
+            parser.exit(1, f"error: no store at {args.store}\n")
+        print(json.dumps({"rows": store.rows, **store.meta}, indent=2))
+    else:
+        from cannes_calculator import charts, models
+
+        try:
+            # Draw the awards from the model the app is using
+            scoring.use(models.load_active())
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        synthesize(args.output, dict(zip(charts.SUBMISSION_YEARS, charts.SUBMISSIONS)), args.seed)
+        print(f"Wrote {sum(charts.SUBMISSIONS):,} synthetic entries to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Run the calculator app with its background services started at process start.
+
+Streamlit only executes ``app.py`` when a session connects, so anything the
+script starts would wait for the first visitor. ``start_process`` starts,
+once per process:
+
+- logging (see ``logs``),
+- the model watcher, which loads the active model first (see ``models``),
+- the metrics gauges and the ``/metrics`` and ``/ready`` endpoint
+  (``CANNES_METRICS_PORT``),
+- the warm-up (see ``warmup``).
+
+The command below calls it and then runs Streamlit in the same process, so
+``/ready`` answers from the start and the warm-up fills the caches the
+sessions will use. The app script calls ``start_process`` as well; under a
+plain ``streamlit run`` everything then starts with the first session.
+
+Usage:
+    python -m cannes_calculator.launch [--metrics-port 9464] [streamlit run options, e.g. --server.port 8501]
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+
+from cannes_calculator import cache, calculation, figures, logs, metrics, models, scoring, warmup
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+DEFAULT_METRICS_PORT = 9464
+
+logger = logging.getLogger("cannes_calculator")
+
+_lock = threading.Lock()
+_started = None
+
+
+def use_model(model):
+    scoring.use(model)
+    logger.info(f"Using model {model.label} ({model.fingerprint})")
+
+
+def start_process():
+    """Start logging, the model watcher, metrics and the warm-up once; returns the watcher."""
+    global _started
+    with _lock:
+        if _started is not None:
+            return _started
+        logs.configure()
+        metrics.register_collector(calculation.cache_gauges)
+        metrics.register_collector(cache.metric_gauges)
+        metrics.register_collector(figures.metric_gauges)
+        metrics.register_collector(logs.metric_gauges)
+        metrics.start_http_server()
+        # The warm-up builds artifacts for the model in use, so load it first
+        _started = models.Watcher(use_model).start()
+        warmup.start()
+        return _started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.launch",
+        description="Start the warm-up and readiness endpoint, then run the Streamlit app. "
+                    "Other options are passed to streamlit run.",
+    )
+    parser.add_argument("--metrics-port", type=int,
+                        default=int(os.environ.get("CANNES_METRICS_PORT", DEFAULT_METRICS_PORT)),
+                        help="port of /metrics and /ready (default: CANNES_METRICS_PORT or %(default)s)")
+    parser.add_argument("--app", default=APP_PATH, help="Streamlit script to run")
+    args, streamlit_args = parser.parse_known_args(argv)
+
+    os.environ["CANNES_METRICS_PORT"] = str(args.metrics_port)
+    start_process()
+
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", args.app, *streamlit_args]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
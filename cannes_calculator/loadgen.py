@@ -0,0 +1,313 @@
+"""Load generator that drives a running Streamlit server with many concurrent sessions.
+
+Each simulated user opens the same WebSocket a browser does and speaks the
+Streamlit protocol directly: it asks for a rerun, reads the page until the
+script finishes, and then repeats the app's own flows at random: toggling
+one of the sidebar sections, changing a form selectbox, or pressing
+Calculate. The time from sending a rerun to receiving ``script_finished`` is
+the rerun latency. Images referenced by the page are not downloaded. The
+calculator inputs sit in a form, so, as in a browser, changing a selectbox
+sends nothing until Calculate submits it, and is not a rerun.
+
+The server's resident memory is sampled throughout the run, either for the
+server this tool starts itself (``--spawn``) or for ``--pid``.
+
+Usage:
+    python -m cannes_calculator.loadgen --spawn --sessions 200 --duration 60
+    python -m cannes_calculator.loadgen --url ws://127.0.0.1:8501 --pid 1234 -o load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from cannes_calculator import bench
+
+STREAM_PATH = "/_stcore/stream"
+HEALTH_PATH = "/_stcore/health"
+
+# Relative frequency of each user action
+ACTIONS = {"toggle_section": 3, "change_selectbox": 4, "calculate": 3}
+
+
+class SessionError(Exception):
+    pass
+
+
+class Session:
+    """One simulated browser tab."""
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.widgets = {}  # label -> element proto of the last rerun
+        self.states = {}  # widget id -> WidgetState to send with every rerun
+        self.pending = {}  # form widget id -> WidgetState sent with the next submit
+
+    async def connect(self):
+        from tornado.httpclient import HTTPRequest
+        from tornado.websocket import websocket_connect
+
+        request = HTTPRequest(self.url + STREAM_PATH, headers={"Sec-WebSocket-Protocol": "streamlit"})
+        self.ws = await websocket_connect(request, max_message_size=256 * 1024 * 1024)
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def rerun(self, trigger=None):
+        """Rerun the script with the current widget states; returns the latency in seconds."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        for state in self.states.values():
+            message.rerun_script.widget_states.widgets.append(state)
+        if trigger is not None:
+            message.rerun_script.widget_states.widgets.add(id=trigger, trigger_value=True)
+
+        start_time = time.perf_counter()
+        await self.ws.write_message(message.SerializeToString(), binary=True)
+        widgets = {}
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise SessionError("Server closed the connection")
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raise SessionError(f"App raised: {element.exception.message}")
+                if element_type in ("checkbox", "selectbox", "button"):
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (element_type, widget)
+            elif kind == "script_finished":
+                if forward.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    raise SessionError(f"Script did not finish cleanly ({forward.script_finished})")
+                break
+        self.widgets = widgets
+        return time.perf_counter() - start_time
+
+    async def step(self):
+        """Perform one random user action; returns (action name, latency in seconds or None)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        if action == "toggle_section":
+            label = self.rng.choice(list(bench.SIDEBAR_SECTIONS.values()))
+            checkbox = self._widget(label, "checkbox")
+            current = self.states.get(checkbox.id)
+            value = not (current.bool_value if current is not None else checkbox.default)
+            self.states[checkbox.id] = WidgetState(id=checkbox.id, bool_value=value)
+            return action, await self.rerun()
+        if action == "change_selectbox":
+            selectboxes = [widget for kind, widget in self.widgets.values() if kind == "selectbox"]
+            if not selectboxes:
+                raise SessionError("No selectboxes on the page")
+            selectbox = self.rng.choice(selectboxes)
+            index = self.rng.randrange(len(selectbox.options))
+            self.pending[selectbox.id] = WidgetState(id=selectbox.id, int_value=index)
+            return action, None
+        button = self._widget(bench.CALCULATE_LABEL, "button")
+        self.states.update(self.pending)
+        self.pending = {}
+        return action, await self.rerun(trigger=button.id)
+
+    def _widget(self, label, kind):
+        found = self.widgets.get(label)
+        if found is None or found[0] != kind:
+            raise SessionError(f"No {kind} labelled {label!r} on the page")
+        return found[1]
+
+
+async def _user(url, seed, deadline, think_time, samples, errors):
+    rng = random.Random(seed)
+    session = Session(url, rng)
+    try:
+        await session.connect()
+        samples.append(("initial", await session.rerun()))
+        while time.monotonic() < deadline:
+            if think_time:
+                await asyncio.sleep(rng.expovariate(1 / think_time))
+            action, latency = await session.step()
+            if latency is not None:
+                samples.append((action, latency))
+    except (SessionError, OSError, asyncio.TimeoutError) as e:
+        errors.append(str(e))
+    except Exception as e:  # tornado raises its own closed/HTTP errors
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        session.close()
+
+
+def rss_bytes(pid):
+    """Resident set size of process ``pid``, or None if it can't be read."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+async def _sample_memory(pid, interval, readings, stop):
+    while not stop.is_set():
+        rss = rss_bytes(pid)
+        if rss is not None:
+            readings.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+async def run(url, sessions, duration, ramp_up=5.0, think_time=1.0, pid=None, seed=0):
+    """Drive ``sessions`` concurrent users for ``duration`` seconds and return the report."""
+    samples, errors, readings = [], [], []
+    stop_sampling = asyncio.Event()
+    sampler = None
+    if pid is not None:
+        readings.append(rss_bytes(pid))
+        sampler = asyncio.create_task(_sample_memory(pid, 0.5, readings, stop_sampling))
+
+    start_time = time.monotonic()
+    deadline = start_time + ramp_up + duration
+    users = []
+    for index in range(sessions):
+        users.append(asyncio.create_task(_user(url, seed + index, deadline, think_time, samples, errors)))
+        if ramp_up:
+            await asyncio.sleep(ramp_up / sessions)
+    await asyncio.gather(*users)
+    elapsed = time.monotonic() - start_time
+    if sampler is not None:
+        stop_sampling.set()
+        await sampler
+
+    steps = [latency for action, latency in samples if action != "initial"]
+    report = {
+        "sessions": sessions,
+        "duration_s": round(elapsed, 2),
+        "think_time_s": think_time,
+        "reruns": len(samples),
+        "errors": len(errors),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency": _percentiles(steps),
+        "by_action": {
+            action: _percentiles([latency for name, latency in samples if name == action])
+            for action in ["initial"] + list(ACTIONS)
+            if action != "change_selectbox"
+        },
+    }
+    if errors:
+        report["first_errors"] = sorted(set(errors))[:5]
+    readings = [rss for rss in readings if rss is not None]
+    if readings:
+        report["server_memory_mb"] = {
+            "before": round(readings[0] / 2**20, 1),
+            "peak": round(max(readings) / 2**20, 1),
+            "after": round(readings[-1] / 2**20, 1),
+        }
+    return report
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(port, timeout=60.0):
+    """Start ``streamlit run app.py`` headless on ``port`` and wait until it is healthy."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", bench.APP_PATH,
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=dict(os.environ, CANNES_LOG_CONSOLE=os.environ.get("CANNES_LOG_CONSOLE", "0")),
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH_PATH}", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Streamlit did not become healthy within {timeout:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.loadgen",
+        description="Simulate concurrent users of the calculator against a Streamlit server.",
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="server to load, e.g. ws://127.0.0.1:8501")
+    target.add_argument("--spawn", action="store_true", help="start app.py on a free port for the run")
+    parser.add_argument("--pid", type=int, help="server process to sample memory from (with --url)")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which sessions connect")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="mean pause between a user's actions in seconds (0 for none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="also write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    process = None
+    url, pid = args.url, args.pid
+    if args.spawn:
+        port = _free_port()
+        process = spawn_server(port)
+        url, pid = f"ws://127.0.0.1:{port}", process.pid
+    url = url.rstrip("/")
+
+    try:
+        report = asyncio.run(run(url, args.sessions, args.duration, args.ramp_up, args.think_time, pid, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
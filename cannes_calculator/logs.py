@@ -0,0 +1,234 @@
+"""Logging setup for the calculator, configured once per process.
+
+Two modes, chosen with ``CANNES_LOG_MODE``:
+
+``sync`` (default)
+    Text lines written to the log file and the console from the calling
+    thread, as the app always has.
+``async``
+    Records are put on a bounded queue and the calling thread returns
+    immediately. A background writer formats them as JSON lines, writes
+    them in batches, and rotates the file by size. If the queue is full the
+    record is dropped and counted, so logging never blocks a request.
+
+In both modes ``CANNES_LOG_SAMPLE_RATE`` keeps only that fraction of INFO
+and DEBUG records; warnings and errors are always kept.
+
+Other settings: ``CANNES_LOG_FILE`` (app.log), ``CANNES_LOG_MAX_BYTES``
+(10 MB), ``CANNES_LOG_BACKUPS`` (5), ``CANNES_LOG_BATCH_SIZE`` (256),
+``CANNES_LOG_FLUSH_INTERVAL`` (1.0 seconds), ``CANNES_LOG_QUEUE_SIZE``
+(10000) and ``CANNES_LOG_CONSOLE`` (1).
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configured = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any fields passed with ``extra``."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random ``rate`` fraction of records below WARNING.
+
+    The decision is stored on the record, so every handler sharing this
+    filter keeps or drops the same records and each is counted once. (A
+    filter on the root logger would not see records of child loggers.)
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        keep = getattr(record, "_cannes_sampled", None)
+        if keep is None:
+            keep = random.random() < self.rate
+            record._cannes_sampled = keep
+            if not keep:
+                self.dropped += 1
+        return keep
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchWriter(threading.Thread):
+    """Drains the log queue, writing JSON lines to a size-rotated file in batches."""
+
+    def __init__(self, log_queue, path, max_bytes, backup_count, batch_size, flush_interval, console):
+        super().__init__(name="cannes-log-writer", daemon=True)
+        self.queue = log_queue
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.console = console
+        self.json_formatter = JsonFormatter()
+        self.text_formatter = logging.Formatter(TEXT_FORMAT)
+        self.stream = open(path, "a", encoding="utf-8") if path else None
+        self.written = 0
+        self.batches = 0
+        self._stopping = threading.Event()
+
+    def run(self):
+        while not (self._stopping.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, records):
+        if self.stream is not None:
+            payload = "".join(self.json_formatter.format(record) + "\n" for record in records)
+            if self.max_bytes and self.stream.tell() + len(payload) > self.max_bytes:
+                self._rotate()
+            self.stream.write(payload)
+            self.stream.flush()
+        if self.console:
+            sys.stderr.write("".join(self.text_formatter.format(record) + "\n" for record in records))
+        self.written += len(records)
+        self.batches += 1
+
+    def _rotate(self):
+        self.stream.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stream = open(self.path, "a", encoding="utf-8")
+
+    def stop(self):
+        self._stopping.set()
+        self.join(timeout=max(5.0, self.flush_interval * 2))
+        if self.stream is not None:
+            self.stream.close()
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    return default if value in (None, "") else cast(value)
+
+
+def configure(mode=None):
+    """Configure root logging once per process and return the active settings.
+
+    Later calls, such as every Streamlit rerun, are no-ops.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured is not None:
+            return _configured
+
+        mode = mode or _env("CANNES_LOG_MODE", "sync")
+        if mode not in ("sync", "async"):
+            raise ValueError(f"Unknown log mode: {mode!r}")
+        path = _env("CANNES_LOG_FILE", "app.log")
+        console = _env("CANNES_LOG_CONSOLE", "1") not in ("0", "false", "no")
+        sampler = SamplingFilter(_env("CANNES_LOG_SAMPLE_RATE", 1.0, float))
+
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        settings = {"mode": mode, "file": path, "sampler": sampler}
+        if mode == "sync":
+            handlers = [logging.FileHandler(path)] if path else []
+            if console:
+                handlers.append(logging.StreamHandler())
+            for handler in handlers:
+                handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+                handler.addFilter(sampler)
+                root.addHandler(handler)
+        else:
+            log_queue = queue.Queue(_env("CANNES_LOG_QUEUE_SIZE", 10000, int))
+            writer = BatchWriter(
+                log_queue,
+                path,
+                max_bytes=_env("CANNES_LOG_MAX_BYTES", 10 * 1024 * 1024, int),
+                backup_count=_env("CANNES_LOG_BACKUPS", 5, int),
+                batch_size=_env("CANNES_LOG_BATCH_SIZE", 256, int),
+                flush_interval=_env("CANNES_LOG_FLUSH_INTERVAL", 1.0, float),
+                console=console,
+            )
+            handler = NonBlockingQueueHandler(log_queue)
+            handler.addFilter(sampler)
+            root.addHandler(handler)
+            writer.start()
+            atexit.register(writer.stop)
+            settings.update(handler=handler, writer=writer)
+
+        _configured = settings
+        return settings
+
+
+def metric_gauges():
+    """Logging pipeline counters for ``metrics.register_collector``."""
+    return {f"cannes_log_{name}": value for name, value in stats().items() if name != "mode"}
+
+
+def stats():
+    """Counters of the active logging pipeline (empty until ``configure`` runs)."""
+    if _configured is None:
+        return {}
+    result = {"mode": _configured["mode"], "sampled_out": _configured["sampler"].dropped}
+    if _configured["mode"] == "async":
+        result.update(
+            queued=_configured["handler"].queue.qsize(),
+            dropped=_configured["handler"].dropped,
+            written=_configured["writer"].written,
+            batches=_configured["writer"].batches,
+        )
+    return result
@@ -0,0 +1,215 @@
+"""Process-wide latency histograms and counters in Prometheus text format.
+
+Latencies are kept as summaries: a count, a running sum and a bounded
+window of recent samples from which p50/p95/p99 are computed at scrape time.
+Gauges that live elsewhere (cache stats, figure counts, RSS) are pulled in
+by collector callbacks registered with ``register_collector``.
+
+Set ``CANNES_METRICS_PORT`` to serve ``/metrics`` on localhost from a
+background thread (see ``start_http_server``). The same server answers
+``/ready`` with 200 once every check registered with ``register_readiness``
+reports ready, and 503 before that.
+"""
+import collections
+import contextlib
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("cannes_calculator")
+
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 2048
+
+METRICS_PATH = "/metrics"
+READY_PATH = "/ready"
+
+_lock = threading.Lock()
+_summaries = {}
+_counters = {}
+_help = {}
+_collectors = []
+_readiness = []
+_server = None
+_server_started = False
+
+_help.update({
+    "cannes_phase_seconds": "Time spent in each section of a page rerun.",
+    "cannes_rerun_seconds": "Total time of a page rerun.",
+    "cannes_chart_render_seconds": "Time to draw a chart with matplotlib (cache misses only).",
+    "cannes_calculations_total": "Win-probability calculations shown.",
+    "cannes_service_request_seconds": "Scoring service request latency by route.",
+})
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _quantile(sorted_samples, q):
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+def describe(name, text):
+    _help[name] = text
+
+
+def observe(name, seconds, **labels):
+    """Record one latency sample for the summary ``name``."""
+    with _lock:
+        summary = _summaries.setdefault(name, {}).get(_key(labels))
+        if summary is None:
+            summary = _summaries[name][_key(labels)] = {
+                "count": 0, "sum": 0.0, "window": collections.deque(maxlen=WINDOW),
+            }
+        summary["count"] += 1
+        summary["sum"] += seconds
+        summary["window"].append(seconds)
+
+
+def increment(name, amount=1, **labels):
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[_key(labels)] = series.get(_key(labels), 0) + amount
+
+
+@contextlib.contextmanager
+def timer(name, **labels):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start_time, **labels)
+
+
+def register_collector(collect):
+    """Add a callable returning ``{metric name: value}`` gauges, read at scrape time."""
+    with _lock:
+        if collect not in _collectors:
+            _collectors.append(collect)
+
+
+def register_readiness(check):
+    """Add a callable returning a dict with a ``ready`` flag, for ``/ready``."""
+    with _lock:
+        if check not in _readiness:
+            _readiness.append(check)
+
+
+def readiness():
+    """(ready, the reports of every readiness check)."""
+    with _lock:
+        checks = list(_readiness)
+    reports = [check() for check in checks]
+    return all(report["ready"] for report in reports), reports
+
+
+def quantiles(name, **labels):
+    """Current {quantile: seconds} of a summary, or None if it has no samples."""
+    with _lock:
+        summary = _summaries.get(name, {}).get(_key(labels))
+        samples = sorted(summary["window"]) if summary else []
+    if not samples:
+        return None
+    return {q: _quantile(samples, q) for q in QUANTILES}
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        summaries = {
+            name: {key: (s["count"], s["sum"], sorted(s["window"])) for key, s in series.items()}
+            for name, series in _summaries.items()
+        }
+        counters = {name: dict(series) for name, series in _counters.items()}
+        collectors = list(_collectors)
+
+    lines = []
+    for name in sorted(summaries):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} summary")
+        for key, (count, total, samples) in sorted(summaries[name].items()):
+            for q in QUANTILES:
+                lines.append(f"{name}{_labels(key, [('quantile', q)])} {_quantile(samples, q):.6g}")
+            lines.append(f"{name}_sum{_labels(key)} {total:.6g}")
+            lines.append(f"{name}_count{_labels(key)} {count}")
+    for name in sorted(counters):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{name}{_labels(key)} {value}")
+
+    gauges = {}
+    for collect in collectors:
+        gauges.update(collect())
+    for name in sorted(gauges):
+        if gauges[name] is None:
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {gauges[name]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _summaries.clear()
+        _counters.clear()
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == METRICS_PATH:
+            self._send(200, "text/plain; version=0.0.4", render().encode("utf-8"))
+        elif path == READY_PATH:
+            ready, reports = readiness()
+            body = json.dumps({"ready": ready, "checks": reports}).encode("utf-8")
+            self._send(200 if ready else 503, "application/json", body)
+        else:
+            self.send_error(404)
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=None, host="127.0.0.1"):
+    """Serve ``/metrics`` and ``/ready`` from a daemon thread; safe to call on every rerun.
+
+    Without an explicit ``port`` this only starts when ``CANNES_METRICS_PORT``
+    is set. Returns the server, or None if it is disabled.
+    """
+    global _server, _server_started
+    with _lock:
+        if _server_started:
+            return _server
+        _server_started = True
+        if port is None:
+            port = os.environ.get("CANNES_METRICS_PORT")
+            if not port:
+                return None
+        try:
+            _server = http.server.ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+            return None
+    threading.Thread(target=_server.serve_forever, name="cannes-metrics", daemon=True).start()
+    return _server
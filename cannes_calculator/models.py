@@ -0,0 +1,319 @@
+"""Versioned model files: the factor tables and constants of the formula.
+
+The tables the calculator has always used ship as ``baseline_model.json``.
+Other versions are ``v<N>.json`` files in ``data/models`` (or
+``CANNES_MODEL_DIR``), written by ``calibration`` or by hand. The newest one
+is the active model, unless ``CANNES_MODEL`` names a file or ``baseline``.
+
+A file is read, validated and turned into a ``Model`` once, and cached by
+path and modification time. Models are never modified afterwards. A model must give a multiplier for
+exactly the options the baseline offers, because those are the form's
+options. ``Watcher`` polls the active file from a background thread and
+hands each new valid model to a callback. ``scoring.use`` then swaps it in
+with a single assignment. A file that fails validation is logged and
+skipped, and the current model stays in use. To edit a version safely,
+write it under another name and rename it into place.
+
+Usage:
+    python -m cannes_calculator.models list
+    python -m cannes_calculator.models validate data/models/v0003.json
+    python -m cannes_calculator.models compare baseline 3 [--profiles entries.csv | --random 100000]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+from cannes_calculator import files
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_model.json")
+MODEL_DIR = os.environ.get(
+    "CANNES_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models"),
+)
+
+# Seconds between checks of the active model file
+POLL_SECONDS = float(os.environ.get("CANNES_MODEL_POLL", "2"))
+
+# Categorical inputs in the order their factors are applied
+CATEGORICAL_FIELDS = (
+    "category", "country", "agency_size", "budget_level", "brand_prominence", "campaign_results",
+    "creative_approach",
+)
+CONSTANTS = ("base_probability", "previous_win_step", "experience_step", "experience_cap", "probability_cap")
+
+# Quantiles of the score differences reported by ``compare``
+DIFFERENCE_QUANTILES = (0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0)
+
+logger = logging.getLogger("cannes_calculator.models")
+
+_VERSION_FILE = re.compile(r"^v(\d+)\.json$")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _positive(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < float("inf"):
+        raise ValueError(f"{name} must be a positive number, got {value!r}")
+    return value
+
+
+class Model:
+    """Validated factor tables and constants of one model version."""
+
+    def __init__(self, document, path=None, reference=None):
+        if not isinstance(document, dict):
+            raise ValueError("A model must be a JSON object")
+        factors = document.get("factors")
+        if not isinstance(factors, dict) or set(factors) != set(CATEGORICAL_FIELDS):
+            raise ValueError(f"factors must cover exactly {', '.join(CATEGORICAL_FIELDS)}")
+        self.factors = {}
+        for field in CATEGORICAL_FIELDS:
+            table = factors[field]
+            options = list(reference.factors[field]) if reference is not None else list(table)
+            if not isinstance(table, dict) or set(table) != set(options) or not options:
+                raise ValueError(f"{field} options don't match the form")
+            self.factors[field] = {
+                option: float(_positive(f"{field} factor for {option!r}", table[option])) for option in options
+            }
+        missing = [name for name in CONSTANTS if name not in document]
+        if missing:
+            raise ValueError(f"Missing {', '.join(missing)}")
+        for name in CONSTANTS:
+            _positive(name, document[name])
+        if not isinstance(document["experience_cap"], int) or document["probability_cap"] > 1:
+            raise ValueError("experience_cap must be whole years and probability_cap at most 1")
+
+        self.base_probability = float(document["base_probability"])
+        self.previous_win_step = float(document["previous_win_step"])
+        self.experience_step = float(document["experience_step"])
+        self.experience_cap = document["experience_cap"]
+        self.probability_cap = float(document["probability_cap"])
+        self.arrays = {field: np.array(list(table.values()), dtype=np.float64) for field, table in self.factors.items()}
+        for array in self.arrays.values():
+            array.flags.writeable = False
+        self.version = document.get("version")
+        self.path = path
+        self.meta = {key: value for key, value in document.items() if key not in CONSTANTS and key != "factors"}
+        self.fingerprint = hashlib.sha256(json.dumps({
+            "factors": self.factors,
+            "constants": [self.base_probability, self.previous_win_step, self.experience_step,
+                          self.experience_cap, self.probability_cap],
+        }, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def label(self):
+        return f"v{self.version}" if isinstance(self.version, int) else str(self.version)
+
+    def table(self):
+        """Factor tables and constants as a JSON-ready mapping."""
+        table = {name: getattr(self, name) for name in CONSTANTS}
+        table["factors"] = {field: dict(factors) for field, factors in self.factors.items()}
+        return table
+
+
+def _read_model(path, reference):
+    with open(path, encoding="utf-8") as f:
+        try:
+            document = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}") from None
+    try:
+        return Model(document, path, reference)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+BASELINE = _read_model(BASELINE_PATH, None)
+
+
+def read(path):
+    """The validated model in ``path``, parsed once per modification of the file."""
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    with _cache_lock:
+        model = _cache.get(key)
+    if model is None:
+        model = _read_model(path, BASELINE)
+        with _cache_lock:
+            _cache[key] = model
+    return model
+
+
+def versions(directory=MODEL_DIR):
+    """``{version: path}`` of the model files in ``directory``, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return {}
+    matches = [(_VERSION_FILE.match(name), name) for name in names]
+    return dict(sorted((int(match.group(1)), os.path.join(directory, name)) for match, name in matches if match))
+
+
+def save(table, directory=MODEL_DIR, **meta):
+    """Validate ``table`` and write it as the next version in ``directory``; returns its path."""
+    Model(table, reference=BASELINE)
+    os.makedirs(directory, exist_ok=True)
+    version = max(versions(directory), default=0) + 1
+    path = os.path.join(directory, f"v{version:04d}.json")
+    document = dict(table, version=version, created_at=time.strftime("%Y-%m-%dT%H:%M:%S"), **meta)
+    with files.atomic_write(path) as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def active_path(directory=MODEL_DIR):
+    """File of the active model: ``CANNES_MODEL`` or the newest version, else the baseline."""
+    pinned = os.environ.get("CANNES_MODEL")
+    if pinned:
+        return BASELINE_PATH if pinned == "baseline" else pinned
+    found = versions(directory)
+    return found[max(found)] if found else BASELINE_PATH
+
+
+def load_active(directory=MODEL_DIR):
+    path = active_path(directory)
+    return BASELINE if path == BASELINE_PATH else read(path)
+
+
+def resolve(reference, directory=MODEL_DIR):
+    """Model for ``baseline``, ``active``, a version number or a file path."""
+    if reference == "baseline":
+        return BASELINE
+    if reference == "active":
+        return load_active(directory)
+    if reference.lstrip("v").isdigit():
+        found = versions(directory)
+        version = int(reference.lstrip("v"))
+        if version not in found:
+            raise ValueError(f"No model version {version} in {directory}")
+        return read(found[version])
+    return read(reference)
+
+
+class Watcher:
+    """Polls the active model file and calls ``on_change(model)`` when a new valid one appears."""
+
+    def __init__(self, on_change, directory=MODEL_DIR, interval=POLL_SECONDS):
+        self.on_change = on_change
+        self.directory = directory
+        self.interval = interval
+        self.model = None
+        self._signature = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def check(self):
+        """Look for a change once; returns the new model or None."""
+        path = active_path(self.directory)
+        try:
+            signature = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            signature = (path, None)
+        if signature == self._signature:
+            return None
+        # Remember even a broken file so it is reported once, not on every poll
+        self._signature = signature
+        try:
+            model = BASELINE if path == BASELINE_PATH else read(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Keeping model {self.model.label if self.model else 'baseline'}: {e}")
+            return None
+        if self.model is not None and model.fingerprint == self.model.fingerprint:
+            return None
+        self.model = model
+        self.on_change(model)
+        return model
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model watcher: {e}")
+
+    def start(self):
+        """Load the active model now, then keep polling from a daemon thread."""
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+
+def compare(scores_a, scores_b):
+    """Distribution of ``scores_b - scores_a`` for one batch of profiles."""
+    difference = scores_b - scores_a
+    relative = np.divide(difference, scores_a, out=np.zeros_like(difference), where=scores_a > 0)
+    ranks_a = np.argsort(np.argsort(scores_a, kind="stable"), kind="stable")
+    ranks_b = np.argsort(np.argsort(scores_b, kind="stable"), kind="stable")
+    return {
+        "profiles": len(difference),
+        "mean_a": float(scores_a.mean()),
+        "mean_b": float(scores_b.mean()),
+        "mean_difference": float(difference.mean()),
+        "mean_absolute_difference": float(np.abs(difference).mean()),
+        "changed": float(np.mean(np.abs(difference) > 1e-12)),
+        "increased": float(np.mean(difference > 1e-12)),
+        "decreased": float(np.mean(difference < -1e-12)),
+        "quantiles": dict(zip(DIFFERENCE_QUANTILES, np.quantile(difference, DIFFERENCE_QUANTILES).tolist())),
+        "relative_quantiles": dict(zip(DIFFERENCE_QUANTILES, np.quantile(relative, DIFFERENCE_QUANTILES).tolist())),
+        "rank_correlation": float(np.corrcoef(ranks_a, ranks_b)[0, 1]) if len(difference) > 1 else 1.0,
+    }
+
+
+def main(argv=None):
+    from cannes_calculator import bench, bulk, scoring
+
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.models",
+        description="List, validate and compare model versions.",
+    )
+    parser.add_argument("--dir", default=MODEL_DIR, help="directory of versioned model files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show the model versions")
+    validate_parser = commands.add_parser("validate", help="check a model file")
+    validate_parser.add_argument("path")
+    compare_parser = commands.add_parser("compare", help="score a batch under two models")
+    compare_parser.add_argument("a", help="baseline, active, a version number or a file")
+    compare_parser.add_argument("b")
+    compare_parser.add_argument("--profiles", help="CSV or Parquet file of profiles (see bulk)")
+    compare_parser.add_argument("--random", type=int, default=100_000, help="random profiles when no file is given")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "list":
+            active = active_path(args.dir)
+            for path in [BASELINE_PATH] + list(versions(args.dir).values()):
+                model = BASELINE if path == BASELINE_PATH else read(path)
+                created = model.meta.get("created_at", "")
+                print(f"{model.label:10}{' *' if path == active else '  '} {created:19}  {model.fingerprint}  {path}")
+        elif args.command == "validate":
+            model = read(args.path)
+            print(f"{args.path}: valid, fingerprint {model.fingerprint}")
+        else:
+            a, b = resolve(args.a, args.dir), resolve(args.b, args.dir)
+            chunks = bulk.read_chunks(args.profiles) if args.profiles else [bench.random_profiles(args.random)]
+            scores_a, scores_b = [], []
+            for columns in chunks:
+                encoded = scoring.encode_profiles(columns)
+                scores_a.append(scoring.score_codes(encoded, a))
+                scores_b.append(scoring.score_codes(encoded, b))
+            report = compare(np.concatenate(scores_a), np.concatenate(scores_b))
+            print(json.dumps(dict(report, a=a.label, b=b.label), indent=2))
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Import and per-rerun phase timings for the calculator page.
+
+Heavy modules are imported through ``timed_import`` the first time a section
+needs them, which records how long each import took in this process. Each
+Streamlit rerun runs in its own thread, so phase timings are kept per thread:
+``start_run`` opens a timeline, ``mark`` closes the phase that just ended and
+``finish_run`` returns the total and the per-phase breakdown. Every phase
+and rerun duration is also recorded in the process-wide ``metrics``.
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from cannes_calculator import metrics
+
+logger = logging.getLogger("cannes_calculator")
+
+# Seconds spent on the first import of each module, in import order
+import_timings = {}
+
+_local = threading.local()
+_startup_reported = False
+_startup_lock = threading.Lock()
+
+
+def timed_import(name):
+    """Import ``name``, recording the cost of the first import in this process."""
+    # A module can be in sys.modules while another session's thread is still
+    # executing it; import_module waits for that import to finish
+    if name in sys.modules:
+        return importlib.import_module(name)
+    start_time = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - start_time
+    if import_timings.setdefault(name, elapsed) is elapsed:
+        logger.info(f"Imported {name} in {elapsed * 1000:.0f}ms")
+    return module
+
+
+def start_run():
+    _local.start = _local.last = time.perf_counter()
+    _local.phases = {}
+
+
+def mark(name):
+    """Attribute the time since the previous mark (or ``start_run``) to ``name``."""
+    if not hasattr(_local, "last"):
+        start_run()
+    now = time.perf_counter()
+    _local.phases[name] = _local.phases.get(name, 0.0) + (now - _local.last)
+    metrics.observe("cannes_phase_seconds", now - _local.last, phase=name)
+    _local.last = now
+
+
+def finish_run():
+    """Return (total seconds, {phase: seconds}) for the current rerun."""
+    if not hasattr(_local, "start"):
+        return 0.0, {}
+    total = time.perf_counter() - _local.start
+    metrics.observe("cannes_rerun_seconds", total)
+    return total, dict(_local.phases)
+
+
+def format_timings(timings):
+    return ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.items())
+
+
+def process_uptime():
+    """Seconds since this process started, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            # The process name may contain spaces; fields resume after the last ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            system_uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return system_uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+
+def startup_report():
+    """One-line cold-start summary, returned only for the first rerun in the process."""
+    global _startup_reported
+    with _startup_lock:
+        if _startup_reported:
+            return None
+        _startup_reported = True
+    uptime = process_uptime()
+    since_start = f"{uptime:.2f}s after process start" if uptime is not None else "ready"
+    imports = format_timings(import_timings) or "none"
+    return f"First page {since_start}; deferred imports: {imports}"
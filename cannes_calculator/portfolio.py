@@ -0,0 +1,203 @@
+"""Entry-portfolio planner: which pieces of work to enter in which categories.
+
+Each pair of a candidate piece of work and a category it may be entered in
+is one possible entry. Its value is the model's win probability and its
+cost is that category's entry fee. The set of entries with the most
+expected Lions within the fee budget is a 0/1 knapsack problem. It is
+solved exactly by dynamic programming over the budget, measured in units
+of the greatest common divisor of the fees. Each entry updates the whole
+table in one vectorized step.
+
+If the budget spans more than ``MAX_CAPACITY`` units, the unit is made
+coarser and fees are rounded up to it. The plan then never exceeds the
+budget, but may leave a little of it unused.
+
+Candidate CSV columns: ``name``, the profile fields except ``category``,
+and an optional ``categories`` column listing eligible categories separated
+by ``;`` (empty means all of them).
+
+Usage:
+    python -m cannes_calculator.portfolio candidates.csv --budget 25000 --fee 1500
+    python -m cannes_calculator.portfolio candidates.csv --budget 25000 --fees fees.csv -o plan.json
+"""
+import argparse
+import csv
+import functools
+import json
+import math
+import sys
+
+import numpy as np
+
+from cannes_calculator import models, scoring
+
+# Placeholder fee per entry, used where no category fee is given
+DEFAULT_FEE = 1500
+
+MAX_CAPACITY = 20_000
+
+WORK_FIELDS = tuple(field for field in scoring.FIELDS if field != "category")
+
+
+def _eligible(work):
+    categories = work.get("categories") or scoring.options("category")
+    if isinstance(categories, str):
+        categories = [category.strip() for category in categories.split(";") if category.strip()]
+    unknown = [category for category in categories if category not in scoring.CATEGORY_FACTORS]
+    if unknown:
+        raise ValueError(f"{work.get('name', 'Candidate')}: unknown category {unknown[0]!r}")
+    return categories
+
+
+def candidate_entries(works, fees):
+    """Every (work, category) entry with its fee and win probability.
+
+    Returns ``(names, categories, fees, probabilities)`` as parallel arrays,
+    scored in one batch.
+    """
+    names, categories, rows = [], [], []
+    for index, work in enumerate(works):
+        missing = [field for field in WORK_FIELDS if field not in work]
+        if missing:
+            raise ValueError(f"Candidate {index + 1} is missing {', '.join(missing)}")
+        for category in _eligible(work):
+            names.append(str(work.get("name") or f"Work {index + 1}"))
+            categories.append(category)
+            rows.append(work)
+    columns = {field: [row[field] for row in rows] for field in WORK_FIELDS}
+    columns["category"] = categories
+    probabilities = scoring.score_batch(columns) if rows else np.zeros(0)
+    entry_fees = np.array([fees.get(category, DEFAULT_FEE) for category in categories], dtype=np.float64)
+    if (entry_fees < 0).any():
+        raise ValueError("Entry fees can't be negative")
+    return names, categories, entry_fees, probabilities
+
+
+def knapsack(values, weights, capacity):
+    """Indices of the items with the largest total value whose integer weights fit ``capacity``."""
+    best = np.zeros(capacity + 1)
+    # One packed row of "item taken at this capacity" bits per item, for backtracking
+    taken = []
+    for value, weight in zip(values, weights):
+        if weight > capacity or value <= 0:
+            taken.append(None)
+            continue
+        if weight == 0:
+            best += value
+            taken.append(True)
+            continue
+        with_item = best[:-weight] + value
+        take = with_item > best[weight:]
+        best[weight:] = np.where(take, with_item, best[weight:])
+        taken.append(np.packbits(np.concatenate([np.zeros(weight, dtype=bool), take])))
+
+    chosen = []
+    remaining = capacity
+    for index in range(len(taken) - 1, -1, -1):
+        row = taken[index]
+        if row is None:
+            continue
+        if row is True or np.unpackbits(row, count=capacity + 1)[remaining]:
+            chosen.append(index)
+            remaining -= int(weights[index])
+    return chosen[::-1]
+
+
+def fee_unit(fees, budget):
+    """Budget unit for the DP: the GCD of the fees, coarsened to at most ``MAX_CAPACITY`` units."""
+    integer_fees = [math.ceil(fee) for fee in fees if fee > 0]
+    unit = functools.reduce(math.gcd, integer_fees, 0) or 1
+    return max(unit, math.ceil(budget / MAX_CAPACITY))
+
+
+def plan(works, fees, budget):
+    """Entries maximizing expected Lions within ``budget``.
+
+    ``works`` are candidate dicts, ``fees`` maps category -> entry fee
+    (``DEFAULT_FEE`` where missing).
+    """
+    if budget < 0:
+        raise ValueError("Budget can't be negative")
+    names, categories, entry_fees, probabilities = candidate_entries(works, fees)
+    unit = fee_unit(entry_fees, budget)
+    weights = np.ceil(np.ceil(entry_fees) / unit).astype(np.int64)
+    chosen = knapsack(probabilities, weights, int(budget // unit))
+    entries = [
+        {"name": names[i], "category": categories[i], "fee": float(entry_fees[i]), "probability": float(probabilities[i])}
+        for i in chosen
+    ]
+    entries.sort(key=lambda entry: -entry["probability"])
+    return {
+        "budget": budget,
+        "total_fee": sum(entry["fee"] for entry in entries),
+        "expected_lions": sum(entry["probability"] for entry in entries),
+        "candidates": len(works),
+        "options": len(names),
+        "entries": entries,
+    }
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def read_candidates(path):
+    works = _read_csv(path)
+    for work in works:
+        for field in scoring.NUMERIC_FIELDS:
+            try:
+                work[field] = int(work[field])
+            except (KeyError, ValueError):
+                raise ValueError(f"{work.get('name', 'Candidate')}: {field} must be a whole number") from None
+    return works
+
+
+def read_fees(path):
+    """Category fees from a CSV with ``category`` and ``fee`` columns."""
+    try:
+        return {row["category"]: float(row["fee"]) for row in _read_csv(path)}
+    except (KeyError, ValueError):
+        raise ValueError(f"{path} needs 'category' and numeric 'fee' columns") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.portfolio",
+        description="Choose entries that maximize expected Lions within an entry-fee budget.",
+    )
+    parser.add_argument("candidates", help="CSV of candidate pieces of work")
+    parser.add_argument("--budget", type=float, required=True, help="total entry-fee budget")
+    parser.add_argument("--fees", help="CSV of category,fee (categories not listed use --fee)")
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE, help="fee for categories without their own")
+    parser.add_argument("-o", "--output", help="write the plan as JSON here")
+    args = parser.parse_args(argv)
+    try:
+        # Score with the model the app is using
+        model = scoring.use(models.load_active())
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    try:
+        fees = {category: args.fee for category in scoring.options("category")}
+        if args.fees:
+            fees.update(read_fees(args.fees))
+        result = plan(read_candidates(args.candidates), fees, args.budget)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    for entry in result["entries"]:
+        print(f"{entry['name']:30} {entry['category']:24} {entry['fee']:>10,.0f} {entry['probability']:>8.1%}")
+    print(
+        f"{len(result['entries'])} entries, {result['total_fee']:,.0f} of {result['budget']:,.0f} spent, "
+        f"{result['expected_lions']:.2f} expected Lions (model {model.label})",
+        file=sys.stderr,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
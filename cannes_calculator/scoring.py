@@ -0,0 +1,258 @@
+"""Win-probability model behind the "Calculate Win Probability" button.
+
+The factor tables and constants come from a model file (see ``models``):
+the shipped baseline, or the version made active with ``use``. ``score`` is
+the scalar path for a single profile; ``score_batch`` integer-encodes the
+categorical inputs and scores any number of profiles at once with NumPy
+gathers, performing the same multiplications in the same order so both
+paths return identical numbers.
+
+``use`` swaps the whole model with one assignment, and every scoring
+function reads the model once per call. A reload therefore never mixes two
+versions within one result. The module-level tables and constants below
+are rebound together with it, for code that reads them directly.
+"""
+import numpy as np
+
+from cannes_calculator import models
+
+_model = models.BASELINE
+
+CATEGORY_FACTORS = _model.factors["category"]
+COUNTRY_FACTORS = _model.factors["country"]
+AGENCY_SIZE_FACTORS = _model.factors["agency_size"]
+BUDGET_LEVEL_FACTORS = _model.factors["budget_level"]
+BRAND_PROMINENCE_FACTORS = _model.factors["brand_prominence"]
+CAMPAIGN_RESULTS_FACTORS = _model.factors["campaign_results"]
+CREATIVE_APPROACH_FACTORS = _model.factors["creative_approach"]
+
+# Baseline: 3% base chance, +5% per previous win, +2% per year submitting
+# (counting up to 10 years) and a maximum of 75%
+BASE_PROBABILITY = _model.base_probability
+PREVIOUS_WIN_STEP = _model.previous_win_step
+EXPERIENCE_STEP = _model.experience_step
+EXPERIENCE_CAP = _model.experience_cap
+PROBABILITY_CAP = _model.probability_cap
+
+# Limits of the numeric form inputs
+PREVIOUS_WINS_RANGE = (0, 50)
+YEARS_EXPERIENCE_RANGE = (0, 30)
+
+# Categorical inputs in the order their factors are applied
+CATEGORICAL_FACTORS = _model.factors
+NUMERIC_FIELDS = ("previous_wins", "years_experience")
+
+# Profile fields in the order of the calculator form
+FIELDS = (
+    "category", "country", "agency_size", "previous_wins", "years_experience",
+    "budget_level", "brand_prominence", "campaign_results", "creative_approach",
+)
+
+# Integer code of each option; options are the same in every model
+_OPTION_CODES = {
+    field: {option: code for code, option in enumerate(table)}
+    for field, table in models.BASELINE.factors.items()
+}
+
+
+def current():
+    """The model in use."""
+    return _model
+
+
+def use(model):
+    """Make ``model`` (a ``models.Model``) the one every later call scores with."""
+    global _model, CATEGORICAL_FACTORS, CATEGORY_FACTORS, COUNTRY_FACTORS, AGENCY_SIZE_FACTORS
+    global BUDGET_LEVEL_FACTORS, BRAND_PROMINENCE_FACTORS, CAMPAIGN_RESULTS_FACTORS, CREATIVE_APPROACH_FACTORS
+    global BASE_PROBABILITY, PREVIOUS_WIN_STEP, EXPERIENCE_STEP, EXPERIENCE_CAP, PROBABILITY_CAP
+    _model = model
+    CATEGORICAL_FACTORS = model.factors
+    CATEGORY_FACTORS = model.factors["category"]
+    COUNTRY_FACTORS = model.factors["country"]
+    AGENCY_SIZE_FACTORS = model.factors["agency_size"]
+    BUDGET_LEVEL_FACTORS = model.factors["budget_level"]
+    BRAND_PROMINENCE_FACTORS = model.factors["brand_prominence"]
+    CAMPAIGN_RESULTS_FACTORS = model.factors["campaign_results"]
+    CREATIVE_APPROACH_FACTORS = model.factors["creative_approach"]
+    BASE_PROBABILITY = model.base_probability
+    PREVIOUS_WIN_STEP = model.previous_win_step
+    EXPERIENCE_STEP = model.experience_step
+    EXPERIENCE_CAP = model.experience_cap
+    PROBABILITY_CAP = model.probability_cap
+    return model
+
+
+def fingerprint():
+    """Stable hash of the model in use, used to tag derived artifacts."""
+    return _model.fingerprint
+
+
+def options(field):
+    """Return the selectable options of a categorical field in form order."""
+    return list(_OPTION_CODES[field])
+
+
+def previous_wins_multiplier(previous_wins, model=None):
+    model = model or _model
+    return 1 + (previous_wins * model.previous_win_step)
+
+
+def experience_multiplier(years_experience, model=None):
+    model = model or _model
+    return 1 + (min(years_experience, model.experience_cap) * model.experience_step)
+
+
+def score(category, country, agency_size, previous_wins, years_experience,
+          budget_level, brand_prominence, campaign_results, creative_approach, model=None):
+    """Scalar win probability for one profile, exactly as the form computes it."""
+    model = model or _model
+    factors = model.factors
+    probability = model.base_probability
+    probability *= factors["category"][category]
+    probability *= factors["country"][country]
+    probability *= factors["agency_size"][agency_size]
+    probability *= factors["budget_level"][budget_level]
+    probability *= factors["brand_prominence"][brand_prominence]
+    probability *= factors["campaign_results"][campaign_results]
+    probability *= factors["creative_approach"][creative_approach]
+
+    # Adjust for previous wins
+    if previous_wins > 0:
+        probability *= previous_wins_multiplier(previous_wins, model)
+
+    # Adjust for experience
+    if years_experience > 1:
+        probability *= experience_multiplier(years_experience, model)
+
+    return min(probability, model.probability_cap)
+
+
+def check_profile(profile):
+    """Validate a single profile mapping; raises ``ValueError`` describing the first problem."""
+    for field in FIELDS:
+        if field not in profile:
+            raise ValueError(f"Missing profile field: {field}")
+    for field, codes in _OPTION_CODES.items():
+        if not isinstance(profile[field], str) or profile[field] not in codes:
+            raise ValueError(f"Unknown {field} option: {profile[field]!r}")
+    for field, (low, high) in (("previous_wins", PREVIOUS_WINS_RANGE), ("years_experience", YEARS_EXPERIENCE_RANGE)):
+        value = profile[field]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{field} must be whole numbers")
+        if not low <= value <= high:
+            raise ValueError(f"{field} must be between {low} and {high}")
+    return profile
+
+
+def encode(field, values):
+    """Integer-encode a column of categorical options.
+
+    Raises ``ValueError`` naming the field for options the form does not offer.
+    """
+    codes = _OPTION_CODES[field]
+    try:
+        return np.fromiter((codes[value] for value in values), dtype=np.intp)
+    except KeyError as e:
+        raise ValueError(f"Unknown {field} option: {e.args[0]!r}") from None
+
+
+def _numeric(field, values, limits):
+    # Booleans and strings would convert silently; ``check_profile`` rejects them too
+    types = set(map(type, values)) if not isinstance(values, np.ndarray) else ()
+    if any(issubclass(kind, (bool, np.bool_, str, bytes)) for kind in types):
+        raise ValueError(f"{field} must be whole numbers")
+    array = np.asarray(values)
+    if array.dtype.kind in "bUSO":
+        raise ValueError(f"{field} must be whole numbers")
+    if array.dtype.kind not in "iu":
+        try:
+            as_int = array.astype(np.int64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be whole numbers") from None
+        if not np.array_equal(as_int, array.astype(np.float64)):
+            raise ValueError(f"{field} must be whole numbers")
+        array = as_int
+    low, high = limits
+    if array.size and (array.min() < low or array.max() > high):
+        raise ValueError(f"{field} must be between {low} and {high}")
+    return array.astype(np.int64, copy=False)
+
+
+def encode_profiles(columns):
+    """Encode a mapping of field name -> column of values.
+
+    Categorical fields become integer codes into the factor tables and
+    numeric fields are validated against the form limits.
+    """
+    missing = [field for field in FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"Missing profile fields: {', '.join(missing)}")
+    encoded = {field: encode(field, columns[field]) for field in _OPTION_CODES}
+    encoded["previous_wins"] = _numeric("previous_wins", columns["previous_wins"], PREVIOUS_WINS_RANGE)
+    encoded["years_experience"] = _numeric("years_experience", columns["years_experience"], YEARS_EXPERIENCE_RANGE)
+    lengths = {len(column) for column in encoded.values()}
+    if len(lengths) > 1:
+        raise ValueError("Profile columns must all have the same length")
+    return encoded
+
+
+def score_codes(encoded, model=None):
+    """Vectorized win probability for integer-encoded profiles."""
+    model = model or _model
+    probability = np.full(len(encoded["category"]), model.base_probability)
+    for field, factors in model.arrays.items():
+        probability *= factors[encoded[field]]
+
+    previous_wins = encoded["previous_wins"]
+    probability *= np.where(previous_wins > 0, 1 + (previous_wins * model.previous_win_step), 1.0)
+
+    years_experience = encoded["years_experience"]
+    probability *= np.where(
+        years_experience > 1,
+        1 + (np.minimum(years_experience, model.experience_cap) * model.experience_step),
+        1.0,
+    )
+
+    return np.minimum(probability, model.probability_cap)
+
+
+def score_batch(columns, model=None):
+    """Score many profiles given as a mapping of field name -> column."""
+    return score_codes(encode_profiles(columns), model)
+
+
+def records_to_columns(records):
+    """Turn an iterable of profile dicts into the column mapping ``score_batch`` takes."""
+    records = list(records)
+    try:
+        return {field: [record[field] for record in records] for field in FIELDS}
+    except KeyError as e:
+        raise ValueError(f"Missing profile field: {e.args[0]}") from None
+
+
+# Rows of the "Factor Breakdown" table
+BREAKDOWN_LABELS = {
+    "category": "Category Type",
+    "country": "Country",
+    "agency_size": "Agency Size",
+    "previous_wins": "Previous Wins",
+    "years_experience": "Years Experience",
+    "budget_level": "Production Budget",
+    "brand_prominence": "Brand Prominence",
+    "campaign_results": "Campaign Results",
+    "creative_approach": "Creative Approach",
+}
+
+
+def breakdown_codes(encoded, model=None):
+    """Per-factor multipliers for integer-encoded profiles, as the breakdown table shows them."""
+    model = model or _model
+    breakdown = {}
+    for field in FIELDS:
+        if field == "previous_wins":
+            breakdown[field] = 1 + (encoded[field] * model.previous_win_step)
+        elif field == "years_experience":
+            breakdown[field] = 1 + (np.minimum(encoded[field], model.experience_cap) * model.experience_step)
+        else:
+            breakdown[field] = model.arrays[field][encoded[field]]
+    return breakdown
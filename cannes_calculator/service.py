@@ -0,0 +1,240 @@
+"""Local JSON scoring service for tools that need the win probability.
+
+A small asyncio HTTP/1.1 server built on the standard library only. It keeps
+connections alive between requests and reports the time spent on each
+request in an ``X-Response-Time-Us`` header and a ``latency_us`` field.
+
+Endpoints:
+    GET  /health       liveness check
+    GET  /metrics      latency summaries and counters in Prometheus text format
+    POST /score        one profile object -> probability and factor breakdown
+    POST /score/bulk   {"profiles": [...]} or a bare list -> probabilities
+
+Usage:
+    python -m cannes_calculator.service [--host 127.0.0.1] [--port 8502]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from cannes_calculator import cube, metrics, models, scoring
+
+logger = logging.getLogger("cannes_calculator.service")
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_TIMEOUT = 15.0
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """Routes requests to the scoring engine; the probability cube serves bulk requests when available."""
+
+    def __init__(self, probability_cube=None):
+        self.probability_cube = probability_cube
+        self.requests = 0
+        self.profiles = 0
+
+    def score_one(self, profile):
+        if not isinstance(profile, dict):
+            raise HTTPError(400, "Expected a JSON object with the profile fields")
+        try:
+            scoring.check_profile(profile)
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+        profile = {field: profile[field] for field in scoring.FIELDS}
+        # One model for the probability and the breakdown, even if a reload lands meanwhile
+        model = scoring.current()
+        probability = scoring.score(**profile, model=model)
+        breakdown = {field: table[profile[field]] for field, table in model.factors.items()}
+        breakdown["previous_wins"] = scoring.previous_wins_multiplier(profile["previous_wins"], model)
+        breakdown["years_experience"] = scoring.experience_multiplier(profile["years_experience"], model)
+        self.profiles += 1
+        return {"probability": probability, "breakdown": breakdown}
+
+    def score_bulk(self, payload):
+        profiles = payload.get("profiles") if isinstance(payload, dict) else payload
+        if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+            raise HTTPError(400, "Expected a list of profile objects")
+        # The same rules as /score, so a profile is valid in both or neither
+        for index, profile in enumerate(profiles):
+            try:
+                scoring.check_profile(profile)
+            except ValueError as e:
+                raise HTTPError(400, f"profiles[{index}]: {e}") from None
+        encoded = scoring.encode_profiles(scoring.records_to_columns(profiles))
+        if self.probability_cube is not None:
+            probabilities = self.probability_cube.lookup_codes(encoded)
+        else:
+            probabilities = scoring.score_codes(encoded)
+        self.profiles += len(profiles)
+        return {"count": len(profiles), "probabilities": probabilities.tolist()}
+
+    def dispatch(self, method, path, body):
+        routes = {
+            "/health": ("GET", lambda: {"status": "ok", "cube": self.probability_cube is not None}),
+            "/metrics": ("GET", metrics.render),
+            "/score": ("POST", lambda: self.score_one(self._json(body))),
+            "/score/bulk": ("POST", lambda: self.score_bulk(self._json(body))),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"No route for {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"{path} only accepts {allowed}")
+        return handler()
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON: {e}") from None
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    await _write_response(writer, e.status, {"error": str(e)}, 0, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+
+                start_time = time.perf_counter()
+                try:
+                    status, payload = 200, self.dispatch(method, path.split("?", 1)[0], body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception:
+                    logger.exception("Unhandled error serving %s %s", method, path)
+                    status, payload = 500, {"error": "Internal server error"}
+                latency_us = (time.perf_counter() - start_time) * 1e6
+                self.requests += 1
+                # Unknown paths share one series so scanners can't grow the label set
+                route = path.split("?", 1)[0] if status != 404 else "unmatched"
+                metrics.observe("cannes_service_request_seconds", latency_us / 1e6, route=route)
+                if isinstance(payload, dict) and path.startswith("/score"):
+                    payload["latency_us"] = round(latency_us, 1)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await _write_response(writer, status, payload, latency_us, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client closed the connection."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(400, "Too many headers")
+
+    body = b""
+    if method == "POST":
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length is required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length)
+    return method, path, headers, body
+
+
+async def _write_response(writer, status, payload, latency_us, keep_alive):
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        f"X-Response-Time-Us: {latency_us:.1f}\r\n"
+        "\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8502, probability_cube=None):
+    service = ScoringService(probability_cube)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    logger.info(f"Scoring service listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.service",
+        description="Serve the Cannes Lions win-probability model over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--cube", default=cube.DEFAULT_PATH, help="probability cube to memory-map if built")
+    parser.add_argument("--no-cube", action="store_true", help="always score with the factor tables")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        model = scoring.use(models.load_active())
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    logger.info(f"Using model {model.label} ({model.fingerprint})")
+    probability_cube = None if args.no_cube else cube.load(args.cube)
+    try:
+        asyncio.run(serve(args.host, args.port, probability_cube))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Monte Carlo uncertainty bands for the win probability.
+
+Every multiplier in the factor tables is an estimate, so instead of a single
+number this draws each factor from a log-normal distribution centred on its
+table value and pushes all samples through the formula at once as NumPy
+arrays. The base rate and the per-win and per-year steps are drawn the same
+way. Samples above the model's probability cap are clipped to it, exactly as
+the point estimate is.
+
+Draws are seeded from the profile, so the same inputs always give the same
+band. ``CANNES_MC_WORKERS`` > 1 splits large runs across a process pool that
+is started on first use and reused afterwards.
+"""
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+
+from cannes_calculator import scoring
+
+DEFAULT_SAMPLES = 200_000
+
+# Standard deviation of each multiplier on the log scale (0.15 is roughly +/-15%)
+FACTOR_SPREAD = 0.15
+BASE_SPREAD = 0.25
+
+CREDIBLE_MASS = 0.9
+HISTOGRAM_BINS = 40
+
+# Below this many samples per worker the pool costs more than it saves
+MIN_SAMPLES_PER_WORKER = 100_000
+
+WORKERS = int(os.environ.get("CANNES_MC_WORKERS", "1"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def profile_seed(profile):
+    """Stable 64-bit seed derived from the profile's field values."""
+    text = json.dumps([profile[field] for field in scoring.FIELDS], default=str)
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+def sample_probabilities(profile, count, seed, spread=FACTOR_SPREAD, base_spread=BASE_SPREAD, model=None):
+    """``count`` win probabilities with every factor drawn around its table value."""
+    model = model or scoring.current()
+    rng = np.random.default_rng(seed)
+    table_values = np.array(
+        [table[profile[field]] for field, table in model.factors.items()]
+    )
+    log_probability = np.log(model.base_probability) + rng.normal(0.0, base_spread, count)
+    log_probability += np.log(table_values) @ np.ones(len(table_values))
+    log_probability += rng.normal(0.0, spread, (len(table_values), count)).sum(axis=0)
+    probability = np.exp(log_probability)
+
+    previous_wins = profile["previous_wins"]
+    if previous_wins > 0:
+        step = model.previous_win_step * np.exp(rng.normal(0.0, spread, count))
+        probability *= 1 + previous_wins * step
+
+    years_experience = profile["years_experience"]
+    if years_experience > 1:
+        step = model.experience_step * np.exp(rng.normal(0.0, spread, count))
+        probability *= 1 + min(years_experience, model.experience_cap) * step
+
+    return np.minimum(probability, model.probability_cap)
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the app process runs a thread per session
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def simulate(profile, count=DEFAULT_SAMPLES, workers=None, seed=None, model=None):
+    """All sampled probabilities for ``profile``, from this process or the pool."""
+    model = model or scoring.current()
+    check = {field: profile[field] for field in scoring.FIELDS}
+    scoring.check_profile(check)
+    seed = profile_seed(check) if seed is None else seed
+    workers = min(WORKERS if workers is None else workers, max(1, count // MIN_SAMPLES_PER_WORKER))
+    if workers <= 1:
+        return sample_probabilities(check, count, seed, model=model)
+
+    chunks = [count // workers + (index < count % workers) for index in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    pool = _get_pool(workers)
+    parts = pool.map(
+        sample_probabilities, [check] * workers, chunks, seeds,
+        [FACTOR_SPREAD] * workers, [BASE_SPREAD] * workers, [model] * workers,
+    )
+    return np.concatenate(list(parts))
+
+
+def summarize(samples, mass=CREDIBLE_MASS, bins=HISTOGRAM_BINS, model=None):
+    """Mean, median, central credible interval and histogram of sampled probabilities."""
+    model = model or scoring.current()
+    tail = (1 - mass) / 2
+    low, median, high = np.quantile(samples, [tail, 0.5, 1 - tail])
+    counts, edges = np.histogram(samples, bins=bins, range=(0.0, max(float(samples.max()), 1e-9)))
+    return {
+        "samples": len(samples),
+        "mean": float(samples.mean()),
+        "median": float(median),
+        "mass": mass,
+        "low": float(low),
+        "high": float(high),
+        "at_cap": float(np.mean(samples >= model.probability_cap)),
+        "counts": counts.tolist(),
+        "edges": edges.tolist(),
+    }
+
+
+def bands(profile, count=DEFAULT_SAMPLES, workers=None, model=None):
+    """Credible interval and histogram for ``profile``."""
+    model = model or scoring.current()
+    return summarize(simulate(profile, count, workers, model=model), model=model)
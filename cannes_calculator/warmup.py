@@ -0,0 +1,178 @@
+"""Warm a fresh app process up before its first visitors arrive.
+
+After a deploy, the first sessions would otherwise pay for the lazy imports,
+matplotlib's font cache and the sidebar charts. ``start`` runs those steps
+once per process on a daemon thread. ``launch`` calls it at process start:
+
+``imports``
+    pandas, matplotlib's figure and Agg modules and PIL, through
+    ``perf.timed_import``.
+``sidebar_charts``
+    The Top Winning Countries, Top Agencies & Networks and Submission Trends
+    charts. The first one also builds matplotlib's font cache.
+``distribution``
+    Builds and saves the all-inputs distribution if no up-to-date one exists.
+
+A failed step is logged and skipped, since the app works without it, only
+slower. The process reports ready when every step has been attempted.
+``/ready`` on the metrics endpoint answers 503 until then and 200 after, so
+a health check can hold traffic. Started with ``python -m
+cannes_calculator.launch``, the endpoint and the warm-up run before any
+session connects. Under a plain ``streamlit run`` they only start with the
+first session; ``--url`` makes the command below open one before waiting.
+
+Set ``CANNES_WARMUP=0`` to skip the warm-up; the process is then ready at once.
+
+Usage:
+    python -m cannes_calculator.warmup --metrics http://127.0.0.1:9464 [--url ws://127.0.0.1:8501] [--timeout 300]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from cannes_calculator import charts, distribution, metrics, perf
+
+ENABLED = os.environ.get("CANNES_WARMUP", "1") != "0"
+
+IMPORTS = ("pandas", "matplotlib.figure", "matplotlib.backends.backend_agg", "PIL.Image")
+
+logger = logging.getLogger("cannes_calculator.warmup")
+
+_lock = threading.Lock()
+_state = {"ready": False, "started": None, "steps": {}, "errors": {}}
+_thread = None
+
+
+def _import_modules():
+    for name in IMPORTS:
+        perf.timed_import(name)
+
+
+def _render_sidebar_charts():
+    charts.countries_chart_png()
+    charts.networks_chart_png()
+    charts.submissions_chart_png()
+
+
+def _build_distribution():
+    if distribution.load() is None:
+        distribution.load_or_build()
+
+
+STEPS = (
+    ("imports", _import_modules),
+    ("sidebar_charts", _render_sidebar_charts),
+    ("distribution", _build_distribution),
+)
+
+
+def run():
+    """Run every step in this thread; returns ``status()``."""
+    with _lock:
+        _state["started"] = time.time()
+    for name, step in STEPS:
+        start_time = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.error(f"Warm-up step {name} failed: {e}")
+            with _lock:
+                _state["errors"][name] = str(e)
+        with _lock:
+            _state["steps"][name] = round(time.perf_counter() - start_time, 3)
+    with _lock:
+        _state["ready"] = True
+        total = time.time() - _state["started"]
+    logger.info(f"Warmed up in {total:.1f}s ({perf.format_timings(status()['steps'])})")
+    return status()
+
+
+def start():
+    """Start the warm-up on a daemon thread once per process (or mark the process ready when disabled)."""
+    global _thread
+    metrics.register_readiness(status)
+    metrics.register_collector(metric_gauges)
+    with _lock:
+        if not ENABLED:
+            _state["ready"] = True
+            return None
+        if _thread is None:
+            _thread = threading.Thread(target=run, name="cannes-warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def status():
+    with _lock:
+        return {
+            "ready": _state["ready"],
+            "steps": dict(_state["steps"]),
+            "errors": dict(_state["errors"]),
+        }
+
+
+def metric_gauges():
+    """Readiness for ``metrics.register_collector``."""
+    return {"cannes_ready": int(status()["ready"])}
+
+
+async def _open_session(url):
+    from cannes_calculator import loadgen
+
+    session = loadgen.Session(url, random.Random(0))
+    try:
+        await session.connect()
+        await session.rerun()
+    finally:
+        session.close()
+
+
+def wait_ready(metrics_url, timeout, interval=1.0):
+    """Poll ``/ready`` until it answers 200; returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(metrics_url.rstrip("/") + metrics.READY_PATH, timeout=interval) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(interval)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cannes_calculator.warmup",
+        description="Wait until a fresh app server is warmed up.",
+    )
+    parser.add_argument("--url", help="Streamlit server to open a session on first, when not started by launch")
+    port = os.environ.get("CANNES_METRICS_PORT")
+    parser.add_argument("--metrics", default=f"http://127.0.0.1:{port}" if port else None,
+                        help="the server's metrics endpoint (default: CANNES_METRICS_PORT on localhost)")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for readiness")
+    args = parser.parse_args(argv)
+    if not args.metrics:
+        parser.error("--metrics is required when CANNES_METRICS_PORT is not set")
+
+    start_time = time.monotonic()
+    if args.url:
+        try:
+            asyncio.run(asyncio.wait_for(_open_session(args.url), args.timeout))
+        except Exception as e:
+            parser.exit(1, f"error: couldn't open a session on {args.url}: {e}\n")
+    if not wait_ready(args.metrics, args.timeout - (time.monotonic() - start_time)):
+        parser.exit(1, f"error: not ready after {args.timeout:.0f}s\n")
+    print(f"Ready after {time.monotonic() - start_time:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Best achievable probability from changing the factors a team controls.
+
+Every combination of the controllable factors is scored at once: the
+factor arrays are broadcast into one grid (16 x 4 x 5 x 5 for the defaults)
+and multiplied by the part of the probability that stays fixed. Factors the
+user holds fixed collapse to a single slot.
+
+Because of ``PROBABILITY_CAP`` many combinations can tie at the cap. A
+suggestion is only kept if every change in it is needed, that is, undoing
+any single change would lower the probability. This drops combinations that
+add changes without any gain.
+"""
+import numpy as np
+
+from cannes_calculator import scoring
+
+# Factors a team can change about an entry, in search order
+CONTROLLABLE = ("category", "budget_level", "creative_approach", "campaign_results")
+
+DEFAULT_TOP_K = 5
+
+
+def _fixed_part(profile, searched, model):
+    """Probability multiplier contributed by everything outside the search."""
+    probability = model.base_probability
+    for field, table in model.factors.items():
+        if field not in searched:
+            probability *= table[profile[field]]
+    if profile["previous_wins"] > 0:
+        probability *= scoring.previous_wins_multiplier(profile["previous_wins"], model)
+    if profile["years_experience"] > 1:
+        probability *= scoring.experience_multiplier(profile["years_experience"], model)
+    return probability
+
+
+def best_changes(profile, k=DEFAULT_TOP_K, fixed=(), fields=CONTROLLABLE, model=None):
+    """Top ``k`` changes to ``fields`` (minus ``fixed``) ranked by probability gain.
+
+    Returns a list of ``{"changes": {field: option}, "probability", "gain"}``
+    with the largest gain first; ties prefer fewer changes. The list is empty
+    when nothing beats the current profile.
+    """
+    model = model or scoring.current()
+    scoring.check_profile(profile)
+    unknown = [field for field in list(fields) + list(fixed) if field not in model.factors]
+    if unknown:
+        raise ValueError(f"Not a categorical factor: {', '.join(unknown)}")
+    searched = [field for field in fields if field not in fixed]
+    current = scoring.score(**{field: profile[field] for field in scoring.FIELDS}, model=model)
+    if not searched:
+        return []
+
+    current_codes = [scoring.options(field).index(profile[field]) for field in searched]
+    factor_arrays = [model.arrays[field] for field in searched]
+    shape = [len(factors) for factors in factor_arrays]
+
+    def axis(values, position):
+        return values.reshape([-1 if i == position else 1 for i in range(len(searched))])
+
+    uncapped = np.full(shape, _fixed_part(profile, searched, model))
+    changed = np.zeros(shape, dtype=np.int8)
+    for position, (factors, code) in enumerate(zip(factor_arrays, current_codes)):
+        uncapped = uncapped * axis(factors, position)
+        changed = changed + axis(np.arange(len(factors)) != code, position)
+    probability = np.minimum(uncapped, model.probability_cap)
+
+    # Compare within the grid: ``score`` multiplies in another order, so the
+    # unchanged cell can round a hair above ``current``
+    unchanged = probability[tuple(current_codes)]
+    keep = (probability > unchanged) & (changed > 0)
+    # A change is needed if reverting just that factor loses probability
+    for position, code in enumerate(current_codes):
+        reverted = np.take(probability, [code], axis=position)
+        is_changed = axis(np.arange(shape[position]) != code, position)
+        keep &= ~is_changed | (reverted < probability)
+
+    candidates = np.flatnonzero(keep)
+    order = np.lexsort((changed.ravel()[candidates], -probability.ravel()[candidates]))
+    results = []
+    for flat_index in candidates[order]:
+        if len(results) == k:
+            break
+        codes = np.unravel_index(flat_index, shape)
+        changes = {
+            field: scoring.options(field)[code]
+            for field, code, current_code in zip(searched, codes, current_codes)
+            if code != current_code
+        }
+        new_probability = scoring.score(**{**{field: profile[field] for field in scoring.FIELDS}, **changes}, model=model)
+        if new_probability > current:
+            results.append({"changes": changes, "probability": new_probability, "gain": new_probability - current})
+    return results
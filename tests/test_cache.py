@@ -0,0 +1,143 @@
+import os
+import pickle
+import threading
+import time
+
+import pytest
+
+from cannes_calculator import cache
+
+
+def test_lru_evicts_least_recently_used():
+    lru = cache.LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_entries_expire_after_ttl():
+    lru = cache.LRUCache(4, ttl=0.05)
+    lru.put("a", 1)
+    assert lru.get("a") == 1
+    time.sleep(0.1)
+    assert lru.get("a", "gone") == "gone"
+    assert lru.stats()["expirations"] == 1
+
+
+def test_concurrent_misses_run_the_factory_once():
+    lru = cache.LRUCache(4)
+    calls = []
+    release = threading.Event()
+
+    def factory():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lru.get_or_create("key", factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while lru.stats()["coalesced"] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["value"] * 8
+    assert lru.get("key") == "value"
+
+
+def test_factory_error_reaches_every_waiting_caller():
+    lru = cache.LRUCache(4)
+    release = threading.Event()
+
+    def factory():
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            lru.get_or_create("key", factory)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while lru.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["boom"] * 4
+    # Nothing was cached, so the next call runs the factory again
+    assert lru.get_or_create("key", lambda: "retry") == "retry"
+
+
+def test_lru_fills_misses_from_the_shared_cache(tmp_path):
+    shared = cache.SharedCache(str(tmp_path))
+    shared.put("result", "key", {"probability": 0.25})
+    lru = cache.LRUCache(4, shared=shared.namespace("result"))
+    assert lru.get_or_create("key", lambda: pytest.fail("factory ran")) == {"probability": 0.25}
+
+
+def test_shared_cache_round_trips_bytes_and_json(tmp_path):
+    shared = cache.SharedCache(str(tmp_path))
+    shared.put("charts", "png", b"\x89PNG\r\n")
+    shared.put("result", "row", {"breakdown": (("Country", "1.00x"),), "band": None})
+    assert shared.get("charts", "png") == b"\x89PNG\r\n"
+    assert shared.get("result", "row") == {"breakdown": [["Country", "1.00x"]], "band": None}
+    assert shared.get_or_create("charts", "other", lambda: b"drawn") == b"drawn"
+    assert shared.get_or_create("charts", "other", lambda: pytest.fail("factory ran")) == b"drawn"
+
+
+def test_shared_cache_uses_a_private_subdirectory(tmp_path):
+    shared = cache.SharedCache(str(tmp_path))
+    assert os.path.dirname(shared.directory) == str(tmp_path)
+    assert os.stat(shared.directory).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="needs POSIX permissions")
+def test_shared_cache_refuses_a_directory_open_to_others(tmp_path):
+    directory = tmp_path / f"cannes-{os.getuid()}"
+    directory.mkdir(mode=0o700)
+    directory.chmod(0o777)
+    shared = cache.SharedCache(str(tmp_path))
+    assert not shared.enabled
+    assert shared.get_or_create("charts", "png", lambda: b"drawn") == b"drawn"
+
+
+def test_shared_cache_never_unpickles(tmp_path):
+    class Exploit:
+        def __reduce__(self):
+            return (pytest.fail, ("unpickled a shared entry",))
+
+    shared = cache.SharedCache(str(tmp_path))
+    path = shared._path("charts", "png")[0]
+    with open(path, "wb") as f:
+        pickle.dump(Exploit(), f)
+    assert shared.get("charts", "png", "missing") == "missing"
+    assert not os.path.exists(path)
+
+
+def test_shared_cache_prunes_oldest_entries(tmp_path):
+    shared = cache.SharedCache(str(tmp_path), max_bytes=2500)
+    for index in range(5):
+        shared.put("charts", index, bytes(1000))
+        os.utime(shared._path("charts", index)[0], (index, index))
+    shared.prune()
+    assert [shared.get("charts", index) is not None for index in range(5)] == [False, False, False, True, True]
+
+
+def test_disabled_shared_cache_always_misses():
+    shared = cache.SharedCache(None)
+    shared.put("charts", "png", b"data")
+    assert shared.get("charts", "png") is None
+    assert shared.get_or_create("charts", "png", lambda: b"drawn") == b"drawn"
@@ -0,0 +1,44 @@
+import pytest
+
+from cannes_calculator import calculation, models, perf, scoring, whatif
+
+PROFILE = {
+    "category": "Radio & Audio",
+    "country": "India",
+    "agency_size": "Small Boutique",
+    "previous_wins": 1,
+    "years_experience": 4,
+    "budget_level": "Below Average",
+    "brand_prominence": "Local Business",
+    "campaign_results": "Good",
+    "creative_approach": "Standard Approach",
+}
+
+
+@pytest.fixture
+def doubled_model():
+    table = models.BASELINE.table()
+    table["factors"]["category"] = {option: 2 * factor for option, factor in table["factors"]["category"].items()}
+    previous = scoring.current()
+    yield scoring.use(models.Model(table, reference=models.BASELINE))
+    scoring.use(previous)
+
+
+def test_reload_during_compute_does_not_mix_models(doubled_model, monkeypatch):
+    # The watcher swaps the baseline in right after the probability is scored
+    monkeypatch.setattr(perf, "mark", lambda name: scoring.use(models.BASELINE))
+    result = calculation.compute(PROFILE, show_uncertainty=True)
+    assert scoring.current() is models.BASELINE
+
+    factor = doubled_model.factors["category"]["Radio & Audio"]
+    assert result["probability"] == scoring.score(**PROFILE, model=doubled_model)
+    assert result["avg_win_rate"] == doubled_model.base_probability * factor
+    assert result["breakdown"][0] == ("Category Type", f"Radio & Audio: {factor:.2f}x")
+    assert result["suggestions"] == tuple(
+        whatif.best_changes(PROFILE, k=calculation.SUGGESTIONS, model=doubled_model)
+    )
+
+
+def test_cache_key_follows_the_model(doubled_model):
+    assert calculation.cache_key(PROFILE) == calculation.cache_key(PROFILE, model=doubled_model)
+    assert calculation.cache_key(PROFILE) != calculation.cache_key(PROFILE, model=models.BASELINE)
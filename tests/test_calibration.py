@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from cannes_calculator import bench, calibration, history, models, scoring
+
+
+def _statistics(probability_of, count=20_000, seed=0):
+    """Cell counts of random profiles whose wins are drawn from ``probability_of(encoded)``."""
+    rng = np.random.default_rng(seed)
+    encoded = scoring.encode_profiles(bench.random_profiles(count, seed))
+    wins = (rng.random(count) < probability_of(encoded)).astype(np.int64)
+    return calibration.merge_statistics((calibration.cell_keys(encoded), np.ones(count, dtype=np.int64), wins))
+
+
+@pytest.mark.parametrize("rate", [
+    lambda encoded: np.full(len(encoded["category"]), 0.1),
+    lambda encoded: 0.3 / (1 + encoded["previous_wins"] + encoded["years_experience"]),
+])
+def test_fit_without_a_positive_win_effect(rate):
+    statistics = _statistics(rate)
+    table, report = calibration.fit(statistics, start=models.BASELINE.table())
+    assert table["previous_win_step"] >= calibration.MIN_STEP
+    assert table["experience_step"] >= calibration.MIN_STEP
+    models.Model(table, reference=models.BASELINE)
+    assert report["deviance"] <= report["start_deviance"]
+
+
+def test_fit_recovers_the_generating_steps():
+    statistics = _statistics(lambda encoded: scoring.score_codes(encoded), count=200_000)
+    table, report = calibration.fit(statistics, start=models.BASELINE.table())
+    assert report["converged"]
+    assert table["previous_win_step"] == pytest.approx(scoring.PREVIOUS_WIN_STEP, abs=0.02)
+    assert table["experience_step"] == pytest.approx(scoring.EXPERIENCE_STEP, abs=0.02)
+
+
+def test_cell_keys_round_trip():
+    encoded = scoring.encode_profiles(bench.random_profiles(1000))
+    decoded = calibration.decode_keys(calibration.cell_keys(encoded))
+    for field in calibration.KEY_FIELDS:
+        np.testing.assert_array_equal(decoded[field], encoded[field])
+
+
+def _records(year, count, seed):
+    profiles = bench.random_profiles(count, seed)
+    awards = np.where(np.random.default_rng(seed).random(count) < 0.2, "Gold", "")
+    records = {"year": [year] * count, "agency": ["A"] * count, "network": ["N"] * count, "award": list(awards)}
+    records.update({field: list(np.asarray(profiles[field]).tolist()) for field in scoring.FIELDS})
+    return records
+
+
+def test_folded_statistics_match_a_full_rebuild(tmp_path):
+    store_path, model_dir = str(tmp_path / "store"), str(tmp_path / "models")
+    history.write_years({2023: _records(2023, 500, 1), 2024: _records(2024, 500, 2)}, store_path)
+    calibration.rebuild_statistics(history.load(store_path), model_dir)
+
+    # Add a year and replace an existing one, then fold both in
+    history.write_years({2024: _records(2024, 300, 3), 2025: _records(2025, 400, 4)}, store_path)
+    store = history.load(store_path)
+    folded, years, skipped = calibration.fold_years(store, [2024, 2025], model_dir)
+    full, full_years, full_skipped = calibration.collect(store)
+
+    assert (years, skipped) == (full_years, full_skipped) == ([2023, 2024, 2025], 0)
+    for folded_part, full_part in zip(folded, full):
+        np.testing.assert_array_equal(folded_part, full_part)
+    assert folded[1].sum() == 1200
@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+from cannes_calculator import cube, models, scoring
+
+
+@pytest.fixture
+def small_model():
+    """A model with two factor levels per table, so its cube stays small."""
+    table = models.BASELINE.table()
+    for field, factors in table["factors"].items():
+        table["factors"][field] = {option: 1.0 + 0.25 * (code % 2) for code, option in enumerate(factors)}
+    previous = scoring.current()
+    yield scoring.use(models.Model(table, reference=models.BASELINE))
+    scoring.use(previous)
+
+
+def _random_profiles(rng, count):
+    profiles = []
+    for _ in range(count):
+        profile = {field: rng.choice(scoring.options(field)) for field in scoring.CATEGORICAL_FACTORS}
+        profile["previous_wins"] = rng.randint(*scoring.PREVIOUS_WINS_RANGE)
+        profile["years_experience"] = rng.randint(*scoring.YEARS_EXPERIENCE_RANGE)
+        profiles.append(profile)
+    return profiles
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float64", 0), ("float32", 1e-6)])
+def test_lookup_matches_score(tmp_path, small_model, dtype, tolerance):
+    path = str(tmp_path / "cube.npy")
+    cube.build(path, dtype)
+    probability_cube = cube.ProbabilityCube(path)
+    for profile in _random_profiles(random.Random(0), 2000):
+        assert probability_cube.lookup(**profile) == pytest.approx(scoring.score(**profile), rel=tolerance, abs=0)
+
+
+def test_lookup_codes_matches_score_codes(tmp_path, small_model):
+    path = str(tmp_path / "cube.npy")
+    cube.build(path, "float64")
+    probability_cube = cube.ProbabilityCube(path)
+    encoded = scoring.encode_profiles(scoring.records_to_columns(_random_profiles(random.Random(1), 2000)))
+    np.testing.assert_array_equal(probability_cube.lookup_codes(encoded), scoring.score_codes(encoded))
+
+
+def test_build_refuses_oversized_cube(tmp_path):
+    path = str(tmp_path / "cube.npy")
+    with pytest.raises(ValueError, match="more than the limit"):
+        cube.build(path, max_cells=1000)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_load_rejects_other_model(tmp_path, small_model):
+    path = str(tmp_path / "cube.npy")
+    cube.build(path)
+    scoring.use(models.BASELINE)
+    assert cube.load(path) is None
@@ -0,0 +1,40 @@
+import threading
+
+import numpy as np
+
+from cannes_calculator import distribution
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "distribution.npz")
+    built = distribution.Distribution.from_counts(np.array([0.03, 0.01, 0.03, 0.2]), [1, 2, 3, 4], source="test")
+    built.save(path)
+    loaded = distribution.load(path)
+    np.testing.assert_array_equal(loaded.values, [0.01, 0.03, 0.2])
+    np.testing.assert_array_equal(loaded.cumulative, [2, 6, 10])
+    assert loaded.meta == built.meta
+    assert loaded.percentile(0.03) == built.percentile(0.03) == 40.0
+    assert [p.name for p in tmp_path.iterdir()] == ["distribution.npz"]
+
+
+def test_load_ignores_torn_or_missing_file(tmp_path):
+    path = tmp_path / "distribution.npz"
+    assert distribution.load(str(path)) is None
+    path.write_bytes(b"PK\x03\x04 torn")
+    assert distribution.load(str(path)) is None
+
+
+def test_load_or_build_is_shared_between_threads(tmp_path, monkeypatch):
+    path = str(tmp_path / "distribution.npz")
+    builds = []
+    build_all = distribution.build_all
+    monkeypatch.setattr(distribution, "build_all", lambda: builds.append(1) or build_all())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(distribution.load_or_build(path))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert all(result.total == results[0].total for result in results)
+    assert distribution.load(path).total == results[0].total
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from cannes_calculator import history
+
+
+def _year(year, categories, awards, agencies=None):
+    rows = len(categories)
+    return {
+        "year": [year] * rows,
+        "category": list(categories),
+        "country": ["France"] * rows,
+        "agency": list(agencies or ["Agency A"] * rows),
+        "network": ["Independent"] * rows,
+        "award": list(awards),
+    }
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "store")
+    history.write_years({
+        2023: _year(2023, ["Film", "Film", "PR"], ["Gold", "", "Bronze"]),
+        2024: _year(2024, ["PR"], ["Shortlist"]),
+    }, path)
+    return path
+
+
+def test_counts_and_wins(store_path):
+    store = history.load(store_path)
+    assert store.years == [2023, 2024]
+    assert store.rows == 4
+    assert store.latest_year == 2024
+    assert store.counts("category", 2023) == {"Film": 2, "PR": 1}
+    assert store.counts("category", 2023, wins_only=True) == {"Film": 1, "PR": 1}
+    assert store.wins_by_year("category") == ([2023, 2024], {"Film": [1, 0], "PR": [1, 0]})
+
+
+def test_replacing_a_year_keeps_existing_codes(store_path):
+    history.write_years({2024: _year(2024, ["Design", "PR"], ["Silver", "Gold"])}, store_path)
+    store = history.load(store_path)
+    assert store.vocab["category"][:2] == ["Film", "PR"]
+    assert store.counts("category", 2023) == {"Film": 2, "PR": 1}
+    assert store.counts("category", 2024, wins_only=True) == {"Design": 1, "PR": 1}
+
+
+@pytest.mark.parametrize("bad_year", [
+    {"year": [2024], "category": ["Film"]},
+    dict(_year(2024, ["Film"], ["Gold"]), year=[99999]),
+])
+def test_failed_import_leaves_the_store_untouched(store_path, bad_year):
+    before = {name: open(os.path.join(store_path, name), "rb").read() for name in ("meta.json", "vocab.json")}
+    with pytest.raises(ValueError):
+        history.write_years({
+            2023: _year(2023, ["Innovation"], ["Grand Prix"], agencies=["New Agency"]),
+            2024: bad_year,
+        }, store_path)
+
+    assert {name: open(os.path.join(store_path, name), "rb").read() for name in before} == before
+    assert sorted(os.listdir(store_path)) == ["2023", "2024", "meta.json", "vocab.json"]
+    store = history.load(store_path)
+    assert store.counts("category", 2023) == {"Film": 2, "PR": 1}
+    assert store.counts("agency", 2023) == {"Agency A": 3}
+
+
+def test_mismatched_columns_rejected(store_path):
+    records = dict(_year(2025, ["Film"], ["Gold"]), previous_wins=[1], years_experience=[2],
+                   agency_size=["Small Boutique"], budget_level=["Average"], brand_prominence=["Global Leader"],
+                   campaign_results=["Strong"], creative_approach=["Solid Execution"])
+    with pytest.raises(ValueError, match="Store has columns"):
+        history.write_years({2025: records}, store_path)
@@ -0,0 +1,36 @@
+import logging
+
+from cannes_calculator import logs
+
+
+class _Collect(logging.Handler):
+    def __init__(self, sampler):
+        super().__init__()
+        self.records = []
+        self.addFilter(sampler)
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_handlers_sharing_a_sampler_keep_the_same_records():
+    sampler = logs.SamplingFilter(0.5)
+    handlers = [_Collect(sampler), _Collect(sampler)]
+    logger = logging.getLogger("cannes_calculator.tests.sampling")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in handlers:
+        logger.addHandler(handler)
+    try:
+        for index in range(1000):
+            logger.info("record %d", index)
+        logger.warning("always kept")
+    finally:
+        for handler in handlers:
+            logger.removeHandler(handler)
+
+    kept = [record.getMessage() for record in handlers[0].records]
+    assert kept == [record.getMessage() for record in handlers[1].records]
+    assert kept[-1] == "always kept"
+    assert sampler.dropped == 1001 - len(kept)
+    assert 0 < sampler.dropped < 1000
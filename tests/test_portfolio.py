@@ -0,0 +1,91 @@
+import itertools
+import random
+
+import pytest
+
+from cannes_calculator import portfolio, scoring
+
+WORK = {
+    "name": "Launch film",
+    "country": "Brazil",
+    "agency_size": "Mid-Size Independent",
+    "previous_wins": 2,
+    "years_experience": 6,
+    "budget_level": "Above Average",
+    "brand_prominence": "National Player",
+    "campaign_results": "Strong",
+    "creative_approach": "Fresh Perspective",
+}
+WORK_FIELDS = {field: WORK[field] for field in portfolio.WORK_FIELDS}
+
+
+def _brute_force(values, weights, capacity):
+    best = 0.0
+    for size in range(len(values) + 1):
+        for chosen in itertools.combinations(range(len(values)), size):
+            if sum(weights[i] for i in chosen) <= capacity:
+                best = max(best, sum(values[i] for i in chosen))
+    return best
+
+
+def test_knapsack_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(300):
+        count = rng.randint(0, 9)
+        values = [rng.choice([0.0, rng.random()]) for _ in range(count)]
+        weights = [rng.randint(0, 8) for _ in range(count)]
+        capacity = rng.randint(0, 20)
+        chosen = portfolio.knapsack(values, weights, capacity)
+        assert len(set(chosen)) == len(chosen)
+        assert sum(weights[i] for i in chosen) <= capacity
+        assert sum(values[i] for i in chosen) == pytest.approx(_brute_force(values, weights, capacity))
+
+
+def test_fee_unit_is_the_gcd_of_rounded_up_fees():
+    assert portfolio.fee_unit([1500, 2500, 750], 25_000) == 250
+    assert portfolio.fee_unit([1500, 749.5], 25_000) == 750
+    assert portfolio.fee_unit([0, 0], 100) == 1
+
+
+def test_fee_unit_coarsens_large_budgets():
+    budget = portfolio.MAX_CAPACITY * 1000 + 1
+    assert portfolio.fee_unit([1], budget) == 1001
+
+
+def test_rounded_fees_never_exceed_the_budget():
+    fees = {category: 999.5 for category in scoring.options("category")}
+    # 3 x 999.5 fits, but fees are rounded up to 1000 units, so the plan stays conservative
+    result = portfolio.plan([dict(WORK, categories="Film;PR;Design")], fees, 2999)
+    assert len(result["entries"]) == 2
+    assert result["total_fee"] <= result["budget"]
+
+
+def test_plan_picks_the_most_probable_entries():
+    fees = {category: 1000 for category in scoring.options("category")}
+    result = portfolio.plan([WORK], fees, 3000)
+    probabilities = sorted(
+        (scoring.score(**dict(WORK_FIELDS, category=category)) for category in scoring.options("category")),
+        reverse=True,
+    )
+    assert [entry["probability"] for entry in result["entries"]] == probabilities[:3]
+    assert result["options"] == len(scoring.options("category"))
+
+
+def test_zero_budget_plans_nothing():
+    result = portfolio.plan([WORK], {}, 0)
+    assert result["entries"] == []
+    assert result["total_fee"] == 0
+
+
+def test_entries_costing_more_than_the_budget_are_skipped():
+    fees = {category: 5000 for category in scoring.options("category")}
+    fees["PR"] = 1000
+    result = portfolio.plan([WORK], fees, 4999)
+    assert [entry["category"] for entry in result["entries"]] == ["PR"]
+
+
+def test_negative_budget_and_unknown_category_rejected():
+    with pytest.raises(ValueError, match="Budget"):
+        portfolio.plan([WORK], {}, -1)
+    with pytest.raises(ValueError, match="unknown category 'Poetry'"):
+        portfolio.plan([dict(WORK, categories="Film;Poetry")], {}, 5000)
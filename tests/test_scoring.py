@@ -0,0 +1,25 @@
+import pytest
+
+from cannes_calculator import bench, scoring
+
+
+def test_score_batch_matches_score():
+    columns = bench.random_profiles(5000)
+    batch = scoring.score_batch(columns)
+    for index in range(len(batch)):
+        profile = {field: columns[field][index] for field in scoring.FIELDS}
+        assert batch[index] == scoring.score(**profile)
+
+
+def test_probability_is_capped():
+    profile = {field: max(table, key=table.get) for field, table in scoring.CATEGORICAL_FACTORS.items()}
+    profile.update(previous_wins=scoring.PREVIOUS_WINS_RANGE[1], years_experience=scoring.YEARS_EXPERIENCE_RANGE[1])
+    assert scoring.score(**profile) == scoring.PROBABILITY_CAP
+    assert scoring.score_batch({field: [value] for field, value in profile.items()})[0] == scoring.PROBABILITY_CAP
+
+
+def test_unknown_option_names_the_field():
+    columns = bench.random_profiles(3)
+    columns["country"] = list(columns["country"][:2]) + ["Atlantis"]
+    with pytest.raises(ValueError, match="Unknown country option: 'Atlantis'"):
+        scoring.score_batch(columns)
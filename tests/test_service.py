@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from cannes_calculator import models, scoring, service
+
+PROFILE = {
+    "category": "Digital",
+    "country": "Brazil",
+    "agency_size": "Large Network Agency",
+    "previous_wins": 2,
+    "years_experience": 5,
+    "budget_level": "Above Average",
+    "brand_prominence": "National Player",
+    "campaign_results": "Strong",
+    "creative_approach": "Fresh Perspective",
+}
+
+INVALID = [
+    ("previous_wins", True),
+    ("previous_wins", "3"),
+    ("previous_wins", 1.0),
+    ("previous_wins", -1),
+    ("years_experience", 31),
+    ("years_experience", None),
+    ("country", "Atlantis"),
+    ("category", 1),
+]
+
+
+def _post(path, payload):
+    return service.ScoringService().dispatch("POST", path, json.dumps(payload).encode("utf-8"))
+
+
+def test_single_and_bulk_agree():
+    single = _post("/score", PROFILE)
+    bulk = _post("/score/bulk", {"profiles": [PROFILE, PROFILE]})
+    assert single["probability"] == scoring.score(**PROFILE)
+    assert bulk == {"count": 2, "probabilities": [single["probability"]] * 2}
+
+
+@pytest.mark.parametrize("field, value", INVALID)
+def test_single_and_bulk_reject_the_same_profiles(field, value):
+    profile = dict(PROFILE, **{field: value})
+    with pytest.raises(service.HTTPError) as single:
+        _post("/score", profile)
+    with pytest.raises(service.HTTPError) as bulk:
+        _post("/score/bulk", [PROFILE, profile])
+    assert single.value.status == bulk.value.status == 400
+    assert str(bulk.value) == f"profiles[1]: {single.value}"
+
+
+def test_missing_field_rejected_by_both():
+    profile = {field: value for field, value in PROFILE.items() if field != "country"}
+    for path, payload in (("/score", profile), ("/score/bulk", [profile])):
+        with pytest.raises(service.HTTPError, match="Missing profile field: country"):
+            _post(path, payload)
+
+
+@pytest.mark.parametrize("values", [[True, 2], ["3"], [1, "2"]])
+def test_encode_profiles_rejects_bools_and_strings(values):
+    columns = {field: [PROFILE[field]] * len(values) for field in scoring.FIELDS}
+    columns["previous_wins"] = values
+    with pytest.raises(ValueError, match="previous_wins must be whole numbers"):
+        scoring.encode_profiles(columns)
+
+
+def test_reload_during_score_does_not_mix_models(monkeypatch):
+    table = models.BASELINE.table()
+    table["factors"]["country"] = {option: 2 * factor for option, factor in table["factors"]["country"].items()}
+    doubled = models.Model(table, reference=models.BASELINE)
+    score = scoring.score
+
+    def score_then_reload(**kwargs):
+        probability = score(**kwargs)
+        scoring.use(models.BASELINE)
+        return probability
+
+    scoring.use(doubled)
+    monkeypatch.setattr(scoring, "score", score_then_reload)
+    try:
+        response = _post("/score", PROFILE)
+    finally:
+        scoring.use(models.BASELINE)
+    assert response["probability"] == score(**PROFILE, model=doubled)
+    assert response["breakdown"]["country"] == doubled.factors["country"]["Brazil"]
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from cannes_calculator import scoring, whatif
+
+PROFILE = {
+    "category": "Film",
+    "country": "France",
+    "agency_size": "Small Boutique",
+    "previous_wins": 0,
+    "years_experience": 1,
+    "budget_level": "High (Top 10%)",
+    "brand_prominence": "Global Leader",
+    "campaign_results": "Exceptional (Measurable Impact)",
+    "creative_approach": "Solid Execution",
+}
+
+
+def _random_profile(rng):
+    profile = {field: rng.choice(scoring.options(field)) for field in scoring.CATEGORICAL_FACTORS}
+    profile["previous_wins"] = rng.randint(*scoring.PREVIOUS_WINS_RANGE)
+    profile["years_experience"] = rng.randint(*scoring.YEARS_EXPERIENCE_RANGE)
+    return profile
+
+
+def test_unchanged_profile_is_never_suggested():
+    # The grid and ``score`` round differently; the current cell must not win
+    fixed = ("category", "budget_level", "creative_approach")
+    for result in whatif.best_changes(PROFILE, fixed=fixed):
+        assert result["changes"]
+        assert result["gain"] > 0
+
+
+def test_every_suggestion_gains():
+    rng = random.Random(0)
+    for _ in range(500):
+        profile = _random_profile(rng)
+        fixed = tuple(rng.sample(whatif.CONTROLLABLE, rng.randint(0, 3)))
+        current = scoring.score(**profile)
+        for result in whatif.best_changes(profile, fixed=fixed):
+            assert result["changes"]
+            assert result["gain"] > 0
+            assert result["probability"] == scoring.score(**{**profile, **result["changes"]})
+            assert result["gain"] == result["probability"] - current
+
+
+def test_results_ranked_by_gain():
+    results = whatif.best_changes(PROFILE, k=10)
+    assert len(results) <= 10
+    gains = [result["gain"] for result in results]
+    assert gains == sorted(gains, reverse=True)
+
+
+def test_fixed_everything_returns_nothing():
+    assert whatif.best_changes(PROFILE, fixed=whatif.CONTROLLABLE) == []
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(ValueError, match="Not a categorical factor"):
+        whatif.best_changes(PROFILE, fields=("country", "colour"))